@@ -1,5 +1,5 @@
 export async function fetchAutoWatchlist() {
-  const res = await fetch("http://localhost:8008/autowatchlist", {
+  const res = await fetch("/api/screen/", {
     cache: "no-store",
   });
 
@@ -34,28 +34,42 @@ export default function AutoWatchlist() {
   
 
   useEffect(() => {
-    async function fetchData() {
-      try {
-        const res = await fetch('/api/autowatchlist');
-        const json = await res.json();
-        const mapped = Object.entries(json).map(([symbol, stock]: [string, any]) => ({
-          symbol,
-          score: stock.score,
-          tags: stock.tags || [],
-          isBlocked: stock.isBlocked || false,
-          reasons: stock.reasons || [],
-          tierHits: stock.tierHits || { T1: [], T2: [], T3: [] },
-        }));
-        
-        setData(mapped);
-      } catch (err) {
-        console.error('Failed to fetch autowatchlist', err);
-      } finally {
-        setLoading(false);
-      }
-    }
+    const toStock = (symbol: string, stock: any): Stock => ({
+      symbol,
+      score: stock.score,
+      tags: stock.tags || [],
+      isBlocked: stock.isBlocked || false,
+      reasons: stock.reasons || [],
+      tierHits: stock.tierHits || { T1: [], T2: [], T3: [] },
+    });
+
+    // The stream sends the full watchlist on connect, then only the symbols
+    // a pipeline run added, removed or changed
+    const source = new EventSource('/api/autowatchlist/stream');
+
+    source.addEventListener('snapshot', (e) => {
+      const json = JSON.parse((e as MessageEvent).data);
+      setData(Object.entries(json).map(([symbol, stock]) => toStock(symbol, stock)));
+      setLoading(false);
+    });
+
+    source.addEventListener('diff', (e) => {
+      const { added, removed, changed } = JSON.parse((e as MessageEvent).data);
+      setData((prev) => {
+        const gone = new Set<string>([...removed, ...Object.keys(added)]);
+        const next = prev
+          .filter((stock) => !gone.has(stock.symbol))
+          .map((stock) => (changed[stock.symbol] ? { ...stock, ...changed[stock.symbol] } : stock));
+        return next.concat(Object.entries(added).map(([symbol, stock]) => toStock(symbol, stock)));
+      });
+    });
+
+    source.onerror = () => {
+      console.error('Autowatchlist stream interrupted, reconnecting');
+      setLoading(false);
+    };
 
-    fetchData();
+    return () => source.close();
   }, []);
 
   const toggleRow = (symbol: string, isCmdOrCtrl: boolean) => {
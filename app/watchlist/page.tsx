@@ -6,16 +6,14 @@ type Stock = {
   symbol: string;
   score: number;
   tags: string[];
-  tier1: string[];
-  tier2: string[];
-  tier3: string[];
+  tierHits: Record<string, string[]>;
 };
 
 export default function WatchlistPage() {
   const [data, setData] = useState<Stock[]>([]);
 
   useEffect(() => {
-    fetch('http://localhost:8008/autowatchlist')
+    fetch('/api/screen/')
       .then((res) => res.json())
       .then((json) => {
         console.log('API response:', json); // 🔍 inspect backend structure
@@ -35,14 +33,14 @@ export default function WatchlistPage() {
             <div className="text-sm text-gray-300">Score: {stock.score}</div>
             <div className="text-sm text-blue-300 mb-1">Tags: {stock.tags?.join(', ') || '—'}</div>
             <div className="ml-2 space-y-1">
-              {stock.tier1?.length > 0 && (
-                <div><span className="text-green-400 font-semibold">T1:</span> {stock.tier1.join(', ')}</div>
+              {stock.tierHits?.T1?.length > 0 && (
+                <div><span className="text-green-400 font-semibold">T1:</span> {stock.tierHits.T1.join(', ')}</div>
               )}
-              {stock.tier2?.length > 0 && (
-                <div><span className="text-yellow-300 font-semibold">T2:</span> {stock.tier2.join(', ')}</div>
+              {stock.tierHits?.T2?.length > 0 && (
+                <div><span className="text-yellow-300 font-semibold">T2:</span> {stock.tierHits.T2.join(', ')}</div>
               )}
-              {stock.tier3?.length > 0 && (
-                <div><span className="text-pink-300 font-semibold">T3:</span> {stock.tier3.join(', ')}</div>
+              {stock.tierHits?.T3?.length > 0 && (
+                <div><span className="text-pink-300 font-semibold">T3:</span> {stock.tierHits.T3.join(', ')}</div>
               )}
             </div>
           </div>
@@ -0,0 +1,256 @@
+# backend/backtest.py
+#
+# Replays enrich → score over stored cache snapshots and measures what each
+# signal and score bucket did next. One snapshot per session is used (the last
+# one published for it — keep them with SCREENER_SNAPSHOT_KEEP_DAILY), and it
+# is re-run from the inputs pinned inside it, so today's code and weights are
+# applied to the data each session actually had. A snapshot belongs to the
+# latest session that had opened when it was published, so weekend, holiday
+# and premarket publishes count towards the session before.
+#
+# Entry is that session's close in the daily bar store; the forward return at
+# horizon N is the close N sessions later. Sessions are sharded across a
+# process pool; every worker returns summed counts / returns / hits per group,
+# so merging shards is plain addition. Returns are long returns: for the
+# short-side signals (gap_down, break_below_range, weak_sector) a negative
+# mean is the good outcome.
+#
+#   python -m backend.backtest [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+#                              [--horizons 1,5,10] [--workers N] [--engine dict|columnar]
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+
+from backend import cache_manifest, enrich_universe, metrics, pipeline, snapshots
+from backend.signal_registry import SIGNALS
+from backend.signals.bar_store import STORE_DIR, DailyBarStore
+
+CACHE_DIR = "backend/cache"
+REPORT_PATH = os.path.join(CACHE_DIR, "backtest_report.json")
+
+HORIZONS = [1, 5, 10]
+WORKERS = int(os.getenv("SCREENER_BACKTEST_WORKERS", "0")) or os.cpu_count() or 1
+
+# Score buckets: np.digitize(score, SCORE_EDGES) indexes SCORE_BUCKETS
+SCORE_EDGES = [0, 3, 6, 9]
+SCORE_BUCKETS = ["<0", "0-2", "3-5", "6-8", "9+"]
+
+# Report rows: every symbol, each signal, each score bucket
+GROUPS = ["all"] + SIGNALS + [f"score {b}" for b in SCORE_BUCKETS]
+SIGNAL_ROWS = np.arange(1, 1 + len(SIGNALS))
+BUCKET_ROW0 = 1 + len(SIGNALS)
+
+# Summed per group and horizon: count, sum of returns, sum of squares, wins
+STATS = ["count", "sum", "sumsq", "wins"]
+
+
+# --- Forward Returns ---
+
+class ClosePanel:
+    """Sessions × symbols matrix of closes from the daily bar store."""
+
+    def __init__(self, root=STORE_DIR, symbols=None):
+        store = DailyBarStore(root)
+        symbols = list(store.manifest) if symbols is None else list(symbols)
+        bars = {s: store.read(s) for s in symbols}
+        bars = {s: b for s, b in bars.items() if len(b)}
+        self.dates = np.unique(np.concatenate([b["date"] for b in bars.values()])) if bars else \
+            np.zeros(0, dtype="M8[D]")
+        self.column = {s: i for i, s in enumerate(bars)}
+        self.closes = np.full((len(self.dates), len(bars)), np.nan)
+        for col, b in enumerate(bars.values()):
+            self.closes[np.searchsorted(self.dates, b["date"]), col] = b["close"]
+
+    def forward_returns(self, symbols, session, horizons):
+        """len(symbols) × len(horizons) returns from `session`'s close; NaN where unknown."""
+        out = np.full((len(symbols), len(horizons)), np.nan)
+        row = np.searchsorted(self.dates, np.datetime64(session, "D"))
+        if row == len(self.dates) or self.dates[row] != np.datetime64(session, "D"):
+            return out
+        cols = np.array([self.column.get(s, -1) for s in symbols], dtype=np.int64)
+        known = cols >= 0
+        entry = np.full(len(symbols), np.nan)
+        entry[known] = self.closes[row, cols[known]]
+        entry[~(entry > 0)] = np.nan
+        for k, h in enumerate(horizons):
+            if row + h < len(self.dates):
+                exit_ = np.full(len(symbols), np.nan)
+                exit_[known] = self.closes[row + h, cols[known]]
+                out[:, k] = exit_ / entry - 1
+        return out
+
+
+def group_stats(masks, scores, returns):
+    """(len(STATS), len(GROUPS), horizons) sums for one session."""
+    n_horizons = returns.shape[1]
+    members = np.zeros((len(GROUPS), len(masks)), dtype=bool)
+    members[0] = True
+    members[SIGNAL_ROWS] = (masks[None, :] >> (SIGNAL_ROWS - 1)[:, None] & 1).astype(bool)
+    members[BUCKET_ROW0 + np.digitize(scores, SCORE_EDGES), np.arange(len(masks))] = True
+
+    stats = np.zeros((len(STATS), len(GROUPS), n_horizons))
+    valid = ~np.isnan(returns)
+    r = np.where(valid, returns, 0.0)
+    m = members.astype(np.float64)
+    stats[0] = m @ valid
+    stats[1] = m @ r
+    stats[2] = m @ (r * r)
+    stats[3] = m @ (r > 0)
+    return stats
+
+
+# --- Workers ---
+
+_panel = None
+
+
+def _init_worker(panel):
+    global _panel
+    _panel = panel
+
+
+def replay_session(task):
+    """Re-run one session's snapshot; returns (session, symbols, stats)."""
+    session, snapshot_dir, horizons, engine = task
+    universe = enrich_universe.load_universe(snapshot_dir)
+    inputs = enrich_universe.load_inputs(snapshot_dir)
+    scored = pipeline.run(universe, inputs, persist=False, engine=engine)["scored"]
+
+    symbols = list(scored)
+    masks = np.fromiter((info.get("signal_mask", 0) for info in scored.values()), dtype=np.int64, count=len(scored))
+    scores = np.fromiter((info.get("score", 0) for info in scored.values()), dtype=np.int64, count=len(scored))
+    returns = _panel.forward_returns(symbols, session, horizons)
+    return session, len(symbols), group_stats(masks, scores, returns)
+
+
+# --- Driver ---
+
+def session_tasks(since=None, until=None, horizons=HORIZONS, engine=None, cache_dir=CACHE_DIR):
+    """One replay task per stored session that has all of its pipeline inputs."""
+    required = {enrich_universe.UNIVERSE, *pipeline.REQUIRED_INPUTS}
+    tasks = []
+    for session, snapshot_id in snapshots.sessions(cache_dir).items():
+        if (since and session < since) or (until and session > until):
+            continue
+        if not required <= snapshots.load_meta(snapshot_id, cache_dir).get("inputs", {}).keys():
+            print(f"⏭️ {session}: snapshot {snapshot_id} has no pinned inputs — skipped")
+            continue
+        snapshot_dir = os.path.join(snapshots.snapshot_root(cache_dir), snapshot_id)
+        tasks.append((session, snapshot_dir, list(horizons), engine))
+    return tasks
+
+
+def summarize(stats, horizons):
+    """{group: {"<h>d": {count, mean, stdev, hit_rate, excess}}}; excess is vs "all"."""
+    count, total, sumsq, wins = stats
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        stdev = np.sqrt(np.maximum(sumsq / count - mean ** 2, 0))
+        hit_rate = wins / count
+    report = {}
+    for g, group in enumerate(GROUPS):
+        if not count[g].any():
+            continue
+        report[group] = {
+            f"{h}d": {
+                "count": int(count[g, k]),
+                "mean": _round(mean[g, k]),
+                "stdev": _round(stdev[g, k]),
+                "hit_rate": _round(hit_rate[g, k]),
+                "excess": _round(mean[g, k] - mean[0, k]),
+            }
+            for k, h in enumerate(horizons)
+        }
+    return report
+
+
+def _round(x):
+    return None if np.isnan(x) else round(float(x), 6)
+
+
+def run(since=None, until=None, horizons=HORIZONS, workers=WORKERS, engine=None,
+        cache_dir=CACHE_DIR, bars_root=STORE_DIR, report_path=REPORT_PATH):
+    tasks = session_tasks(since, until, horizons, engine, cache_dir)
+    if not tasks:
+        print("❌ No stored sessions to replay (keep daily snapshots with SCREENER_SNAPSHOT_KEEP_DAILY).")
+        return None
+
+    start = time.perf_counter()
+    with metrics.run("backtest"):
+        with metrics.stage("load_bars") as s:
+            panel = ClosePanel(bars_root)
+            s.symbols = len(panel.column)
+        print(f"🧪 Replaying {len(tasks)} sessions ({tasks[0][0]} → {tasks[-1][0]}) on {workers} workers, "
+              f"{len(panel.column)} symbols with bars over {len(panel.dates)} sessions...")
+
+        with metrics.stage("replay") as s:
+            stats = np.zeros((len(STATS), len(GROUPS), len(horizons)))
+            symbol_days = 0
+            if workers > 1 and len(tasks) > 1:
+                with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                         initializer=_init_worker, initargs=(panel,)) as pool:
+                    results = pool.map(replay_session, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
+                    for _, n, session_stats in results:
+                        stats += session_stats
+                        symbol_days += n
+            else:
+                _init_worker(panel)
+                for task in tasks:
+                    _, n, session_stats = replay_session(task)
+                    stats += session_stats
+                    symbol_days += n
+            s.symbols = symbol_days
+
+    report = {
+        "sessions": [str(t[0]) for t in tasks],
+        "horizons": list(horizons),
+        "symbol_days": symbol_days,
+        "seconds": round(time.perf_counter() - start, 2),
+        "groups": summarize(stats, horizons),
+    }
+    if report_path:
+        cache_manifest.write_json(report_path, report, indent=2)
+    print_report(report)
+    return report
+
+
+def print_report(report):
+    horizons = [f"{h}d" for h in report["horizons"]]
+    print(f"\n📊 Backtest: {len(report['sessions'])} sessions, {report['symbol_days']:,} symbol-days "
+          f"in {report['seconds']}s — mean forward return / hit rate (n)")
+    print(f"{'group':<26}" + "".join(f"{h:>26}" for h in horizons))
+    for group, by_horizon in report["groups"].items():
+        cells = []
+        for h in horizons:
+            cell = by_horizon[h]
+            if cell["mean"] is None:
+                cells.append(f"{'—':>26}")
+            else:
+                cells.append(f"{cell['mean']:>+9.2%} {cell['hit_rate']:>6.1%} ({cell['count']:>6})")
+        print(f"{group:<26}" + "".join(f"{c:>26}" for c in cells))
+
+
+def _arg(argv, flag, default=None):
+    return argv[argv.index(flag) + 1] if flag in argv else default
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    since, until = _arg(argv, "--since"), _arg(argv, "--until")
+    report = run(
+        since=date.fromisoformat(since) if since else None,
+        until=date.fromisoformat(until) if until else None,
+        horizons=[int(h) for h in _arg(argv, "--horizons", ",".join(map(str, HORIZONS))).split(",")],
+        workers=int(_arg(argv, "--workers", WORKERS)),
+        engine=_arg(argv, "--engine"),
+    )
+    return 0 if report else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+# backend/bench/cache_formats.py
+#
+# Size and load time of every cache artifact in each cache_io codec.
+#   full    decode the whole table
+#   field   decode one column (what the watchlist stream / index reads need)
+#   keys    symbol list only
+# --scale N repeats each table's rows N times (suffixed keys) to see how the
+# formats behave on a bigger universe.
+#
+#   python -m backend.bench.cache_formats [--scale 10] [--repeat 5] [name ...]
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from backend import cache_io
+
+# label -> (codec, file extension)
+VARIANTS = {
+    "json": (cache_io.JsonCodec(), ".json"),
+    "npz": (cache_io.NpzCodec(compress=False), ".npz"),
+    "npz+deflate": (cache_io.NpzCodec(compress=True), ".npz"),
+}
+if cache_io.pq is not None:
+    VARIANTS["parquet+zstd"] = (cache_io.ParquetCodec(), ".parquet")
+
+
+def scale_table(table, factor):
+    if factor <= 1:
+        return table
+    out = {}
+    for i in range(factor):
+        suffix = "" if i == 0 else f"_{i}"
+        for key, row in table.items():
+            out[key + suffix] = row
+    return out
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_table(name, table, tmp_dir, repeat):
+    field = next(iter(next(iter(table.values()))), None) if table else None
+    rows = []
+    for label, (codec, ext) in VARIANTS.items():
+        path = os.path.join(tmp_dir, f"{name}.{label}{ext}")
+        with open(path, "wb") as f:
+            start = time.perf_counter()
+            codec.write(f, table)
+            write_s = time.perf_counter() - start
+        rows.append({
+            "format": label,
+            "bytes": os.path.getsize(path),
+            "write": write_s,
+            "full": best_of(lambda: codec.read(path), repeat),
+            "field": best_of(lambda: codec.read(path, fields=[field]), repeat) if field else 0.0,
+            "keys": best_of(lambda: codec.read(path, fields=()), repeat),
+        })
+        assert codec.read(path) == table, f"{label} round trip changed {name}"
+    return field, rows
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    scale, repeat, names = 1, 5, []
+    args = iter(argv)
+    for arg in args:
+        if arg == "--scale":
+            scale = int(next(args))
+        elif arg == "--repeat":
+            repeat = int(next(args))
+        else:
+            names.append(arg)
+
+    tmp_dir = tempfile.mkdtemp(prefix="cache_bench_")
+    try:
+        for name in names or cache_io.artifacts():
+            data = cache_io.load(name)
+            if not cache_io.is_table(data) or not data:
+                print(f"⏭️ {name}: not a symbol table, skipped")
+                continue
+            table = scale_table(data, scale)
+            field, rows = bench_table(name, table, tmp_dir, repeat)
+            print(f"\n📦 {name} — {len(table):,} rows, single field '{field}'")
+            print(f"  {'format':<14}{'size':>12}{'write':>10}{'full':>10}{'field':>10}{'keys':>10}")
+            for r in rows:
+                print(f"  {r['format']:<14}{r['bytes']:>12,}"
+                      f"{r['write'] * 1000:>8.1f}ms{r['full'] * 1000:>8.1f}ms"
+                      f"{r['field'] * 1000:>8.1f}ms{r['keys'] * 1000:>8.1f}ms")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,252 @@
+# backend/bench/pipeline_stages.py
+#
+# Times every pipeline stage on a synthetic universe (bench/synthetic.py):
+#   enrich.*     each enrich_universe step, in the order enrich() runs them
+#   score.*      screenbuilder.score / build_tier_hits per symbol, and the
+#                vectorized score_universe
+#   watchlist    build_autowatchlist (read scored file → build → save)
+#   io.*         json dump/load of the scored universe, cache_io save/load
+# Time is the best of --repeat runs (default 7); peak memory is traced
+# (tracemalloc) in one extra run, as the peak above what was allocated when
+# the stage started.
+#
+# Baselines are per machine and size (bench/baselines/, not committed):
+# --save-baseline records one, and later runs compare against it and exit 1
+# when a stage got slower or hungrier than the tolerance allows. A stage has
+# to be slower by both the tolerance and MIN_TIME_DELTA, and still be slower
+# after a second round of repeats, so scheduler noise on a few-millisecond
+# stage doesn't fail the gate.
+#
+#   python -m backend.bench.pipeline_stages [--size 600|10k|100k] [--repeat 7]
+#                                           [--save-baseline] [--tolerance 0.25]
+
+import copy
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from backend import cache_io, cache_manifest, enrich_universe, screenbuilder, watchlist_builder
+from backend.bench import synthetic
+from backend.signal_registry import entry_mask
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+REPEAT = 7
+TIME_TOLERANCE = 0.25     # slower than baseline by more than 25%...
+MIN_TIME_DELTA = 0.005    # ...and by at least 5 ms (few-ms stages jitter by more than 25%)
+MEMORY_TOLERANCE = 0.10
+MIN_MEMORY_DELTA = 1 << 20
+
+
+def _fold_signals(universe, inputs):
+    # enrich() folds legacy signal dicts into the mask first
+    for info in universe.values():
+        info["signal_mask"] = entry_mask(info)
+        info.pop("signals", None)
+
+
+ENRICH_STEPS = [
+    ("enrich.fold_signals", _fold_signals),
+    ("enrich.tv_signals", lambda u, i: enrich_universe.enrich_with_tv_signals(u, i["tv_signals"])),
+    ("enrich.sector", lambda u, i: enrich_universe.enrich_with_sector(u, i["sector_prices"])),
+    ("enrich.sector_rotation", lambda u, i: enrich_universe.apply_sector_rotation_signals(u, i["sector_prices"])),
+    ("enrich.candles", lambda u, i: enrich_universe.enrich_with_candles(u, i["candles"])),
+    ("enrich.multi_day_levels", lambda u, i: enrich_universe.enrich_with_multi_day_levels(u, i["multi_day_data"])),
+    ("enrich.short_interest", lambda u, i: enrich_universe.enrich_with_short_interest(u, i["short_interest"])),
+    ("enrich.signal_flags", lambda u, i: enrich_universe.apply_signal_flags(u)),
+    ("enrich.top_volume", lambda u, i: enrich_universe.flag_top_volume_gainers(u)),
+    ("enrich.risk_flags", lambda u, i: enrich_universe.inject_risk_flags(u)),
+]
+
+
+def stages(universe, inputs, tmp_dir):
+    """(name, fn) in run order; each fn works on what the previous ones produced."""
+    dump_path = os.path.join(tmp_dir, "scored_dump.json")
+    steps = [(name, lambda step=step: step(universe, inputs)) for name, step in ENRICH_STEPS]
+    steps += [
+        ("score.score", lambda: [screenbuilder.score(info) for info in universe.values()]),
+        ("score.build_tier_hits", lambda: [screenbuilder.build_tier_hits(info) for info in universe.values()]),
+        ("score.score_universe", lambda: screenbuilder.score_universe(universe)),
+        ("io.json_dump", lambda: _json_dump(universe, dump_path)),
+        ("io.json_load", lambda: _json_load(dump_path)),
+        ("io.cache_save", lambda: cache_io.save("universe_scored", universe, cache_dir=tmp_dir)),
+        ("io.cache_load", lambda: cache_io.load("universe_scored", cache_dir=tmp_dir)),
+        ("watchlist.build_autowatchlist",
+         lambda: watchlist_builder.build_autowatchlist(cache_io.find("universe_scored", tmp_dir), cache_dir=tmp_dir)),
+    ]
+    return steps
+
+
+def _json_dump(data, path):
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def _json_load(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _quiet(fn):
+    # build_autowatchlist prints a line per call
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        return fn()
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+
+def run_once(base, inputs, traced=False):
+    """{stage: seconds} for one pass, or {stage: peak bytes} when traced."""
+    universe = copy.deepcopy(base)
+    tmp_dir = tempfile.mkdtemp(prefix="stage_bench_")
+    out = {}
+    try:
+        for name, fn in stages(universe, inputs, tmp_dir):
+            if traced:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                _quiet(fn)
+                out[name] = tracemalloc.get_traced_memory()[1] - before
+            else:
+                start = time.perf_counter()
+                _quiet(fn)
+                out[name] = time.perf_counter() - start
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return out
+
+
+def best_times(base, inputs, repeat, seconds=None):
+    """{stage: fastest seconds} over `repeat` passes, folded into `seconds` if given."""
+    seconds = dict(seconds or {})
+    for _ in range(repeat):
+        for name, s in run_once(base, inputs).items():
+            seconds[name] = min(s, seconds.get(name, s))
+    return seconds
+
+
+def bench(size, repeat=REPEAT, seed=0):
+    n = synthetic.parse_size(size)
+    base, inputs = synthetic.generate(n, seed)
+    seconds = best_times(base, inputs, repeat)
+    tracemalloc.start()
+    try:
+        peaks = run_once(base, inputs, traced=True)
+    finally:
+        tracemalloc.stop()
+    return {
+        "size": n,
+        "repeat": repeat,
+        "environment": environment(),
+        "stages": {name: {"seconds": seconds[name], "peak_bytes": peaks[name]} for name in seconds},
+    }
+
+
+def environment():
+    return {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+            "processor": platform.processor() or platform.machine(), "cpus": os.cpu_count()}
+
+
+# --- Baselines ---
+
+def baseline_path(size):
+    return os.path.join(BASELINE_DIR, f"pipeline_{synthetic.parse_size(size)}.json")
+
+
+def load_baseline(size):
+    path = baseline_path(size)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_baseline(result):
+    return cache_manifest.write_json(baseline_path(result["size"]), result, indent=2)
+
+
+def regressions(result, baseline, tolerance=TIME_TOLERANCE):
+    """{stage: [reasons]} for stages worse than the baseline allows."""
+    found = {}
+    for name, now in result["stages"].items():
+        before = baseline["stages"].get(name)
+        if before is None:
+            continue
+        reasons = []
+        if now["seconds"] > before["seconds"] * (1 + tolerance) and \
+                now["seconds"] - before["seconds"] > MIN_TIME_DELTA:
+            reasons.append(f"time {before['seconds'] * 1000:.1f} → {now['seconds'] * 1000:.1f} ms")
+        if now["peak_bytes"] > before["peak_bytes"] * (1 + MEMORY_TOLERANCE) and \
+                now["peak_bytes"] - before["peak_bytes"] > MIN_MEMORY_DELTA:
+            reasons.append(f"peak {before['peak_bytes'] / 2**20:.1f} → {now['peak_bytes'] / 2**20:.1f} MiB")
+        if reasons:
+            found[name] = reasons
+    return found
+
+
+def print_result(result, baseline=None, failed=()):
+    print(f"\n⏱️ Pipeline stages on {result['size']:,} synthetic symbols (best of {result['repeat']})")
+    print(f"  {'stage':<32}{'time':>11}{'peak':>12}{'baseline':>11}")
+    for name, s in result["stages"].items():
+        before = baseline["stages"].get(name) if baseline else None
+        ref = f"{before['seconds'] * 1000:>9.1f}ms" if before else f"{'—':>11}"
+        flag = "  ❌" if name in failed else ""
+        print(f"  {name:<32}{s['seconds'] * 1000:>9.1f}ms{s['peak_bytes'] / 2**20:>8.1f} MiB{ref}{flag}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    size, repeat, tolerance, save = "600", REPEAT, TIME_TOLERANCE, False
+    args = iter(argv)
+    for arg in args:
+        if arg == "--size":
+            size = next(args)
+        elif arg == "--repeat":
+            repeat = int(next(args))
+        elif arg == "--tolerance":
+            tolerance = float(next(args))
+        elif arg == "--save-baseline":
+            save = True
+
+    result = bench(size, repeat)
+    baseline = None if save else load_baseline(size)
+    failed = regressions(result, baseline, tolerance) if baseline else {}
+    if any(not r[0].startswith("peak") for r in failed.values()):
+        # Confirm timing regressions with another round before failing
+        print(f"🔁 {len(failed)} stage(s) look slower — re-running {repeat} more passes to confirm...")
+        base, inputs = synthetic.generate(result["size"], 0)
+        seconds = best_times(base, inputs, repeat, {name: s["seconds"] for name, s in result["stages"].items()})
+        for name, s in result["stages"].items():
+            s["seconds"] = seconds[name]
+        result["repeat"] += repeat
+        failed = regressions(result, baseline, tolerance)
+    print_result(result, baseline, failed)
+
+    if save:
+        print(f"\n💾 Baseline saved to {save_baseline(result)}")
+        return 0
+    if baseline is None:
+        print(f"\nℹ️ No baseline for this size yet — run with --save-baseline to record one.")
+        return 0
+    if baseline.get("environment") != result["environment"]:
+        print(f"⚠️ Baseline was recorded on {baseline.get('environment')}; timings may not compare.")
+    if failed:
+        print(f"\n❌ {len(failed)} stage(s) regressed beyond {tolerance:.0%}:")
+        for name, reasons in failed.items():
+            print(f"  {name}: {', '.join(reasons)}")
+        return 1
+    print("\n✅ No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
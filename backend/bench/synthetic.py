@@ -0,0 +1,184 @@
+# backend/bench/synthetic.py
+#
+# Synthetic universe + scraper inputs at any size, shaped like the real cache:
+#   universe_cache     {symbol: {sources, level, sector, open, prevClose, ...}}
+#   tv_signals         quote, volume, rel_vol / avg_volume_10d
+#   candles_5m         compact opening-range arrays (9:30 and 9:35 bars)
+#   multi_day_levels   10-session high/low around the current price
+#   short_interest     ~13% of symbols, like the high-short-interest screen
+#   sector_etf_prices  one quote per sector ETF
+# Distributions are loose fits to a real mid-morning session (log-normal
+# prices and volumes, sub-1% gaps, an opening range a little narrower than the
+# move since) so signals fire at about the real rates and the watchlist keeps
+# roughly the same share of symbols. Deterministic for a given size and seed.
+#
+#   python -m backend.bench.synthetic --size 10k --out /tmp/synthetic_cache [--seed 0]
+
+import sys
+from datetime import datetime
+
+import numpy as np
+import pytz
+
+from backend import cache_io, enrich_universe, sectors
+
+SIZES = {"600": 600, "10k": 10_000, "100k": 100_000}
+
+EASTERN = pytz.timezone("America/New_York")
+SOURCES = [["sp500"], ["nasdaq100"], ["russell2000"], ["sp500", "nasdaq100"]]
+SOURCE_WEIGHTS = [0.35, 0.1, 0.5, 0.05]
+LEVELS = ["L0", "L1", "L2"]
+SHORT_INTEREST_SHARE = 0.13
+
+
+def parse_size(size):
+    """"600" / "10k" / "100k" or any integer."""
+    return SIZES.get(str(size)) or int(size)
+
+
+def tickers(n):
+    """n unique upper-case tickers ("BAA", "BAB", ...)."""
+    out = []
+    for i in range(n):
+        i += 26 ** 2  # start at three letters
+        name = ""
+        while i:
+            i, r = divmod(i, 26)
+            name = chr(ord("A") + r) + name
+        out.append(name)
+    return out
+
+
+def generate(n, seed=0):
+    """(universe, inputs) for `n` symbols; `inputs` matches enrich()'s arguments."""
+    rng = np.random.default_rng(seed)
+    now = datetime.now(EASTERN)
+    stamp = now.isoformat()
+    symbols = tickers(n)
+
+    prev_close = np.clip(rng.lognormal(np.log(60), 1.0, n), 1, 2000).round(2)
+    open_ = (prev_close * (1 + rng.normal(0, 0.007, n))).round(2)
+
+    # Opening range: two 5m bars drifting from the open
+    bar_close = open_[:, None] * np.cumprod(1 + rng.normal(0, 0.006, (n, 2)), axis=1)
+    bar_open = np.column_stack([open_, bar_close[:, 0]])
+    wick = np.abs(rng.normal(0, 0.006, (n, 2, 2)))
+    bar_high = (np.maximum(bar_open, bar_close) * (1 + wick[:, :, 0])).round(2)
+    bar_low = (np.minimum(bar_open, bar_close) * (1 - wick[:, :, 1])).round(2)
+
+    price = (bar_close[:, 1] * (1 + rng.normal(0, 0.005, n))).round(2)
+    change = (price - prev_close) / prev_close * 100
+    avg_volume = rng.lognormal(np.log(2_000_000), 1.2, n).astype(np.int64)
+    # Mid-session: volume so far vs a full day's average
+    rel_vol = rng.lognormal(np.log(0.5), 0.6, n).round(2)
+    volume = (avg_volume * rel_vol).astype(np.int64)
+    spread = np.abs(rng.normal(0.02, 0.08, n)).round(3)
+    sector_idx = rng.integers(0, len(sectors.SECTORS), n)
+    source_idx = rng.choice(len(SOURCES), n, p=SOURCE_WEIGHTS)
+    level_idx = rng.integers(0, len(LEVELS), n)
+
+    universe = {}
+    tv_signals = {}
+    for i, symbol in enumerate(symbols):
+        universe[symbol] = {
+            "sources": list(SOURCES[source_idx[i]]),
+            "level": LEVELS[level_idx[i]],
+            "sector": sectors.SECTORS[sector_idx[i]],
+            "signals": {},
+            "tv_price": None,
+            "tv_volume": None,
+            "tv_changePercent": None,
+            "open": float(open_[i]),
+            "prevClose": float(prev_close[i]),
+            "avg_volume": int(avg_volume[i]),
+            "spread": float(spread[i]),
+            "yfinance_updated": stamp,
+        }
+        tv_signals[symbol] = {
+            "price": float(price[i]),
+            "volume": int(volume[i]),
+            "changePercent": round(float(change[i]), 4),
+            "open": float(open_[i]),
+            "prevClose": float(prev_close[i]),
+            "timestamp": stamp,
+            "rel_vol": float(rel_vol[i]),
+            "avg_volume_10d": int(avg_volume[i]),
+        }
+
+    bar_volume = (avg_volume[:, None] * rng.uniform(0.01, 0.04, (n, 2))).astype(np.int64)
+    date = now.strftime("%Y-%m-%d")
+    candles = {
+        symbol: {
+            "date": date,
+            "interval": 5,
+            "time": ["09:30", "09:35"],
+            "open": bar_open[i].round(2).tolist(),
+            "high": bar_high[i].tolist(),
+            "low": bar_low[i].tolist(),
+            "close": bar_close[i].round(2).tolist(),
+            "volume": bar_volume[i].tolist(),
+        }
+        for i, symbol in enumerate(symbols)
+    }
+
+    level_high = (np.maximum(prev_close, open_) * (1 + np.abs(rng.normal(0, 0.04, n)))).round(2)
+    level_low = (np.minimum(prev_close, open_) * (1 - np.abs(rng.normal(0, 0.04, n)))).round(2)
+    multi_day_data = {
+        symbol: {"high": float(level_high[i]), "low": float(level_low[i]), "days": 10, "timestamp": stamp}
+        for i, symbol in enumerate(symbols)
+    }
+
+    shorted = rng.random(n) < SHORT_INTEREST_SHARE
+    short_pct = rng.uniform(0.10, 0.45, n).round(4)
+    short_interest = {
+        symbol: {"shortPercentOfFloat": float(short_pct[i])}
+        for i, symbol in enumerate(symbols) if shorted[i]
+    }
+
+    etf_prev = rng.uniform(30, 250, len(sectors.ETFS)).round(2)
+    etf_price = (etf_prev * (1 + rng.normal(0, 0.008, len(etf_prev)))).round(2)
+    sector_prices = {
+        etf: {"tv_price": float(etf_price[j]), "prevClose": float(etf_prev[j])}
+        for j, etf in enumerate(sectors.ETFS)
+    }
+
+    inputs = {
+        "tv_signals": tv_signals,
+        "sector_prices": sector_prices,
+        "candles": candles,
+        "short_interest": short_interest,
+        "multi_day_data": multi_day_data,
+    }
+    return universe, inputs
+
+
+def write_cache(cache_dir, universe, inputs, fmt=None):
+    """Save the universe and inputs under their cache artifact names."""
+    paths = [cache_io.save(enrich_universe.UNIVERSE, universe, fmt=fmt, cache_dir=cache_dir)]
+    for arg, name in enrich_universe.INPUTS.items():
+        paths.append(cache_io.save(name, inputs[arg], fmt=fmt, cache_dir=cache_dir))
+    return paths
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    size, seed, out = "600", 0, None
+    args = iter(argv)
+    for arg in args:
+        if arg == "--size":
+            size = next(args)
+        elif arg == "--seed":
+            seed = int(next(args))
+        elif arg == "--out":
+            out = next(args)
+    if out is None:
+        print("usage: python -m backend.bench.synthetic --size 600|10k|100k|N --out DIR [--seed N]")
+        return 1
+    universe, inputs = generate(parse_size(size), seed)
+    for path in write_cache(out, universe, inputs):
+        print(f"🧬 {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,571 @@
+# backend/cache_io.py
+#
+# Reads and writes cache artifacts through pluggable codecs. An artifact is
+# addressed by name ("tv_signals", "universe_scored_2025-04-29", ...) and the
+# file extension says which codec wrote it:
+#   - npz      one numpy array per column. Written uncompressed by default so
+#              each column is memory-mapped straight out of the archive and a
+#              read of a few fields never touches the rest of the file;
+#              SCREENER_CACHE_COMPRESS=1 deflates them instead
+#   - parquet  Arrow table, zstd-compressed, memory-mapped reads (only
+#              available when pyarrow is installed)
+#   - json     the original format; still readable everywhere, used for
+#              exports and for anything that isn't a {symbol: {field: value}} table
+# New writes use SCREENER_CACHE_FORMAT (default npz). Readers take whichever
+# file of an artifact is newest, so caches written before the switch keep working.
+#
+# Every write also leaves a small JSON sidecar (<file>.meta) with the record
+# count, per-field coverage and null counts, the schema version and when it was
+# written, so audits can check an artifact without reading it.
+#
+#   python -m backend.cache_io export <name> [...]    write <name>.json next to it
+#   python -m backend.cache_io convert [<name> ...]   rewrite in the default format
+
+import ast
+import glob
+import json
+import mmap
+import os
+import struct
+import sys
+import zipfile
+from datetime import datetime
+
+import numpy as np
+import pytz
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json works the same
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional, only needed for the parquet codec
+    pa = pq = None
+
+CACHE_DIR = "backend/cache"
+DEFAULT_FORMAT = os.getenv("SCREENER_CACHE_FORMAT", "npz")
+COMPRESS = os.getenv("SCREENER_CACHE_COMPRESS", "0") == "1"
+
+SCHEMA_KEY = "__schema__"
+KEY_COLUMN = "__key__"
+
+# Bump when the on-disk layout changes; sidecars from another version are ignored
+SCHEMA_VERSION = 1
+META_SUFFIX = ".meta"
+KEYS_INLINE_MAX = 64  # small tables (sector ETFs) list their keys in the sidecar
+
+
+# --- Columns ---
+#
+# A table {key: {field: value}} becomes one full-length column per field:
+#   bool / int / float   numpy arrays (a float column that also held ints keeps
+#                        an ".int" mask so 100 reads back as 100, not 100.0)
+#   list                 list of numeric lists (candle series)
+#   str / json           list of Python values (anything that isn't one of the above)
+# plus ".present" (row has the key) and ".null" (value is None) masks when needed.
+# Codecs only decide how those columns are laid out on disk.
+
+def _is_number(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _kind(values):
+    if all(isinstance(v, bool) for v in values):
+        return "bool"
+    if all(_is_number(v) for v in values):
+        if all(isinstance(v, int) for v in values):
+            return "int" if all(-2**63 <= v < 2**63 for v in values) else "json"
+        return "float"
+    if all(isinstance(v, str) for v in values):
+        return "str"
+    if all(isinstance(v, list) and all(_is_number(x) for x in v) for v in values):
+        return "list"
+    return "json"
+
+
+def _dumps(value):
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits, which json handles
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def _loads(raw):
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass  # NaN/Infinity, which json.dump writes and orjson rejects
+    return json.loads(raw)
+
+
+def is_table(data):
+    return isinstance(data, dict) and all(isinstance(v, dict) for v in data.values())
+
+
+def to_columns(table):
+    """(columns, schema) for a {key: {field: value}} table."""
+    rows = list(table.values())
+    n = len(rows)
+    fields = {}
+    for row in rows:
+        for field in row:
+            fields.setdefault(field, None)
+
+    columns = {KEY_COLUMN: list(table)}
+    schema = {"rows": n, "fields": []}
+    for i, field in enumerate(fields):
+        name = f"c{i}"
+        column = [row.get(field) for row in rows]
+        present = np.fromiter((field in row for row in rows), dtype=bool, count=n)
+        null = np.fromiter((v is None for v in column), dtype=bool, count=n) & present
+        kind = _kind([v for v in column if v is not None])
+        spec = {"name": field, "column": name, "kind": kind,
+                "present": not present.all(), "null": bool(null.any())}
+
+        if kind == "bool":
+            columns[name] = np.fromiter((bool(v) for v in column), dtype=bool, count=n)
+        elif kind == "int":
+            columns[name] = np.fromiter((v or 0 for v in column), dtype=np.int64, count=n)
+        elif kind == "float":
+            columns[name] = np.fromiter((0.0 if v is None else v for v in column), dtype=np.float64, count=n)
+            is_int = np.fromiter((isinstance(v, int) for v in column), dtype=bool, count=n)
+            if is_int.any():
+                spec["int"] = True
+                columns[name + ".int"] = is_int
+        elif kind == "list":
+            columns[name] = [v or [] for v in column]
+            spec["dtype"] = "int64" if all(isinstance(x, int) for v in columns[name] for x in v) else "float64"
+        else:
+            columns[name] = column
+
+        if spec["present"]:
+            columns[name + ".present"] = present
+        if spec["null"]:
+            columns[name + ".null"] = null
+        schema["fields"].append(spec)
+    return columns, schema
+
+
+def _values(columns, spec):
+    name, kind = spec["column"], spec["kind"]
+    values = columns[name]
+    if kind in ("bool", "int", "float"):
+        values = values.tolist()
+        if spec.get("int"):
+            for i in np.flatnonzero(columns[name + ".int"]).tolist():
+                values[i] = int(values[i])
+        if spec["null"]:
+            for i in np.flatnonzero(columns[name + ".null"]).tolist():
+                values[i] = None
+    return values
+
+
+def from_columns(columns, schema, fields=None):
+    """Rebuild the table from to_columns() output, optionally only `fields`."""
+    keys = columns[KEY_COLUMN]
+    specs = [spec for spec in schema["fields"] if fields is None or spec["name"] in fields]
+    # Fields every row has are zipped into the row dicts in one pass; the
+    # sparse ones are filled in afterwards for the rows that have them
+    dense = [spec for spec in specs if not spec["present"]]
+    if dense:
+        names = [spec["name"] for spec in dense]
+        rows = [dict(zip(names, row)) for row in zip(*(_values(columns, spec) for spec in dense))]
+    else:
+        rows = [{} for _ in keys]
+    for spec in specs:
+        if spec["present"]:
+            field = spec["name"]
+            values = _values(columns, spec)
+            for i in np.flatnonzero(columns[spec["column"] + ".present"]).tolist():
+                rows[i][field] = values[i]
+    return dict(zip(keys, rows))
+
+
+def _needed(schema, fields):
+    """Column names a read of `fields` has to touch."""
+    names = {KEY_COLUMN}
+    for spec in schema["fields"]:
+        if fields is None or spec["name"] in fields:
+            names.update(c for c in (spec["column"], spec["column"] + ".int",
+                                     spec["column"] + ".present", spec["column"] + ".null"))
+    return names
+
+
+# --- Codecs ---
+
+class JsonCodec:
+    ext = ".json"
+
+    def write(self, f, data):
+        f.write(_dumps(data))
+
+    def read(self, path, fields=None):
+        with open(path, "rb") as f:
+            data = _loads(f.read())
+        if fields is not None and is_table(data):
+            return {k: {f: v[f] for f in fields if f in v} for k, v in data.items()}
+        return data
+
+
+class NpzCodec:
+    # Numeric columns and masks are plain arrays; str/json columns are one
+    # JSON array each (decoded in a single C call), lists are flat values +
+    # int64 offsets
+    ext = ".npz"
+
+    def __init__(self, compress=COMPRESS):
+        self.compress = compress
+
+    def write(self, f, data):
+        columns, schema = to_columns(data)
+        arrays = {}
+        kinds = {spec["column"]: spec for spec in schema["fields"]}
+        for name, column in columns.items():
+            spec = kinds.get(name)
+            if name == KEY_COLUMN or (spec and spec["kind"] in ("str", "json")):
+                arrays[name] = np.frombuffer(_dumps(column), dtype=np.uint8)
+            elif spec and spec["kind"] == "list":
+                arrays[name] = np.array([x for v in column for x in v], dtype=spec["dtype"])
+                arrays[name + ".offsets"] = _offsets(len(v) for v in column)
+            else:
+                arrays[name] = column
+        arrays[SCHEMA_KEY] = np.frombuffer(json.dumps(schema).encode(), dtype=np.uint8)
+        (np.savez_compressed if self.compress else np.savez)(f, **arrays)
+
+    def members(self, path, names=None):
+        """{name: array} for the archive's members (all, or just `names`).
+
+        Stored members are views into one read-only memory map of the file,
+        so only the pages of the columns actually used are ever read.
+        """
+        out = {}
+        with zipfile.ZipFile(path) as zf, open(path, "rb") as raw:
+            infos = [info for info in zf.infolist()
+                     if names is None or info.filename.removesuffix(".npy") in names]
+            buf = None
+            for info in infos:
+                name = info.filename.removesuffix(".npy")
+                if info.compress_type != zipfile.ZIP_STORED:
+                    with zf.open(info) as member:
+                        out[name] = np.lib.format.read_array(member, allow_pickle=False)
+                    continue
+                if buf is None:
+                    buf = mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ)
+                # Local file header: 30 fixed bytes, then file name and extra field
+                name_len, extra_len = struct.unpack_from("<HH", buf, info.header_offset + 26)
+                start = info.header_offset + 30 + name_len + extra_len
+                # .npy header: magic, version, header length, then a dict literal
+                if buf[start + 6] == 1:
+                    (header_len,), header_start = struct.unpack_from("<H", buf, start + 8), start + 10
+                else:
+                    (header_len,), header_start = struct.unpack_from("<I", buf, start + 8), start + 12
+                header = ast.literal_eval(buf[header_start:header_start + header_len].decode("latin1"))
+                dtype = np.lib.format.descr_to_dtype(header["descr"])
+                if dtype.hasobject:
+                    raise ValueError(f"{path}: object arrays are not supported")
+                shape = header["shape"]
+                count = int(np.prod(shape)) if shape else 1
+                array = np.frombuffer(buf, dtype=dtype, count=count, offset=header_start + header_len)
+                out[name] = array.reshape(shape, order="F" if header["fortran_order"] else "C")
+        return out
+
+    def read(self, path, fields=None):
+        schema = json.loads(bytes(self.members(path, {SCHEMA_KEY})[SCHEMA_KEY]))
+        kinds = {spec["column"]: spec["kind"] for spec in schema["fields"]}
+        needed = _needed(schema, fields)
+        arrays = self.members(path, needed | {name + ".offsets" for name in needed})
+        columns = {}
+        for name in needed:
+            if name not in arrays:
+                continue
+            if name == KEY_COLUMN or kinds.get(name) in ("str", "json"):
+                columns[name] = _loads(arrays[name].tobytes())
+            elif kinds.get(name) == "list":
+                flat = arrays[name].tolist()
+                bounds = arrays[name + ".offsets"].tolist()
+                columns[name] = [flat[a:b] for a, b in zip(bounds, bounds[1:])]
+            else:
+                columns[name] = arrays[name]
+        return from_columns(columns, schema, fields)
+
+
+def _offsets(lengths):
+    lengths = np.fromiter(lengths, dtype=np.int64)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+class ParquetCodec:
+    # str columns map to Arrow strings; json ones are stored as JSON text per row
+    ext = ".parquet"
+
+    def write(self, f, data):
+        columns, schema = to_columns(data)
+        arrays = {}
+        for name, column in columns.items():
+            spec = next((s for s in schema["fields"] if s["column"] == name), None)
+            if spec and spec["kind"] == "list":
+                arrays[name] = pa.array(column, type=pa.list_(pa.from_numpy_dtype(np.dtype(spec["dtype"]))))
+            elif spec and spec["kind"] == "json":
+                arrays[name] = pa.array([None if v is None else _dumps(v).decode() for v in column], type=pa.string())
+            else:
+                arrays[name] = pa.array(column)
+        pq.write_table(pa.table(arrays, metadata={SCHEMA_KEY: json.dumps(schema)}), f, compression="zstd")
+
+    def read(self, path, fields=None):
+        file_schema = pq.read_schema(path)
+        schema = json.loads(file_schema.metadata[SCHEMA_KEY.encode()])
+        needed = _needed(schema, fields)
+        table = pq.read_table(path, memory_map=True, columns=[c for c in file_schema.names if c in needed])
+        kinds = {spec["column"]: spec["kind"] for spec in schema["fields"]}
+        columns = {}
+        for name in table.column_names:
+            kind = kinds.get(name)
+            if kind == "json":
+                columns[name] = [None if v is None else _loads(v) for v in table.column(name).to_pylist()]
+            elif name == KEY_COLUMN or kind in ("str", "list"):
+                columns[name] = table.column(name).to_pylist()
+            else:
+                columns[name] = table.column(name).to_numpy()
+        return from_columns(columns, schema, fields)
+
+
+CODECS = {"npz": NpzCodec(), "json": JsonCodec()}
+if pq is not None:
+    CODECS["parquet"] = ParquetCodec()
+
+if DEFAULT_FORMAT not in CODECS:
+    print(f"⚠️ Cache format '{DEFAULT_FORMAT}' unavailable; using npz.")
+    DEFAULT_FORMAT = "npz"
+
+EXTENSIONS = {codec.ext: fmt for fmt, codec in CODECS.items()}
+
+
+# --- Artifacts ---
+
+def path_for(name, fmt=None, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, name + CODECS[fmt or DEFAULT_FORMAT].ext)
+
+
+def split_name(path):
+    """(artifact name, format) for a cache file path; format is None if unknown."""
+    stem, ext = os.path.splitext(path)
+    return stem, EXTENSIONS.get(ext)
+
+
+def find(name, cache_dir=CACHE_DIR):
+    """Newest file holding artifact `name`, in any format, or None."""
+    best = None
+    for codec in CODECS.values():
+        path = os.path.join(cache_dir, name + codec.ext)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            continue
+        if best is None or mtime > best[0]:
+            best = (mtime, path)
+    return best[1] if best else None
+
+
+def exists(name, cache_dir=CACHE_DIR):
+    return find(name, cache_dir) is not None
+
+
+def version(name, cache_dir=CACHE_DIR):
+    """(path, mtime_ns, size) of the artifact's current file, or None."""
+    path = find(name, cache_dir)
+    if path is None:
+        return None
+    st = os.stat(path)
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+def latest(prefix, cache_dir=CACHE_DIR):
+    """Name of the most recently written artifact starting with `prefix`."""
+    newest = None
+    for ext in EXTENSIONS:
+        for path in glob.glob(os.path.join(cache_dir, glob.escape(prefix) + "*" + ext)):
+            mtime = os.path.getmtime(path)
+            if newest is None or mtime > newest[0]:
+                newest = (mtime, os.path.basename(path)[:-len(ext)])
+    return newest[1] if newest else None
+
+
+def read_path(path, fields=None):
+    """Load one artifact file; `fields` limits which columns are decoded."""
+    _, fmt = split_name(path)
+    if fmt is None:
+        raise ValueError(f"Unknown cache format: {path}")
+    return CODECS[fmt].read(path, fields)
+
+
+def load(name, default=None, fields=None, cache_dir=CACHE_DIR):
+    """The artifact's data, or `default` ({} unless given) if it doesn't exist."""
+    path = find(name, cache_dir)
+    if path is None:
+        return {} if default is None else default
+    return read_path(path, fields)
+
+
+def load_required(name, fields=None, cache_dir=CACHE_DIR):
+    """Like load(), but a missing artifact raises FileNotFoundError."""
+    path = find(name, cache_dir)
+    if path is None:
+        raise FileNotFoundError(f"Cache artifact not found: {os.path.join(cache_dir, name)}")
+    return read_path(path, fields)
+
+
+def symbols(name="universe_cache", cache_dir=CACHE_DIR):
+    """Keys of a table artifact without decoding any of its columns."""
+    return list(load_required(name, fields=(), cache_dir=cache_dir))
+
+
+def save(name, data, fmt=None, cache_dir=CACHE_DIR):
+    """Write artifact `name` atomically and drop its files in other formats.
+
+    Anything that isn't a {key: {field: value}} table is written as JSON.
+    """
+    fmt = fmt or DEFAULT_FORMAT
+    if fmt != "json" and not is_table(data):
+        fmt = "json"
+    path = path_for(name, fmt, cache_dir)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        CODECS[fmt].write(f, data)
+    os.replace(tmp_path, path)
+    write_meta(path, data)
+    # Only one current file per artifact (a leftover export or pre-switch JSON
+    # would otherwise linger next to it)
+    for other in CODECS:
+        if other != fmt:
+            stale = path_for(name, other, cache_dir)
+            for stale_path in (stale, stale + META_SUFFIX):
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+    return path
+
+
+def export_json(name, cache_dir=CACHE_DIR):
+    """Write `<name>.json` from the artifact's current file, whatever its format."""
+    path = find(name, cache_dir)
+    if path is None:
+        raise FileNotFoundError(f"No cache artifact named {name}")
+    out = path_for(name, "json", cache_dir)
+    if path != out:
+        data = read_path(path)
+        tmp_path = f"{out}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, out)
+        write_meta(out, data)
+    return out
+
+
+# --- Metadata Sidecars ---
+
+def describe(data):
+    """Record count, empty records and per-field coverage of `data`."""
+    stats = {"records": len(data)}
+    if not isinstance(data, dict):
+        return stats
+    stats["empty"] = sum(1 for v in data.values() if not v)
+    if is_table(data):
+        fields = {}
+        for row in data.values():
+            for field, value in row.items():
+                counts = fields.get(field)
+                if counts is None:
+                    counts = fields[field] = [0, 0]
+                counts[0] += 1
+                if value is None:
+                    counts[1] += 1
+        stats["fields"] = {field: {"present": present, "null": null}
+                           for field, (present, null) in fields.items()}
+    if len(data) <= KEYS_INLINE_MAX:
+        stats["keys"] = list(data)
+    return stats
+
+
+def write_meta(path, data):
+    """Write the sidecar for the artifact file at `path`, which holds `data`."""
+    st = os.stat(path)
+    meta = {
+        "schema_version": SCHEMA_VERSION,
+        "file": os.path.basename(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "written_at": datetime.now(pytz.timezone("America/New_York")).isoformat(),
+        **describe(data),
+    }
+    meta_path = path + META_SUFFIX
+    tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+    return meta
+
+
+def read_meta(name, cache_dir=CACHE_DIR):
+    """Sidecar of the artifact's current file, or None if missing or stale.
+
+    A sidecar only counts if it describes this exact file (same name, size
+    and mtime, current schema version) — otherwise the file was rewritten
+    without one, and callers should read the data instead.
+    """
+    current = version(name, cache_dir)
+    if current is None:
+        return None
+    path, mtime_ns, size = current
+    try:
+        with open(path + META_SUFFIX, "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (meta.get("schema_version"), meta.get("file"), meta.get("size"), meta.get("mtime_ns")) != \
+            (SCHEMA_VERSION, os.path.basename(path), size, mtime_ns):
+        return None
+    return meta
+
+
+def artifacts(cache_dir=CACHE_DIR):
+    """Names of every artifact in the cache directory."""
+    names = set()
+    for fname in os.listdir(cache_dir):
+        stem, fmt = split_name(fname)
+        if fmt is not None and not stem.startswith(("cache_manifest", "run_report_", "scheduler_state")):
+            names.add(stem)
+    return sorted(names)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in ("export", "convert"):
+        print("usage: python -m backend.cache_io export|convert [name ...]")
+        return 1
+    command, names = argv[0], argv[1:]
+    if command == "export":
+        for name in names:
+            print(f"📤 {name} → {export_json(name)}")
+    else:
+        for name in names or artifacts():
+            path = find(name)
+            data = read_path(path)
+            if not is_table(data):
+                print(f"⏭️ {name} is not a symbol table — left as {os.path.basename(path)}")
+                continue
+            size = os.path.getsize(path)
+            out = save(name, data)
+            print(f"🔁 {os.path.basename(path)} ({size:,} B) → {os.path.basename(out)} ({os.path.getsize(out):,} B)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,140 +1,117 @@
 # backend/cache_manager.py
 
 import os
-import json
-import time
-from datetime import datetime
+import sys
+
+from backend import cache_io, sectors, snapshots
 
 # --- Config ---
 CACHE_DIR = "backend/cache"
-IMPORTANT_FILES = [
-    "tv_signals.json",
-    "sector_etf_prices.json",
-    "candles_5m.json",
-    "multi_day_levels.json",
-    "short_interest.json",
-    "universe_enriched",
-    "universe_scored"
-]
 
 # --- Cleanup Functions ---
 
-def is_today(file_path):
-    try:
-        modified_time = os.path.getmtime(file_path)
-        file_date = datetime.fromtimestamp(modified_time).date()
-        today = datetime.now().date()
-        return file_date == today
-    except Exception:
-        return False
-
-def cleanup_old_files():
+def cleanup_old_files(cache_dir=CACHE_DIR, keep=snapshots.KEEP, max_age_days=snapshots.MAX_AGE_DAYS,
+                      keep_daily=snapshots.KEEP_DAILY):
+    # Scraper inputs are rewritten in place; only published snapshots pile up.
+    # Retention is a listing of snapshot IDs, never the one readers are on.
     print("🧹 Starting Cache Cleanup...")
 
-    deleted_count = 0
-    skipped_count = 0
-
-    for base_name in IMPORTANT_FILES:
-        found_today = False
-        candidates = []
-
-        for fname in os.listdir(CACHE_DIR):
-            if fname.startswith(base_name):
-                full_path = os.path.join(CACHE_DIR, fname)
-                candidates.append(full_path)
-                if is_today(full_path):
-                    found_today = True
-
-        if found_today:
-            for path in candidates:
-                if not is_today(path):
-                    os.remove(path)
-                    deleted_count += 1
-        else:
-            skipped_count += 1
-            print(f"⚠️ No fresh {base_name} file today. Skipping delete.")
+    deleted = snapshots.prune(keep=keep, max_age_days=max_age_days, cache_dir=cache_dir, keep_daily=keep_daily)
+    for snapshot_id in deleted:
+        print(f"🗑️ Deleted old snapshot: {snapshot_id}")
 
-    print(f"✅ Cache cleanup complete: {deleted_count} files deleted, {skipped_count} skipped.\n")
+    # Dated outputs from before snapshots are unreachable once a snapshot is current
+    legacy_count = 0
+    if snapshots.current_dir(cache_dir) is not None:
+        for path in snapshots.legacy_outputs(cache_dir):
+            try:
+                os.remove(path)
+                legacy_count += 1
+                print(f"🗑️ Deleted pre-snapshot cache file: {os.path.basename(path)}")
+            except OSError as e:
+                print(f"⚠️ Error deleting {path}: {e}")
 
-# --- Audit Functions ---
+    kept = len(snapshots.list_ids(cache_dir))
+    print(f"✅ Cache cleanup complete: {len(deleted)} snapshots and {legacy_count} old files deleted, {kept} snapshots kept.\n")
 
-def audit_cache_files():
-    print("🔍 Starting Cache Audit...")
+# --- Audit Functions ---
+#
+# Each check reads the artifact's metadata sidecar (record count, per-field
+# coverage, keys of small tables), so the audit costs a few stats and tiny
+# JSON reads however big the caches get. --deep reads the data itself: only
+# the columns the checks need, and it also catches a sidecar that disagrees
+# with its file.
+
+EXPECTED_SECTOR_ETFS = sectors.ETFS
+
+AUDIT_CHECKS = {
+    "tv_signals": {"fields": ["timestamp"]},
+    "sector_etf_prices": {"keys": EXPECTED_SECTOR_ETFS},
+    "candles_5m": {"not_empty": True},
+    "multi_day_levels": {"fields": ["high", "low"]},
+    "short_interest": {"min_records": 50},
+}
+
+def scan_artifact(name, fields=None, cache_dir=CACHE_DIR):
+    """The same stats a sidecar holds, computed from the data (only `fields` if given)."""
+    return cache_io.describe(cache_io.load(name, cache_dir=cache_dir, fields=fields))
+
+def artifact_issues(name, checks, stats):
+    issues = []
+    records = stats["records"]
+    missing_fields = {}
+    for field in checks.get("fields", ()):
+        present = stats.get("fields", {}).get(field, {}).get("present", 0)
+        if present < records:
+            missing_fields[field] = records - present
+    if missing_fields:
+        # A row missing several required fields counts once per field; report the worst
+        issues.append(f"{max(missing_fields.values())} tickers missing {'/'.join(missing_fields)} in {name}")
+    if "keys" in checks:
+        missing_keys = [k for k in checks["keys"] if k not in stats.get("keys", ())]
+        if missing_keys:
+            issues.append(f"Missing {name} entries for: {missing_keys}")
+    if checks.get("not_empty") and stats.get("empty"):
+        issues.append(f"{stats['empty']} tickers have no data in {name}")
+    if records < checks.get("min_records", 0):
+        issues.append(f"Only {records} {name} tickers found — expected more")
+    return issues
+
+def audit_cache_files(cache_dir=CACHE_DIR, deep=False):
+    print(f"🔍 Starting Cache Audit{' (deep)' if deep else ''}...")
 
     issues_found = False
-
-    # Check TV Signals
-    tv_path = os.path.join(CACHE_DIR, "tv_signals.json")
-    if os.path.exists(tv_path):
-        with open(tv_path, "r") as f:
-            tv_data = json.load(f)
-        old_entries = [k for k, v in tv_data.items() if "timestamp" not in v]
-        if old_entries:
-            print(f"⚠️ {len(old_entries)} tickers missing timestamp in tv_signals.json")
-            issues_found = True
-    else:
-        print("⚠️ tv_signals.json missing!")
-        issues_found = True
-
-    # Check Sector ETF Prices
-    sector_path = os.path.join(CACHE_DIR, "sector_etf_prices.json")
-    if os.path.exists(sector_path):
-        with open(sector_path, "r") as f:
-            sector_data = json.load(f)
-        expected_etfs = ["XLF", "XLK", "XLE", "XLV", "XLY", "XLI", "XLP", "XLU", "XLRE", "XLB", "XLC"]
-        missing_etfs = [etf for etf in expected_etfs if etf not in sector_data]
-        if missing_etfs:
-            print(f"⚠️ Missing sector ETF prices for: {missing_etfs}")
+    for name, checks in AUDIT_CHECKS.items():
+        if not cache_io.exists(name, cache_dir):
+            print(f"⚠️ {name} missing!")
             issues_found = True
-    else:
-        print("⚠️ sector_etf_prices.json missing!")
-        issues_found = True
-
-    # Check 5m Candles
-    candles_path = os.path.join(CACHE_DIR, "candles_5m.json")
-    if os.path.exists(candles_path):
-        with open(candles_path, "r") as f:
-            candle_data = json.load(f)
-        empty_candles = [symbol for symbol, candles in candle_data.items() if not candles]
-        if empty_candles:
-            print(f"⚠️ {len(empty_candles)} tickers have no 5m candles")
-            issues_found = True
-    else:
-        print("⚠️ candles_5m.json missing!")
-        issues_found = True
-
-    # Check Multi-Day Levels
-    multi_path = os.path.join(CACHE_DIR, "multi_day_levels.json")
-    if os.path.exists(multi_path):
-        with open(multi_path, "r") as f:
-            multi_data = json.load(f)
-        missing_levels = [symbol for symbol, levels in multi_data.items() if "high" not in levels or "low" not in levels]
-        if missing_levels:
-            print(f"⚠️ {len(missing_levels)} tickers missing multi-day high/low levels")
-            issues_found = True
-    else:
-        print("⚠️ multi_day_levels.json missing!")
-        issues_found = True
-
-    # Check Short Interest
-    short_path = os.path.join(CACHE_DIR, "short_interest.json")
-    if os.path.exists(short_path):
-        with open(short_path, "r") as f:
-            short_data = json.load(f)
-        if len(short_data) < 50:
-            print(f"⚠️ Only {len(short_data)} short interest tickers found — expected more")
+            continue
+
+        meta = cache_io.read_meta(name, cache_dir)
+        if deep or meta is None:
+            if meta is None and not deep:
+                print(f"ℹ️ No metadata for {name} — checking the full file")
+            # Key and count checks only need the key column; emptiness needs whole rows
+            fields = checks.get("fields", None if checks.get("not_empty") else ())
+            stats = scan_artifact(name, fields, cache_dir)
+            if meta is not None and meta["records"] != stats["records"]:
+                print(f"⚠️ {name} metadata says {meta['records']} records, file has {stats['records']}")
+                issues_found = True
+        else:
+            stats = meta
+
+        for issue in artifact_issues(name, checks, stats):
+            print(f"⚠️ {issue}")
             issues_found = True
-    else:
-        print("⚠️ short_interest.json missing!")
-        issues_found = True
 
     if not issues_found:
         print("✅ Cache Audit Passed — All major caches healthy.\n")
     else:
         print("⚠️ Cache Audit found some problems. Check warnings above.\n")
+    return not issues_found
 
 # --- Main Execution ---
 
 if __name__ == "__main__":
     cleanup_old_files()
-    audit_cache_files()
+    audit_cache_files(deep="--deep" in sys.argv)
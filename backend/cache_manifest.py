@@ -0,0 +1,200 @@
+# backend/cache_manifest.py
+
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+
+import pytz
+
+from backend import cache_io, market_calendar, metrics
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache")
+MANIFEST_PATH = os.path.join(CACHE_DIR, "cache_manifest.json")
+
+EASTERN = pytz.timezone("America/New_York")
+
+# --- Freshness Policies ---
+
+def ttl(seconds):
+    def policy(fetched_at, now):
+        return (now - fetched_at).total_seconds() < seconds
+    policy.label = f"ttl {seconds}s"
+    return policy
+
+def once_per_day():
+    def policy(fetched_at, now):
+        return fetched_at.astimezone(EASTERN).date() == now.astimezone(EASTERN).date()
+    policy.label = "daily"
+    return policy
+
+def once_after(hour, minute):
+    """Fresh if fetched after the most recent trading day's HH:MM ET that has passed."""
+    def policy(fetched_at, now):
+        now_et = now.astimezone(EASTERN)
+        boundary = now_et.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if now_et < boundary:
+            boundary -= timedelta(days=1)
+        while not market_calendar.is_trading_day(boundary.date()):
+            boundary -= timedelta(days=1)
+        return fetched_at >= boundary
+    policy.label = f"daily after {hour:02d}:{minute:02d} ET"
+    return policy
+
+class after_opening_range:
+    """once_after() the end of the opening range the 5m candle scraper captures.
+
+    The range length (SCREENER_OPENING_RANGE_MINUTES) is read from the scraper
+    on each check; it imports this module, so it can't be read at import time.
+    """
+
+    def cutoff(self):
+        from backend.signals import scraper_candles_5m
+        return divmod(9 * 60 + 30 + scraper_candles_5m.OPENING_RANGE_MINUTES, 60)
+
+    def __call__(self, fetched_at, now):
+        return once_after(*self.cutoff())(fetched_at, now)
+
+    @property
+    def label(self):
+        return once_after(*self.cutoff()).label
+
+# source name -> (cache artifact or file, freshness policy); artifact names
+# have no extension, cache_io resolves them to whichever format is on disk
+SOURCES = {
+    "tv_signals": ("tv_signals", ttl(15 * 60)),
+    "sector_etf_prices": ("sector_etf_prices", ttl(60)),
+    "candles_5m": ("candles_5m", after_opening_range()),
+    "multi_day_levels": ("multi_day_levels", once_per_day()),
+    "short_interest": ("short_interest", ttl(7 * 24 * 3600)),
+    "daily_bars": ("bars/manifest.json", once_per_day()),
+    "universe_enriched": ("universe_enriched", ttl(15 * 60)),
+    "universe_scored": ("universe_scored", ttl(15 * 60)),
+    "autowatchlist": ("autowatchlist_cache", ttl(15 * 60)),
+}
+
+def resolve_file(name):
+    """File name on disk for a SOURCES entry or artifact name."""
+    if os.path.splitext(name)[1]:
+        return name
+    path = cache_io.find(name, CACHE_DIR)
+    return os.path.basename(path) if path else name
+
+_lock = threading.Lock()
+
+# --- Manifest I/O ---
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Could not read cache manifest {path}: {e}")
+        return {}
+
+def record(source, symbols=None, expected=None, path=None, partial=False, manifest_path=MANIFEST_PATH):
+    """Record a completed fetch for `source`; `symbols` is what the cache now covers.
+
+    `path` is the file or artifact written, if it isn't the one in SOURCES.
+
+    A partial refresh only filled gaps, so it keeps the previous `fetched_at`
+    rather than extending the freshness of entries it didn't touch.
+    """
+    now = datetime.now(EASTERN)
+    file = path or SOURCES.get(source, (None,))[0]
+    with _lock:
+        manifest = load_manifest(manifest_path)
+        previous = manifest.get(source, {})
+        entry = {
+            "fetched_at": previous["fetched_at"] if partial and previous else now.isoformat(),
+            "file": resolve_file(file) if file else None,
+        }
+        if symbols is not None:
+            covered = set(symbols)
+            entry["symbols"] = sorted(covered)
+            entry["coverage"] = {
+                "symbols": len(covered),
+                "expected": expected if expected is not None else len(covered),
+            }
+        manifest[source] = entry
+
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+    if entry["file"]:
+        metrics.record_write(os.path.join(CACHE_DIR, entry["file"]))
+    return entry
+
+def write_json(path, data, **dump_kwargs):
+    """Write via a temp file + rename so readers never see a half-written file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, **dump_kwargs)
+    os.replace(tmp_path, path)
+    return path
+
+def merge_partial(name, fetched, symbols, partial=True):
+    """Overlay freshly fetched entries on the existing cache artifact, in `symbols` order.
+
+    With `partial=False` (full refresh) the old artifact is ignored, so entries
+    that failed this run aren't carried over as if they were fresh.
+    """
+    previous = cache_io.load(name) if partial else {}
+    merged = {}
+    for symbol in symbols:
+        if symbol in fetched:
+            merged[symbol] = fetched[symbol]
+        elif symbol in previous:
+            merged[symbol] = previous[symbol]
+    return merged
+
+# --- Freshness Checks ---
+
+def is_fresh(source, now=None, manifest=None):
+    manifest = manifest if manifest is not None else load_manifest()
+    entry = manifest.get(source)
+    if not entry or source not in SOURCES:
+        return False
+    coverage = entry.get("coverage")
+    if coverage is not None and not coverage["symbols"]:
+        return False  # a run that fetched nothing doesn't count
+    now = now or datetime.now(EASTERN)
+    fetched_at = datetime.fromisoformat(entry["fetched_at"])
+    return SOURCES[source][1](fetched_at, now)
+
+def stale_symbols(source, symbols, now=None):
+    """Symbols that need fetching: all of them once the record has expired,
+    otherwise only those missing from the recorded coverage."""
+    manifest = load_manifest()
+    if not is_fresh(source, now=now, manifest=manifest):
+        stale = list(symbols)
+    else:
+        covered = set(manifest[source].get("symbols", []))
+        stale = [s for s in symbols if s not in covered]
+    metrics.cache_lookup(source, hit=True, count=len(symbols) - len(stale))
+    metrics.cache_lookup(source, hit=False, count=len(stale))
+    return stale
+
+def freshness_report(now=None):
+    manifest = load_manifest()
+    now = now or datetime.now(EASTERN)
+    report = {}
+    for source, (fname, policy) in SOURCES.items():
+        entry = manifest.get(source)
+        if not entry:
+            report[source] = {"file": fname, "last_modified": "Missing", "is_fresh": False, "policy": policy.label}
+            continue
+        fetched_at = datetime.fromisoformat(entry["fetched_at"])
+        report[source] = {
+            "file": entry.get("file") or fname,
+            "last_modified": fetched_at.astimezone(EASTERN).strftime("%Y-%m-%d %H:%M:%S"),
+            "is_fresh": policy(fetched_at, now),
+            "policy": policy.label,
+            "coverage": entry.get("coverage"),
+        }
+    return report
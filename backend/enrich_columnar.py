@@ -0,0 +1,237 @@
+# backend/enrich_columnar.py
+#
+# Columnar alternative to the per-symbol functions in enrich_universe.py.
+# Inputs are pulled into arrays aligned on the universe's symbol order, every
+# signal flag is computed as one boolean array, and entries are updated in
+# place, like the dict engine, so nothing is copied. Output matches enrich_universe.enrich()
+# (see verify_equivalence / `python -m backend.enrich_columnar`).
+
+import copy
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from pytz import timezone
+
+from backend import enrich_universe, sectors
+from backend.signal_registry import BIT_POSITION, encode
+
+_MISSING = object()
+
+TV_FIELDS = {
+    "price": "tv_price",
+    "volume": "tv_volume",
+    "changePercent": "tv_changePercent",
+    "rel_vol": "rel_vol",
+    "avg_volume_10d": "avg_volume_10d",
+    "open": "open",
+    "prevClose": "prevClose",
+    "yfinance_updated": "yfinance_updated",
+}
+
+
+# --- Column Helpers ---
+
+# Read back from the enriched entries, in the order enrich() unpacks them
+NUMERIC_FIELDS = [
+    "tv_price", "tv_volume", "tv_changePercent", "open", "prevClose", "rel_vol",
+    "range_930_940_high", "range_930_940_low", "high_10d", "low_10d", "avg_volume", "spread",
+]
+
+def _candle_ranges(symbols, candle_data, n):
+    """Opening-range high/low per symbol (NaN without usable candles)."""
+    range_high = [np.nan] * n
+    range_low = [np.nan] * n
+    has = [False] * n
+    get = candle_data.get
+    for i, symbol in enumerate(symbols):
+        candles = get(symbol)
+        if not candles:
+            continue
+        if isinstance(candles, dict):
+            h = candles.get("high") or ()
+            l = candles.get("low") or ()
+            if None in h:
+                h = [x for x in h if x is not None]
+            if None in l:
+                l = [x for x in l if x is not None]
+        else:
+            # Legacy list-of-dicts: only pairs with both high and low count
+            pairs = [(c.get("high"), c.get("low")) for c in candles]
+            h = [a for a, b in pairs if a is not None and b is not None]
+            l = [b for a, b in pairs if a is not None and b is not None]
+        if h and l:
+            range_high[i] = max(h)
+            range_low[i] = min(l)
+            has[i] = True
+    return range_high, range_low, has
+
+
+# --- Engine ---
+
+def enrich(universe, tv_signals, sector_prices, candles, short_interest, multi_day_data, top_n=5):
+    """Columnar equivalent of enrich_universe.enrich(); updates `universe` in place.
+
+    The per-symbol work is one pass that writes the fields the inputs set; the
+    numeric columns the flags need are then read back in one from_records call,
+    and a last pass writes each mask and timestamp.
+    """
+    symbols = list(universe)
+    infos = list(universe.values())
+    n = len(symbols)
+
+    # entry_mask(), inlined: most entries skip the legacy dict
+    base_masks = np.fromiter(
+        (info["signal_mask"] if "signal_mask" in info else encode(info.get("signals") or ()) for info in infos),
+        dtype=np.int64, count=n,
+    )
+
+    # Sector (registry name), its ETF and the ETF's move, as one update per
+    # group; relative strength needs the enriched % change, so it comes later
+    groups = sectors.SectorGroups.by_sector(universe)
+    codes = groups.codes.tolist()
+    etf_changes = sectors.etf_changes(sector_prices)
+    sector_change = groups.broadcast(etf_changes)
+    group_fields = []
+    for g, (name, etf) in enumerate(zip(sectors.SECTORS, sectors.ETFS)):
+        update = {"sector": name, "sector_etf": etf}
+        if etf_changes[g] == etf_changes[g]:  # not NaN
+            update["sector_change"] = float(etf_changes[g])
+        group_fields.append(update)
+
+    range_high, range_low, has_range = _candle_ranges(symbols, candles, n)
+
+    # TV rows keyed the same way as enrich_with_tv_signals
+    tv_norm = {k.split(".")[0].upper(): v for k, v in tv_signals.items()}
+    tv_get, multi_get = tv_norm.get, multi_day_data.get
+
+    # --- Write the input fields ---
+    for i, (symbol, info) in enumerate(zip(symbols, infos)):
+        info.pop("signals", None)
+        tv = tv_get(symbol.upper())
+        if tv:
+            info.update({TV_FIELDS[k]: v for k, v in tv.items() if k in TV_FIELDS})
+        if codes[i] >= 0:
+            info.update(group_fields[codes[i]])
+        if has_range[i]:
+            info["range_930_940_high"] = range_high[i]
+            info["range_930_940_low"] = range_low[i]
+        multi = multi_get(symbol)
+        if multi and "high" in multi and "low" in multi:
+            info["high_10d"] = multi["high"]
+            info["low_10d"] = multi["low"]
+
+    # --- Numeric columns ---
+    # One from_records pass over the enriched entries; absent and None both
+    # read as NaN, except rel_vol, which counts as 0 when absent
+    columns = pd.DataFrame.from_records(infos, columns=NUMERIC_FIELDS, nrows=n) \
+        .to_numpy(dtype=float).T if n else np.zeros((len(NUMERIC_FIELDS), 0))
+    (price, volume, change, open_price, prev_close, rel_vol, high, low,
+     high_10d, low_10d, avg_volume, spread) = columns
+    for i in np.flatnonzero(np.isnan(rel_vol)).tolist():
+        if "rel_vol" not in infos[i]:
+            rel_vol[i] = 0.0
+    change_or_zero = np.nan_to_num(change, nan=0.0)
+    tv_volume = np.nan_to_num(volume, nan=0.0)
+
+    si_get = short_interest.get
+    si_rows = [si_get(s.upper()) or None for s in symbols]
+    has_si = np.fromiter((r is not None for r in si_rows), dtype=bool, count=n)
+    short_pct = np.array([r.get("shortPercentOfFloat", 0) if r else 0 for r in si_rows], dtype=float)
+
+    rel_strength = np.round(change - sector_change, 2)
+    known = np.flatnonzero(~np.isnan(rel_strength))
+    for i, r in zip(known.tolist(), rel_strength[known].tolist()):
+        infos[i]["sector_rel_strength"] = r
+
+    # --- Flags (NaN compares False, matching the `is not None` guards) ---
+    with np.errstate(invalid="ignore", divide="ignore"):
+        flags = {}
+        strong, weak = sectors.rotation_masks(sector_prices)
+        flags["strong_sector"] = groups.broadcast(strong, False)
+        flags["weak_sector"] = groups.broadcast(weak, False)
+
+        flags["squeeze_watch"] = has_si & (short_pct >= 0.18) & (rel_vol > 1.2) & (np.abs(change_or_zero) >= 1.5)
+
+        flags["gap_up"] = open_price > prev_close * 1.01
+        flags["gap_down"] = ~flags["gap_up"] & (open_price < prev_close * 0.99)
+        flags["break_above_range"] = price > high
+        flags["break_below_range"] = price < low
+        flags["early_move"] = np.abs(change) >= 2.5
+        flags["high_volume"] = volume >= 1_000_000
+        gap_to_high = high - price
+        flags["near_range_high"] = (gap_to_high > 0) & (gap_to_high <= 0.25)
+        flags["high_rel_vol"] = rel_vol > 1.5
+        flags["near_multi_day_high"] = (high_10d != 0) & (price >= high_10d * 0.98)
+        flags["near_multi_day_low"] = (low_10d != 0) & (price <= low_10d * 1.02)
+
+        had_above = (base_masks >> BIT_POSITION["break_above_range"] & 1).astype(bool)
+        had_below = (base_masks >> BIT_POSITION["break_below_range"] & 1).astype(bool)
+        flags["high_volume_no_breakout"] = (
+            (volume >= 800_000) & (rel_vol > 1.0) &
+            (low * 0.99 <= price) & (price <= high * 1.01) &
+            ~(flags["break_above_range"] | had_above) &
+            ~(flags["break_below_range"] | had_below) &
+            ((high - low) / low < 0.02)
+        )
+
+        top_volume = np.zeros(n, dtype=bool)
+        top_volume[np.argsort(-tv_volume, kind="stable")[:top_n]] = True
+        flags["top_volume_gainer"] = top_volume
+
+        flags["low_liquidity"] = avg_volume < 500_000
+        flags["wide_spread"] = spread > 0.30
+
+    masks = base_masks.copy()
+    for name, flag in flags.items():
+        masks |= flag.astype(np.int64) << BIT_POSITION[name]
+
+    timestamp = datetime.now(timezone('America/New_York')).isoformat()
+    for info, mask in zip(infos, masks.tolist()):
+        info["signal_mask"] = mask
+        info["enriched_timestamp"] = timestamp
+
+    return universe
+
+
+# --- Equivalence Check ---
+
+def verify_equivalence(universe, inputs):
+    """Run both engines on copies of the same inputs; return mismatching symbols."""
+    expected = enrich_universe.enrich(copy.deepcopy(universe), **copy.deepcopy(inputs))
+    actual = enrich(copy.deepcopy(universe), **copy.deepcopy(inputs))
+
+    mismatches = {}
+    for symbol in set(expected) | set(actual):
+        a = dict(expected.get(symbol, {}))
+        b = dict(actual.get(symbol, {}))
+        a.pop("enriched_timestamp", None)
+        b.pop("enriched_timestamp", None)
+        if a != b:
+            keys = sorted(k for k in set(a) | set(b) if a.get(k, _MISSING) != b.get(k, _MISSING))
+            mismatches[symbol] = keys
+    return mismatches
+
+
+def main():
+    universe = enrich_universe.load_universe()
+    inputs = enrich_universe.load_inputs()
+    print(f"🔬 Comparing dict vs columnar enrichment on {len(universe)} tickers...")
+
+    mismatches = verify_equivalence(universe, inputs)
+    if mismatches:
+        print(f"❌ {len(mismatches)} tickers differ, e.g. {list(mismatches.items())[:5]}")
+    else:
+        print("✅ Columnar engine output matches enrich_universe.enrich()")
+
+    for name, fn in [("dict", enrich_universe.enrich), ("columnar", enrich)]:
+        u, i = copy.deepcopy(universe), copy.deepcopy(inputs)
+        start = time.perf_counter()
+        fn(u, **i)
+        print(f"⏱️ {name:<8} {time.perf_counter() - start:.4f}s")
+    return not mismatches
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,246 @@
+# backend/enrich_incremental.py
+#
+# Stateful enrich → score → watchlist for intraday polling. It keeps the last
+# inputs and results, diffs each new set of inputs per symbol, and re-runs the
+# per-symbol steps of enrich_universe only for symbols whose quote, candles,
+# levels or short interest changed. The two cross-sectional signals are kept
+# up to date incrementally:
+#   - top_volume_gainer: an ordered index of (-volume, position); only symbols
+#     entering or leaving the top N are touched
+#   - strong/weak_sector: sectors are re-ranked from the ETF quotes, and only
+#     members of sectors whose rank bucket changed are recomputed
+# Output matches the full pipeline (see `python -m backend.enrich_incremental`).
+
+import bisect
+import copy
+import random
+import time
+from datetime import datetime
+
+from pytz import timezone
+
+from backend import cache_io, enrich_universe, sectors, screenbuilder, watchlist_builder
+from backend.signal_registry import BITS, entry_mask
+
+TOP_N = 5
+
+
+
+def _normalize_tv(tv_signals):
+    # Same key normalization as enrich_with_tv_signals
+    return {k.split(".")[0].upper(): v for k, v in tv_signals.items()}
+
+
+def _changed_keys(old, new):
+    return [k for k in old.keys() | new.keys() if old.get(k) != new.get(k)]
+
+
+class IncrementalEnricher:
+    def __init__(self, universe, inputs, top_n=TOP_N):
+        self.base = universe
+        self.top_n = top_n
+        self.names = list(universe)
+        self.position = {symbol: i for i, symbol in enumerate(universe)}
+        self.by_upper = {}
+        self.sector_members = {}
+        for symbol, info in universe.items():
+            self.by_upper.setdefault(symbol.upper(), []).append(symbol)
+            self.sector_members.setdefault(sectors.canonical(info.get("sector")), []).append(symbol)
+        self._file_versions = {}
+
+        self._set_inputs(inputs)
+        self.rotation = enrich_universe.rank_sectors(self.inputs["sector_prices"])
+
+        self.scored = {symbol: self._enrich_one(symbol) for symbol in universe}
+        self.volume_key = {s: self._volume_key(s) for s in universe}
+        self.volume_index = sorted(self.volume_key.values())
+        self.top = self._top_symbols()
+        self.watchlist = {}
+        for symbol in universe:
+            self._finish(symbol)
+
+    # --- Per-symbol work ---
+
+    def _set_inputs(self, inputs):
+        self.inputs = dict(inputs)
+        self.tv = _normalize_tv(inputs["tv_signals"])
+
+    def _enrich_one(self, symbol):
+        """Every per-symbol step of enrich_universe.enrich(), for one symbol."""
+        info = copy.deepcopy(self.base[symbol])
+        info["signal_mask"] = entry_mask(info)
+        info.pop("signals", None)
+        single = {symbol: info}
+        upper = symbol.upper()
+        inputs = self.inputs
+
+        enrich_universe.enrich_with_tv_signals(single, {upper: self.tv.get(upper)})
+        enrich_universe.enrich_with_sector(single, inputs["sector_prices"])
+        top_sectors, bottom_sectors = self.rotation
+        sector = info.get("sector")
+        if sector and sector in top_sectors:
+            info["signal_mask"] |= BITS["strong_sector"]
+        elif sector and sector in bottom_sectors:
+            info["signal_mask"] |= BITS["weak_sector"]
+        enrich_universe.enrich_with_candles(single, {symbol: inputs["candles"].get(symbol)})
+        enrich_universe.enrich_with_multi_day_levels(single, {symbol: inputs["multi_day_data"].get(symbol)})
+        enrich_universe.enrich_with_short_interest(single, {upper: inputs["short_interest"].get(upper)})
+        enrich_universe.apply_signal_flags(single)
+        enrich_universe.inject_risk_flags(single)
+        info["enriched_timestamp"] = datetime.now(timezone('America/New_York')).isoformat()
+        return info
+
+    def _volume_key(self, symbol):
+        # Descending volume, ties in universe order — same as the sorted() in
+        # flag_top_volume_gainers
+        return (-(self.scored[symbol].get("tv_volume") or 0), self.position[symbol])
+
+    def _top_symbols(self):
+        return {self.names[pos] for _, pos in self.volume_index[:self.top_n]}
+
+    def _finish(self, symbol):
+        """Apply the top-volume bit, then score and re-evaluate the watchlist entry."""
+        info = self.scored[symbol]
+        if symbol in self.top:
+            info["signal_mask"] |= BITS["top_volume_gainer"]
+        else:
+            info["signal_mask"] &= ~BITS["top_volume_gainer"]
+        info["score"] = screenbuilder.score(info)
+        info["tierHits"] = screenbuilder.build_tier_hits(info)
+        entry = watchlist_builder.watchlist_entry(info)
+        if entry is None:
+            self.watchlist.pop(symbol, None)
+        else:
+            self.watchlist[symbol] = entry
+
+    # --- Updates ---
+
+    def dirty_symbols(self, inputs):
+        """Symbols whose per-symbol inputs differ from the last update."""
+        dirty = set()
+        old = self.inputs
+
+        new_tv = _normalize_tv(inputs["tv_signals"])
+        for key in _changed_keys(self.tv, new_tv):
+            dirty.update(self.by_upper.get(key, ()))
+        for key in _changed_keys(old["short_interest"], inputs["short_interest"]):
+            dirty.update(self.by_upper.get(key, ()))
+        for name in ("candles", "multi_day_data"):
+            for key in _changed_keys(old[name], inputs[name]):
+                if key in self.position:
+                    dirty.add(key)
+        # sector_change / sector_rel_strength follow the sector's ETF quote
+        for key in _changed_keys(old["sector_prices"], inputs["sector_prices"]):
+            dirty.update(self.sector_members.get(sectors.SECTOR_ETFS.get(key), ()))
+        return dirty
+
+    def update(self, inputs, dirty=None):
+        """Bring results up to date with `inputs`; returns what was recomputed.
+
+        `dirty` can name the changed symbols directly (e.g. from a scraper
+        that knows what it fetched); otherwise inputs are diffed per symbol.
+        """
+        if dirty is None:
+            dirty = self.dirty_symbols(inputs)
+        else:
+            dirty = set(dirty) & self.position.keys()
+        self._set_inputs(inputs)
+
+        # Sector rotation: only members of sectors that moved in/out of the
+        # top/bottom two need their sector bits redone
+        rotation = enrich_universe.rank_sectors(inputs["sector_prices"])
+        moved = (rotation[0] ^ self.rotation[0]) | (rotation[1] ^ self.rotation[1])
+        self.rotation = rotation
+        for sector in moved:
+            dirty.update(self.sector_members.get(sector, ()))
+
+        for symbol in dirty:
+            self.scored[symbol] = self._enrich_one(symbol)
+            key = self._volume_key(symbol)
+            old_key = self.volume_key[symbol]
+            if key != old_key:
+                del self.volume_index[bisect.bisect_left(self.volume_index, old_key)]
+                bisect.insort(self.volume_index, key)
+                self.volume_key[symbol] = key
+
+        top = self._top_symbols()
+        toggled = top ^ self.top
+        self.top = top
+        for symbol in dirty | toggled:
+            self._finish(symbol)
+
+        return {"dirty": len(dirty), "top_volume_changed": len(toggled), "sectors_moved": sorted(moved)}
+
+    def refresh_from_cache(self):
+        """Reload only the input artifacts that changed on disk, then update()."""
+        inputs = dict(self.inputs)
+        for name, artifact in enrich_universe.INPUTS.items():
+            version = cache_io.version(artifact, enrich_universe.CACHE_DIR)
+            if version is not None and self._file_versions.get(name) != version:
+                inputs[name] = cache_io.read_path(version[0])
+                self._file_versions[name] = version
+        return self.update(inputs)
+
+    @classmethod
+    def from_cache(cls):
+        versions = {name: cache_io.version(artifact, enrich_universe.CACHE_DIR)
+                    for name, artifact in enrich_universe.INPUTS.items()}
+        enricher = cls(enrich_universe.load_universe(), enrich_universe.load_inputs())
+        enricher._file_versions = {name: v for name, v in versions.items() if v is not None}
+        return enricher
+
+
+# --- Equivalence Check ---
+
+def _strip(universe):
+    return {s: {k: v for k, v in info.items() if k != "enriched_timestamp"} for s, info in universe.items()}
+
+
+def perturb_quotes(inputs, fraction, seed=0):
+    """Copy of `inputs` with `fraction` of the TV quotes (and one sector ETF) moved."""
+    rng = random.Random(seed)
+    inputs = copy.deepcopy(inputs)
+    tv = inputs["tv_signals"]
+    for symbol in rng.sample(sorted(tv), max(1, int(len(tv) * fraction))):
+        quote = tv[symbol]
+        if quote.get("price"):
+            quote["price"] = round(quote["price"] * rng.uniform(0.97, 1.03), 2)
+        if quote.get("volume"):
+            quote["volume"] = int(quote["volume"] * rng.uniform(0.8, 3.0))
+        if quote.get("changePercent") is not None:
+            quote["changePercent"] = round(quote["changePercent"] + rng.uniform(-2, 2), 2)
+    etfs = sorted(k for k, v in inputs["sector_prices"].items() if isinstance(v, dict) and v.get("tv_price"))
+    if etfs:
+        etf = inputs["sector_prices"][rng.choice(etfs)]
+        etf["tv_price"] = round(etf["tv_price"] * rng.uniform(0.97, 1.03), 2)
+    return inputs
+
+
+def main(fraction=0.05, rounds=3):
+    universe = enrich_universe.load_universe()
+    inputs = enrich_universe.load_inputs()
+    print(f"🔬 Incremental vs full enrichment on {len(universe)} tickers, {fraction:.0%} of quotes changing per poll...")
+
+    enricher = IncrementalEnricher(universe, inputs)
+    ok = True
+    for i in range(rounds):
+        inputs = perturb_quotes(inputs, fraction, seed=i)
+
+        start = time.perf_counter()
+        stats = enricher.update(inputs)
+        incremental_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        full = screenbuilder.score_universe(enrich_universe.enrich(copy.deepcopy(universe), **copy.deepcopy(inputs)))
+        watchlist = watchlist_builder.build_watchlist(full)
+        full_s = time.perf_counter() - start
+
+        same = _strip(full) == _strip(enricher.scored) and _strip(watchlist) == _strip(enricher.watchlist)
+        ok &= same
+        print(f"{'✅' if same else '❌'} poll {i + 1}: {stats['dirty']} recomputed, "
+              f"{stats['top_volume_changed']} top-volume changes — incremental {incremental_s:.4f}s vs full {full_s:.4f}s")
+    return ok
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -1,33 +1,39 @@
-import json
 import os
 from datetime import datetime
-import pytz 
 from pytz import timezone
-from tqdm import tqdm
-
-CACHE_DIR = "backend/cache"
-UNIVERSE_PATH = os.path.join(CACHE_DIR, "universe_cache.json")
-TV_SIGNALS_PATH = os.path.join(CACHE_DIR, "tv_signals.json")
-SECTOR_PRICES_PATH = os.path.join(CACHE_DIR, "sector_etf_prices.json")
-CANDLES_PATH = os.path.join(CACHE_DIR, "candles_5m.json")
-MULTI_DAY_PATH = os.path.join(CACHE_DIR, "multi_day_levels.json")
-SHORT_INTEREST_PATH = os.path.join(CACHE_DIR, "short_interest.json")
 
+import numpy as np
 
-current_date_str = datetime.now(pytz.timezone("America/New_York")).strftime("%Y-%m-%d")
-OUTPUT_PATH = os.path.join(CACHE_DIR, f"universe_enriched_{current_date_str}.json")
+from backend import cache_io, profiling, sectors, snapshots
+from backend.signal_registry import entry_mask, has, set_signal
 
-def load_json(path):
-    if not os.path.exists(path):
-        print(f"⚠️ Warning: Cache file missing: {path}")
+CACHE_DIR = "backend/cache"
+UNIVERSE = "universe_cache"
+
+# enrich() argument -> cache artifact the scraper writes it to
+INPUTS = {
+    "tv_signals": "tv_signals",
+    "sector_prices": "sector_etf_prices",
+    "candles": "candles_5m",
+    "short_interest": "short_interest",
+    "multi_day_data": "multi_day_levels",
+}
+
+def load_artifact(name, cache_dir=CACHE_DIR):
+    path = cache_io.find(name, cache_dir)
+    if path is None:
+        print(f"⚠️ Warning: Cache artifact missing: {os.path.join(cache_dir, name)}")
         return {}
     try:
-        with open(path, "r") as f:
-            return json.load(f)
+        return cache_io.read_path(path)
     except Exception as e:
         print(f"❌ Error loading {path}: {e}")
         return {}
 
+def load_universe(cache_dir=CACHE_DIR):
+    return load_artifact(UNIVERSE, cache_dir)
+
+@profiling.traced("enrich")
 def enrich_with_tv_signals(universe, tv_data):
     normalized_tv_data = {}
     for k, v in tv_data.items():
@@ -37,15 +43,11 @@ def enrich_with_tv_signals(universe, tv_data):
     for symbol, info in universe.items():
         tv = normalized_tv_data.get(symbol.upper())
         if tv:
-            signals = info.setdefault("signals", {})
             if "price" in tv:
-                signals["price"] = tv["price"]
                 info["tv_price"] = tv["price"]
             if "volume" in tv:
-                signals["volume"] = tv["volume"]
                 info["tv_volume"] = tv["volume"]
             if "changePercent" in tv:
-                signals["changePercent"] = tv["changePercent"]
                 info["tv_changePercent"] = tv["changePercent"]
             if "rel_vol" in tv:
                 info["rel_vol"] = tv["rel_vol"]
@@ -60,80 +62,64 @@ def enrich_with_tv_signals(universe, tv_data):
     
     return universe
 
+@profiling.traced("enrich")
 def enrich_with_sector(universe, sector_data):
-    for symbol, info in universe.items():
-        sector = info.get("sector")
-        if not sector:
+    # Sector names are normalized to the registry's GICS names; each symbol
+    # gets its sector ETF, the ETF's move and its relative strength against it
+    groups = sectors.SectorGroups.by_sector(universe)
+    sector_change = groups.broadcast(sectors.etf_changes(sector_data))
+    rel_strength = np.round(sectors.changes_of(universe) - sector_change, 2)
+    names, etfs = sectors.SECTORS, sectors.ETFS
+    for info, code, change, rel in zip(universe.values(), groups.codes.tolist(),
+                                       sector_change.tolist(), rel_strength.tolist()):
+        if code < 0:
             continue
-        etf = sector_data.get(sector)
-        if etf:
-            info["sector_etf"] = etf
+        info["sector"] = names[code]
+        info["sector_etf"] = etfs[code]
+        if change == change:  # not NaN
+            info["sector_change"] = change
+        if rel == rel:
+            info["sector_rel_strength"] = rel
     return universe
 
-def apply_sector_rotation_signals(universe, sector_data):
-    SECTOR_ETFS = {
-        "XLF": "Financial Services",
-        "XLK": "Technology",
-        "XLE": "Energy",
-        "XLV": "Healthcare",
-        "XLY": "Consumer Cyclical",
-        "XLI": "Industrials",
-        "XLP": "Consumer Defensive",
-        "XLU": "Utilities",
-        "XLRE": "Real Estate",
-        "XLB": "Basic Materials",
-        "XLCD": "Communication Services"
-    }
-
-    # Reverse map for easier matching
-    SECTOR_TO_ETF = {v: k for k, v in SECTOR_ETFS.items()}
-
-    sector_changes = {}
-    for etf, sector in SECTOR_ETFS.items():
-        etf_info = sector_data.get(etf)
-        if not etf_info:
-            continue
-        price = etf_info.get("tv_price")
-        prev_close = etf_info.get("prevClose")
-        if price and prev_close:
-            try:
-                change = ((price - prev_close) / prev_close) * 100
-                sector_changes[sector] = round(change, 2)
-            except ZeroDivisionError:
-                continue
-
-    sorted_sectors = sorted(sector_changes.items(), key=lambda x: x[1], reverse=True)
-    top_sectors = set(s for s, _ in sorted_sectors[:2])
-    bottom_sectors = set(s for s, _ in sorted_sectors[-2:])
-
-    for symbol, info in universe.items():
-        sector = info.get("sector")
-        if not sector:
-            continue
-        signals = info.setdefault("signals", {})
-        if sector in top_sectors:
-            signals["strong_sector"] = True
-        elif sector in bottom_sectors:
-            signals["weak_sector"] = True
+def rank_sectors(sector_data):
+    """(top 2, bottom 2) sector names by their ETF's % change on the day."""
+    top, bottom = sectors.rank(sector_data)
+    return set(top), set(bottom)
 
+@profiling.traced("enrich")
+def apply_sector_rotation_signals(universe, sector_data):
+    groups = sectors.SectorGroups.by_sector(universe)
+    strong, weak = sectors.rotation_masks(sector_data)
+    infos = list(universe.values())
+    for i in np.flatnonzero(groups.broadcast(strong, False)):
+        set_signal(infos[i], "strong_sector")
+    for i in np.flatnonzero(groups.broadcast(weak, False)):
+        set_signal(infos[i], "weak_sector")
     return universe
 
 
+@profiling.traced("enrich")
 def enrich_with_candles(universe, candle_data):
     for symbol, info in universe.items():
-        candles = candle_data.get(symbol, [])
+        candles = candle_data.get(symbol)
         if not candles:
             continue
 
-        highs = []
-        lows = []
-
-        for c in candles:
-            high = c.get("high")
-            low = c.get("low")
-            if high is not None and low is not None:
-                highs.append(high)
-                lows.append(low)
+        if isinstance(candles, dict):
+            # Compact opening-range arrays from scraper_candles_5m
+            highs = [h for h in candles.get("high", []) if h is not None]
+            lows = [l for l in candles.get("low", []) if l is not None]
+        else:
+            # Legacy list-of-dicts cache files
+            highs = []
+            lows = []
+            for c in candles:
+                high = c.get("high")
+                low = c.get("low")
+                if high is not None and low is not None:
+                    highs.append(high)
+                    lows.append(low)
 
         if highs and lows:
             info["range_930_940_high"] = max(highs)
@@ -142,6 +128,7 @@ def enrich_with_candles(universe, candle_data):
     return universe
 
 
+@profiling.traced("enrich")
 def enrich_with_multi_day_levels(universe, multi_day_data):
     for symbol, info in universe.items():
         data = multi_day_data.get(symbol)
@@ -150,11 +137,12 @@ def enrich_with_multi_day_levels(universe, multi_day_data):
             info["low_10d"] = data["low"]
     return universe
 
+@profiling.traced("enrich")
 def enrich_with_short_interest(universe, short_data):
     for symbol, info in universe.items():
         si = short_data.get(symbol.upper())
         rel_vol = info.get("rel_vol", 0)
-        change = info.get("signals", {}).get("changePercent", 0)
+        change = info.get("tv_changePercent") or 0
 
         if si:
             short_pct = si.get("shortPercentOfFloat", 0)
@@ -163,15 +151,16 @@ def enrich_with_short_interest(universe, short_data):
                 rel_vol > 1.2 and
                 abs(change) >= 1.5
             ):
-                info.setdefault("signals", {})["squeeze_watch"] = True
+                set_signal(info, "squeeze_watch")
     return universe
 
+@profiling.traced("enrich")
 def apply_signal_flags(universe):
     for symbol, info in universe.items():
-        signals = info.setdefault("signals", {})
-        price = signals.get("price")
-        volume = signals.get("volume")
-        change = signals.get("changePercent")
+        info["signal_mask"] = entry_mask(info)
+        price = info.get("tv_price")
+        volume = info.get("tv_volume")
+        change = info.get("tv_changePercent")
         open_price = info.get("open")
         prev_close = info.get("prevClose")
         high = info.get("range_930_940_high")
@@ -179,32 +168,32 @@ def apply_signal_flags(universe):
         
         if open_price is not None and prev_close is not None:
             if open_price > prev_close * 1.01:
-                signals["gap_up"] = True
+                set_signal(info, "gap_up")
             elif open_price < prev_close * 0.99:
-                signals["gap_down"] = True
+                set_signal(info, "gap_down")
 
         if price is not None and high is not None and price > high:
-            signals["break_above_range"] = True
+            set_signal(info, "break_above_range")
         if price is not None and low is not None and price < low:
-            signals["break_below_range"] = True
+            set_signal(info, "break_below_range")
 
         if change is not None and abs(change) >= 2.5:
-            signals["early_move"] = True
+            set_signal(info, "early_move")
 
         if volume is not None and volume >= 1_000_000:
-            signals["high_volume"] = True
+            set_signal(info, "high_volume")
 
         if price is not None and high is not None and 0 < (high - price) <= 0.25:
-            signals["near_range_high"] = True
+            set_signal(info, "near_range_high")
 
         if info.get("rel_vol", 0) > 1.5:
-            signals["high_rel_vol"] = True
+            set_signal(info, "high_rel_vol")
 
         if price is not None and info.get("high_10d") and price >= info["high_10d"] * 0.98:
-            signals["near_multi_day_high"] = True
+            set_signal(info, "near_multi_day_high")
 
         if price is not None and info.get("low_10d") and price <= info["low_10d"] * 1.02:
-            signals["near_multi_day_low"] = True
+            set_signal(info, "near_multi_day_low")
 
         if (
             volume is not None and volume >= 800_000 and  # lower vol threshold a bit
@@ -212,17 +201,18 @@ def apply_signal_flags(universe):
             high is not None and low is not None and
             price is not None and
             low * 0.99 <= price <= high * 1.01 and         # widen wiggle room from 0.5% → 1%
-            not signals.get("break_above_range") and
-            not signals.get("break_below_range") and
+            not has(info["signal_mask"], "break_above_range") and
+            not has(info["signal_mask"], "break_below_range") and
             (high - low) / low < 0.02                     # expand range limit from 1.5% → 2%
         ):
-            signals["high_volume_no_breakout"] = True
+            set_signal(info, "high_volume_no_breakout")
 
 
 
         
     return universe
 
+@profiling.traced("enrich")
 def flag_top_volume_gainers(universe, top_n=5):
     sorted_tickers = sorted(
         universe.items(),
@@ -230,30 +220,28 @@ def flag_top_volume_gainers(universe, top_n=5):
         reverse=True
     )
     for symbol, info in sorted_tickers[:top_n]:
-        info.setdefault("signals", {})["top_volume_gainer"] = True
+        set_signal(info, "top_volume_gainer")
     return universe
 
+@profiling.traced("enrich")
 def inject_risk_flags(universe):
     for symbol, info in universe.items():
         vol = info.get("avg_volume")
         spread = info.get("spread")
         if vol is not None and vol < 500_000:
-            info.setdefault("signals", {})["low_liquidity"] = True
+            set_signal(info, "low_liquidity")
         if spread is not None and spread > 0.30:
-            info.setdefault("signals", {})["wide_spread"] = True
+            set_signal(info, "wide_spread")
     return universe
 
-def main():
-    print("🚀 Starting enrichment...")
-    universe = load_json(UNIVERSE_PATH)
-    print(f"📡 Loading latest TV signals...")
-    tv_signals = load_json(TV_SIGNALS_PATH)
-    sector_prices = load_json(SECTOR_PRICES_PATH)
-    candles = load_json(CANDLES_PATH)
-    short_interest = load_json(SHORT_INTEREST_PATH)
-    multi_day_data = load_json(MULTI_DAY_PATH)
+def load_inputs(cache_dir=CACHE_DIR):
+    return {arg: load_artifact(name, cache_dir) for arg, name in INPUTS.items()}
 
-    print(f"📦 Loaded {len(universe)} tickers")
+def enrich(universe, tv_signals, sector_prices, candles, short_interest, multi_day_data):
+    # Signals live in one bitmask per symbol; fold any legacy dict into it
+    for info in universe.values():
+        info["signal_mask"] = entry_mask(info)
+        info.pop("signals", None)
 
     universe = enrich_with_tv_signals(universe, tv_signals)
     universe = enrich_with_sector(universe, sector_prices)
@@ -270,10 +258,21 @@ def main():
 
     for symbol, info in universe.items():
         info["enriched_timestamp"] = now_eastern.isoformat()
+    return universe
 
-    with open(OUTPUT_PATH, "w") as f:
-        json.dump(universe, f, indent=2)
-    print(f"✅ Enriched universe saved to {OUTPUT_PATH}")
+def save_enriched(universe, snapshot=None):
+    return snapshots.save("universe_enriched", universe, source="universe_enriched",
+                          snapshot=snapshot, cache_dir=CACHE_DIR)
+
+def main():
+    # Scoring and the watchlist are re-run too, so the published snapshot
+    # never pairs this enrichment with outputs built from an older one
+    from backend import pipeline  # pipeline imports this module
+
+    print("🚀 Starting enrichment...")
+    result = pipeline.run(persist=True)
+    print(f"📦 Enriched {len(result['scored'])} tickers")
+    print(f"✅ Enriched universe saved to {result['paths']['enriched']}")
 
 if __name__ == "__main__":
     main()
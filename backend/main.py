@@ -1,9 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import json
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+import asyncio
 import os
-from datetime import datetime
+import time
+from typing import List, Optional
+
+from backend import cache_io, metrics, response_cache, snapshots
+from backend.watchlist_stream import WatchlistHub
+from backend.cache_manifest import freshness_report
+from backend.routes import autowatchlist as autowatchlist_route
+from backend.screenbuilder import get_latest_universe_file, score_latest
+from backend.signal_registry import BIT_POSITION
+from backend.universe_index import DEFAULT_LIMIT, DEFAULT_SORT, load_index
 
 app = FastAPI()
 
@@ -17,66 +26,136 @@ app.add_middleware(
 
 CACHE_DIR = "backend/cache"
 
-def load_json_file(path: str, label: str):
-    if not os.path.exists(path):
-        return JSONResponse(
-            {"error": f"{label} not found at path: {path}"},
-            status_code=404
-        )
-    with open(path, "r") as f:
-        return JSONResponse(content=json.load(f))
+# Records list of the published watchlist, republished only when a pipeline input changes
+app.include_router(autowatchlist_route.router, prefix="/api/screen")
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template (not the raw URL) to keep label sets bounded
+    route = request.scope.get("route")
+    metrics.observe(
+        "screener_http_request_seconds",
+        time.perf_counter() - start,
+        method=request.method,
+        path=getattr(route, "path", "unmatched"),
+        status=response.status_code,
+    )
+    return response
+
+responses = response_cache.ResponseCache()
+
+async def serve_artifact(request: Request, name: Optional[str], label: str, directory: str = CACHE_DIR):
+    # Served from memory as pre-encoded JSON until the artifact changes on disk
+    entry = await responses.artifact(name, directory) if name else None
+    if entry is None:
+        return response_cache.not_found(os.path.join(directory, name or ""), label)
+    return await response_cache.respond(request, entry)
+
+def locate_version(name):
+    # current.json + stat; callers run this in a worker thread
+    found, directory = snapshots.locate(name, CACHE_DIR)
+    return found, directory, cache_io.version(found, directory) if found else None
+
+universe_index = None
+
+async def get_universe_index(version):
+    # Rebuilt (off the event loop) only when a new scored snapshot lands
+    global universe_index
+    if universe_index is None or universe_index.version != version:
+        universe_index = await asyncio.to_thread(load_index, version[0])
+    return universe_index
 
 @app.get("/api/universe")
-async def get_universe():
-    path = os.path.join(CACHE_DIR, "universe_scored.json")
-    return load_json_file(path, "Scored universe")
+async def get_universe(
+    request: Request,
+    min_score: Optional[int] = None,
+    tier: Optional[str] = None,
+    signal: List[str] = Query(default=[]),
+    sector: Optional[str] = None,
+    blocked: Optional[bool] = None,
+    sort: str = DEFAULT_SORT,
+    limit: int = DEFAULT_LIMIT,
+    offset: int = 0,
+    fields: Optional[str] = None,
+):
+    # Resolve the current snapshot once so the file and its index agree
+    name, directory, version = await asyncio.to_thread(locate_version, "universe_scored")
+    if not request.query_params or version is None:
+        # No query: the whole snapshot, straight from the response cache
+        return await serve_artifact(request, name, "Scored universe", directory)
+
+    index = await get_universe_index(version)
+    try:
+        result = index.query(
+            min_score=min_score,
+            tier=tier,
+            signals=[s for value in signal for s in value.split(",") if s],
+            sector=sector,
+            blocked=blocked,
+            sort=sort,
+            limit=limit,
+            offset=offset,
+            fields=[f for f in fields.split(",") if f] if fields else None,
+        )
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    entry = response_cache.Entry(index.version, response_cache.encode_json(result), version[1] / 1e9)
+    return await response_cache.respond(request, entry)
+
+@app.get("/api/score")
+async def score_universe_now(request: Request):
+    # Re-score the latest enriched universe, once per version of that file
+    def latest_version():
+        source = get_latest_universe_file()
+        return (source, os.stat(source).st_mtime_ns)
+
+    try:
+        version = await asyncio.to_thread(latest_version)
+    except FileNotFoundError as e:
+        return JSONResponse({"error": str(e)}, status_code=404)
+    entry = await responses.computed("score", version, score_latest)
+    return await response_cache.respond(request, entry)
 
 @app.get("/api/sector")
-async def get_sector_rotation():
-    path = os.path.join(CACHE_DIR, "sector_etf_prices.json")
-    return load_json_file(path, "Sector ETF data")
+async def get_sector_rotation(request: Request):
+    return await serve_artifact(request, "sector_etf_prices", "Sector ETF data")
 
 @app.get("/api/raw")
-async def get_universe_raw():
-    path = os.path.join(CACHE_DIR, "universe_cache.json")
-    return load_json_file(path, "Raw universe")
+async def get_universe_raw(request: Request):
+    return await serve_artifact(request, "universe_cache", "Raw universe")
 
 @app.get("/api/cache-timestamps")
 async def get_cache_timestamps():
-    files = [
-        "tv_signals.json",
-        "sector_etf_prices.json",
-        "candles_5m.json",
-        "multi_day_levels.json",
-        "short_interest.json",
-        "universe_enriched.json",
-        "universe_scored.json",
-        "autowatchlist_cache.json"
-    ]
-
-    now = datetime.now()
-    freshness_minutes = 15
-    output = {}
-
-    for fname in files:
-        full_path = os.path.join(CACHE_DIR, fname)
-        if os.path.exists(full_path):
-            modified_ts = os.path.getmtime(full_path)
-            modified_dt = datetime.fromtimestamp(modified_ts)
-            is_fresh = (now - modified_dt).total_seconds() < freshness_minutes * 60
-            output[fname] = {
-                "last_modified": modified_dt.strftime("%Y-%m-%d %H:%M:%S"),
-                "is_fresh": is_fresh
-            }
-        else:
-            output[fname] = {
-                "last_modified": "Missing",
-                "is_fresh": False
-            }
-
-    return JSONResponse(content=output)
+    # Freshness comes from the cache manifest each writer updates, judged
+    # against that source's own TTL (weekly, daily, after the opening range, ...)
+    report = await asyncio.to_thread(freshness_report)
+    return JSONResponse(content=report)
+
+@app.get("/api/metrics")
+async def get_metrics():
+    # Prometheus text format: this process's counters plus the latest run reports
+    body = await asyncio.to_thread(metrics.render_prometheus)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@app.get("/api/signals")
+async def get_signal_registry():
+    # Bit position of each signal, for decoding the `signal_mask` on entries
+    return JSONResponse(content=BIT_POSITION)
 
 @app.get("/api/autowatchlist")
-async def get_watchlist():
-    path = os.path.join(CACHE_DIR, "autowatchlist_cache.json")
-    return load_json_file(path, "AutoWatchlist")
+async def get_watchlist(request: Request):
+    name, directory = await asyncio.to_thread(snapshots.locate, "autowatchlist_cache", CACHE_DIR)
+    return await serve_artifact(request, name, "AutoWatchlist", directory)
+
+watchlist_hub = WatchlistHub()
+
+@app.get("/api/autowatchlist/stream")
+async def stream_watchlist(request: Request):
+    # Snapshot on connect, then only added/removed/changed symbols per run
+    return StreamingResponse(
+        watchlist_hub.stream(request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
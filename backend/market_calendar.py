@@ -0,0 +1,133 @@
+# backend/market_calendar.py
+#
+# NYSE trading calendar from the exchange's holiday rules — no external data.
+# Full-day closures and 1:00 PM early closes; times are America/New_York.
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+import pytz
+
+EASTERN = pytz.timezone("America/New_York")
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th `weekday` (Mon=0) of the month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year, month + 1, 1) - timedelta(days=1) if month < 12 else date(year, 12, 31)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year):
+    # Anonymous Gregorian algorithm
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(d):
+    # Saturday holidays close the Friday before, Sunday ones the Monday after
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=None)
+def holidays(year):
+    """{date: name} of full-day NYSE closures in `year`."""
+    days = {
+        _nth_weekday(year, 1, 0, 3): "Martin Luther King Jr. Day",
+        _nth_weekday(year, 2, 0, 3): "Washington's Birthday",
+        _easter(year) - timedelta(days=2): "Good Friday",
+        _nth_weekday(year, 5, 0, -1): "Memorial Day",
+        _observed(date(year, 7, 4)): "Independence Day",
+        _nth_weekday(year, 9, 0, 1): "Labor Day",
+        _nth_weekday(year, 11, 3, 4): "Thanksgiving Day",
+        _observed(date(year, 12, 25)): "Christmas Day",
+    }
+    # A Saturday New Year's Day is not observed on the Friday before (NYSE rule)
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days[_observed(new_year)] = "New Year's Day"
+    if year >= 2022:
+        days[_observed(date(year, 6, 19))] = "Juneteenth"
+    return days
+
+
+@lru_cache(maxsize=None)
+def early_closes(year):
+    """Dates in `year` when the market closes at 1:00 PM ET."""
+    candidates = [
+        date(year, 7, 3),                                     # before Independence Day
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),     # day after Thanksgiving
+        date(year, 12, 24),                                   # Christmas Eve
+    ]
+    return {d for d in candidates if d.weekday() < 5 and d not in holidays(year)}
+
+
+def is_trading_day(d):
+    return d.weekday() < 5 and d not in holidays(d.year)
+
+
+def previous_trading_day(d):
+    d -= timedelta(days=1)
+    while not is_trading_day(d):
+        d -= timedelta(days=1)
+    return d
+
+
+def next_trading_day(d):
+    d += timedelta(days=1)
+    while not is_trading_day(d):
+        d += timedelta(days=1)
+    return d
+
+
+def session(d):
+    """(open, close) as aware ET datetimes, or None if the market is closed on `d`."""
+    if not is_trading_day(d):
+        return None
+    close = EARLY_CLOSE if d in early_closes(d.year) else MARKET_CLOSE
+    return (
+        EASTERN.localize(datetime.combine(d, MARKET_OPEN)),
+        EASTERN.localize(datetime.combine(d, close)),
+    )
+
+
+def now_eastern():
+    return datetime.now(EASTERN)
+
+
+def is_market_open(now=None):
+    now = (now or now_eastern()).astimezone(EASTERN)
+    hours = session(now.date())
+    return hours is not None and hours[0] <= now < hours[1]
+
+
+def last_session_date(now=None, after=timedelta(0)):
+    """Most recent trading day whose open + `after` has passed.
+
+    With `after` = the opening-range length this is the latest session whose
+    opening range is complete.
+    """
+    now = (now or now_eastern()).astimezone(EASTERN)
+    d = now.date()
+    hours = session(d)
+    if hours is not None and now >= hours[0] + after:
+        return d
+    return previous_trading_day(d)
@@ -0,0 +1,308 @@
+# backend/metrics.py
+#
+# In-process instrumentation shared by the refresh, the pipeline and the API.
+#   - stage(): times one stage of a run and collects its symbol count,
+#     failures and bytes written (the fetch engine and the cache manifest
+#     report into whichever stage is active on the calling thread)
+#   - counters / histograms for fetch latency, API requests and cache lookups
+#   - run reports: one JSON file per run kind, written next to the cache
+# render_prometheus() turns all of it into Prometheus text exposition format.
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytz
+
+from backend import profiling
+
+CACHE_DIR = "backend/cache"
+EASTERN = pytz.timezone("America/New_York")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600)
+
+_lock = threading.Lock()
+_local = threading.local()
+
+HELP = {
+    "screener_stage_seconds": "Wall time per run stage",
+    "screener_stage_symbols_total": "Symbols processed per run stage",
+    "screener_stage_failures_total": "Failed symbols/tasks per run stage",
+    "screener_stage_bytes_written_total": "Bytes written to the cache per run stage",
+    "screener_fetch_latency_seconds": "Per-symbol provider call latency",
+    "screener_fetch_calls_total": "Provider calls including retries",
+    "screener_fetch_errors_total": "Symbols that failed after all retries",
+    "screener_http_request_seconds": "API request latency",
+    "screener_cache_lookups_total": "Cache lookups by cache and result (hit/miss)",
+    "screener_run_stage_seconds": "Stage wall time in the latest run report",
+    "screener_run_stage_symbols": "Symbols processed by the stage in the latest run report",
+    "screener_run_stage_failures": "Failures in the stage in the latest run report",
+    "screener_run_stage_bytes_written": "Bytes the stage wrote in the latest run report",
+    "screener_run_seconds": "Total wall time of the latest run report",
+    "screener_run_timestamp_seconds": "Unix time the latest run report finished",
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+
+
+_counters = {}    # (name, labels) -> float
+_histograms = {}  # (name, labels) -> Histogram
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = Histogram(buckets)
+        hist.observe(value)
+
+
+def cache_lookup(cache, hit, count=1):
+    inc("screener_cache_lookups_total", count, cache=cache, result="hit" if hit else "miss")
+
+
+# --- Stages & Runs ---
+
+class Stage:
+    def __init__(self, name, run=None):
+        self.name = name
+        self.run = run
+        self.seconds = 0.0
+        self.symbols = 0
+        self.failures = 0
+        self.bytes_written = 0
+        self.status = "ok"
+
+    def as_dict(self):
+        return {
+            "stage": self.name,
+            "status": self.status,
+            "seconds": round(self.seconds, 4),
+            "symbols": self.symbols,
+            "failures": self.failures,
+            "bytes_written": self.bytes_written,
+        }
+
+
+class Run:
+    def __init__(self, kind):
+        self.kind = kind
+        self.started = time.time()
+        self.stages = []
+
+    def report(self):
+        return {
+            "run": self.kind,
+            "started_at": datetime.fromtimestamp(self.started, EASTERN).isoformat(),
+            "seconds": round(time.time() - self.started, 4),
+            "stages": [s.as_dict() for s in self.stages],
+        }
+
+
+_active_run = None
+
+
+def current_stage():
+    return getattr(_local, "stage", None)
+
+
+@contextmanager
+def stage(name):
+    """Time a run stage; yields the Stage so callers can fill in counts."""
+    s = Stage(name, run=_active_run)
+    previous = current_stage()
+    _local.stage = s
+    start = time.perf_counter()
+    try:
+        yield s
+    except Exception:
+        s.status = "failed"
+        raise
+    finally:
+        s.seconds = time.perf_counter() - start
+        _local.stage = previous
+        profiling.record(name, "stage", start, s.seconds,
+                         {"status": s.status, "symbols": s.symbols, "failures": s.failures})
+        observe("screener_stage_seconds", s.seconds, buckets=STAGE_BUCKETS, stage=name)
+        inc("screener_stage_symbols_total", s.symbols, stage=name)
+        inc("screener_stage_failures_total", s.failures, stage=name)
+        inc("screener_stage_bytes_written_total", s.bytes_written, stage=name)
+        if s.run is not None:
+            with _lock:
+                s.run.stages.append(s)
+
+
+@contextmanager
+def run(kind):
+    """Collect every stage finished inside the block into one run report."""
+    global _active_run
+    r = Run(kind)
+    previous, _active_run = _active_run, r
+    try:
+        yield r
+    finally:
+        _active_run = previous
+        path = save_report(r.report())
+        print(f"📈 Run report saved to {path}")
+
+
+def report_path(kind):
+    return os.path.join(CACHE_DIR, f"run_report_{kind}.json")
+
+
+def save_report(report):
+    path = report_path(report["run"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_reports(cache_dir=CACHE_DIR):
+    reports = []
+    for fname in sorted(os.listdir(cache_dir)):
+        if fname.startswith("run_report_") and fname.endswith(".json"):
+            path = os.path.join(cache_dir, fname)
+            try:
+                with open(path, "r") as f:
+                    report = json.load(f)
+            except (OSError, ValueError):
+                continue
+            report["finished"] = os.path.getmtime(path)
+            reports.append(report)
+    return reports
+
+
+# --- Hooks called from the fetch engine and the cache manifest ---
+
+def record_fetch(source, result, sizes=None):
+    """Fold a FetchResult into the latency histogram and the active stage.
+
+    `sizes` maps batch job IDs to the number of symbols each covers, so a
+    stage counts symbols rather than download jobs.
+    """
+    for seconds in result.latencies.values():
+        observe("screener_fetch_latency_seconds", seconds, source=source)
+    inc("screener_fetch_calls_total", sum(result.attempts.values()), source=source)
+    inc("screener_fetch_errors_total", len(result.errors), source=source)
+    s = current_stage()
+    if s is not None:
+        if sizes is None:
+            s.symbols += len(result.results) + len(result.errors)
+            s.failures += len(result.errors)
+        else:
+            s.symbols += sum(sizes[job] for job in result.attempts)
+            s.failures += sum(sizes[job] for job in result.errors)
+
+
+def add_bytes(n):
+    s = current_stage()
+    if s is not None:
+        s.bytes_written += n
+
+
+def record_write(path):
+    if path and os.path.isfile(path):
+        add_bytes(os.path.getsize(path))
+
+
+# --- Prometheus Exposition ---
+
+def _fmt_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_value(value):
+    value = float(value)
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def render_prometheus(reports=None):
+    # Samples are grouped per metric family first: the exposition format
+    # wants each family's HELP/TYPE once, with all of its samples after it
+    families = {}  # name -> (kind, [sample lines]), in first-seen order
+
+    def family(name, kind):
+        return families.setdefault(name, (kind, []))[1]
+
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(
+            (key, (h.buckets, list(h.counts), h.count, h.sum)) for key, h in _histograms.items()
+        )
+
+    for (name, labels), value in counters:
+        family(name, "counter").append(f"{name}{_fmt_labels(labels)} {_fmt_value(value)}")
+
+    for (name, labels), (buckets, counts, count, total) in histograms:
+        samples = family(name, "histogram")
+        cumulative = 0
+        for upper, c in zip(buckets, counts):
+            cumulative += c
+            samples.append(f"{name}_bucket{_fmt_labels(labels, [('le', upper)])} {cumulative}")
+        samples.append(f"{name}_bucket{_fmt_labels(labels, [('le', '+Inf')])} {count}")
+        samples.append(f"{name}_sum{_fmt_labels(labels)} {_fmt_value(total)}")
+        samples.append(f"{name}_count{_fmt_labels(labels)} {count}")
+
+    # Runs happen in other processes; their reports on disk become gauges
+    for report in reports if reports is not None else load_reports():
+        run_labels = [("run", report.get("run"))]
+        family("screener_run_seconds", "gauge").append(
+            f"screener_run_seconds{_fmt_labels(run_labels)} {_fmt_value(report.get('seconds', 0))}")
+        if "finished" in report:
+            family("screener_run_timestamp_seconds", "gauge").append(
+                f"screener_run_timestamp_seconds{_fmt_labels(run_labels)} {_fmt_value(report['finished'])}")
+        for s in report.get("stages", []):
+            stage_labels = run_labels + [("stage", s.get("stage")), ("status", s.get("status"))]
+            for field in ("seconds", "symbols", "failures", "bytes_written"):
+                name = f"screener_run_stage_{field}"
+                family(name, "gauge").append(f"{name}{_fmt_labels(stage_labels)} {_fmt_value(s.get(field, 0))}")
+
+    lines = []
+    for name, (kind, samples) in families.items():
+        lines.append(f"# HELP {name} {HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
@@ -1,13 +1,12 @@
 import os
-import glob
+
+from backend import snapshots
 
 def get_latest_universe_path(cache_dir: str = "backend/cache") -> str | None:
-    pattern = os.path.join(cache_dir, "universe_enriched_*.json")
-    files = glob.glob(pattern)
-    if not files:
+    latest = snapshots.find("universe_enriched", cache_dir)
+    if latest is None:
         print("❌ No universe enriched cache files found.")
         return None
-    latest = max(files, key=os.path.getmtime)
     print(f"✅ Latest universe file found: {latest}")
     return latest
 
@@ -0,0 +1,69 @@
+# backend/pipeline.py
+
+import os
+
+from backend import cache_io, enrich_columnar, enrich_universe, metrics, screenbuilder, snapshots, watchlist_builder
+
+# "dict" = per-symbol functions in enrich_universe, "columnar" = enrich_columnar
+ENRICH_ENGINES = {
+    "dict": enrich_universe.enrich,
+    "columnar": enrich_columnar.enrich,
+}
+DEFAULT_ENGINE = os.getenv("SCREENER_ENRICH_ENGINE", "dict")
+
+REQUIRED_INPUTS = list(enrich_universe.INPUTS.values())
+
+
+def missing_inputs(cache_dir=enrich_universe.CACHE_DIR):
+    return [name for name in REQUIRED_INPUTS if not cache_io.exists(name, cache_dir)]
+
+
+def run(universe=None, inputs=None, persist=True, engine=None):
+    """Enrich → score → build watchlist, passing objects straight through.
+
+    `universe` and `inputs` default to the cached base universe and scraper
+    outputs. Nothing touches disk until the optional persist stage at the
+    end, which publishes the outputs as one snapshot (see snapshots.py).
+    Returns {"scored": ..., "watchlist": ..., "paths": ..., "snapshot": ...}.
+    """
+    snap = snapshots.SnapshotWriter(enrich_universe.CACHE_DIR) if persist else None
+    try:
+        with metrics.stage("load_inputs"):
+            source_dir = enrich_universe.CACHE_DIR
+            if snap is not None:
+                # Read cached inputs through the snapshot, so the outputs are
+                # stored next to exactly the files they were built from
+                pinned = ([enrich_universe.UNIVERSE] if universe is None else []) + \
+                         (REQUIRED_INPUTS if inputs is None else [])
+                source_dir = snap.pin(pinned)
+            if universe is None:
+                universe = enrich_universe.load_universe(source_dir)
+            if inputs is None:
+                inputs = enrich_universe.load_inputs(source_dir)
+
+        with metrics.stage("enrich") as s:
+            enriched = ENRICH_ENGINES[engine or DEFAULT_ENGINE](universe, **inputs)
+            s.symbols = len(enriched)
+        with metrics.stage("score") as s:
+            scored = screenbuilder.score_universe(enriched)
+            s.symbols = len(scored)
+        with metrics.stage("watchlist") as s:
+            watchlist = watchlist_builder.build_watchlist(scored)
+            s.symbols = len(watchlist)
+
+        paths = {}
+        if snap is not None:
+            # Scoring annotated the enriched dicts in place; the enriched
+            # artifact is written without the score fields
+            with metrics.stage("persist"):
+                paths["enriched"] = enrich_universe.save_enriched(screenbuilder.without_scores(scored), snapshot=snap)
+                paths["scored"] = screenbuilder.save_scored(scored, snapshot=snap)
+                paths["watchlist"] = watchlist_builder.save_watchlist(watchlist, snapshot=snap)
+                snap.commit()
+    except BaseException:
+        if snap is not None:
+            snap.abort()
+        raise
+
+    return {"scored": scored, "watchlist": watchlist, "paths": paths,
+            "snapshot": snap.id if snap is not None else None}
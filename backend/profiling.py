@@ -0,0 +1,293 @@
+# backend/profiling.py
+#
+# --profile mode for run_pipeline.py and daily_refresh.py. While a session is
+# active it records timing spans, each tagged with the thread it ran on:
+#   - every metrics.stage() (pipeline stages, refresh tasks, persist, ...)
+#   - every enrich function marked @traced("enrich")
+#   - every per-symbol provider call made through the fetch engine
+# When the session ends it writes to cache/profiles/:
+#   <kind>_<stamp>.trace.json    Chrome trace events (ui.perfetto.dev,
+#                                chrome://tracing or speedscope show it as a
+#                                flame graph per thread)
+#   <kind>_<stamp>.summary.json  time per span + per-symbol fetch outliers,
+#                                also printed as a table
+#   <kind>_<stamp>.prof          --cprofile: cProfile stats of the main thread
+#                                and each task graph task (pstats / snakeviz;
+#                                on 3.12+ one profiler covers all threads)
+#   <kind>_<stamp>.tracemalloc   --tracemalloc: allocation snapshot at the end;
+#                                traced memory also becomes a trace counter
+# Outside a session every hook costs one None check.
+#
+#   python run_pipeline.py --profile [--cprofile] [--tracemalloc]
+#   python -m backend.daily_refresh --profile [--cprofile] [--tracemalloc]
+
+import cProfile
+import io
+import linecache
+import os
+import pstats
+import statistics
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+
+import pytz
+
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), "cache", "profiles")
+EASTERN = pytz.timezone("America/New_York")
+
+TOP_N = 15
+OUTLIER_FACTOR = 3.0        # a fetch slower than 3× its source's median...
+MIN_OUTLIER_SECONDS = 0.25  # ...and at least this slow is an outlier
+
+_session = None
+
+
+class Session:
+    def __init__(self, kind, cprofile=False, memory=False, out_dir=PROFILE_DIR):
+        self.kind = kind
+        self.cprofile = cprofile
+        self.memory = memory
+        self.out_dir = out_dir
+        self.events = []
+        self.threads = {}      # thread ident -> name
+        self.latencies = {}    # fetch source -> {symbol: seconds}
+        self.profiles = []
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.stamp = f"{datetime.now(EASTERN):%Y%m%dT%H%M%S}"
+
+    def _us(self, t):
+        return round((t - self.origin) * 1e6, 1)
+
+    def add(self, name, cat, start, seconds, args=None):
+        thread = threading.current_thread()
+        event = {"name": name, "cat": cat, "ph": "X", "pid": os.getpid(), "tid": thread.ident,
+                 "ts": self._us(start), "dur": round(seconds * 1e6, 1)}
+        if args:
+            event["args"] = args
+        counter = None
+        if self.memory and tracemalloc.is_tracing():
+            counter = {"name": "traced memory (MiB)", "ph": "C", "pid": os.getpid(),
+                       "ts": self._us(start + seconds),
+                       "args": {"MiB": round(tracemalloc.get_traced_memory()[0] / 2**20, 2)}}
+        with self.lock:
+            self.threads[thread.ident] = thread.name
+            self.events.append(event)
+            if counter:
+                self.events.append(counter)
+
+    def trace(self):
+        names = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": ident, "args": {"name": name}}
+                 for ident, name in self.threads.items()]
+        return {"traceEvents": names + self.events, "displayTimeUnit": "ms",
+                "otherData": {"run": self.kind, "started_at": self.stamp}}
+
+
+def active():
+    return _session is not None
+
+
+# --- Hooks ---
+
+def record(name, cat, start, seconds, args=None):
+    """Add a finished span (start is a perf_counter() value)."""
+    s = _session
+    if s is not None:
+        s.add(name, cat, start, seconds, args)
+
+
+@contextmanager
+def span(name, cat="span", **args):
+    s = _session
+    if s is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        s.add(name, cat, start, time.perf_counter() - start, args)
+
+
+def traced(cat):
+    """Decorator: one span per call, named after the function."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _session is None:
+                return fn(*args, **kwargs)
+            with span(fn.__name__, cat):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record_fetch(source, result):
+    """Keep a FetchResult's per-symbol latencies for the outlier report."""
+    s = _session
+    if s is not None:
+        with s.lock:
+            s.latencies.setdefault(source, {}).update(result.latencies)
+
+
+@contextmanager
+def profile_thread():
+    """cProfile the calling thread for the block (before 3.12 cProfile sees one thread only).
+
+    From Python 3.12 cProfile runs on sys.monitoring: one profiler per
+    process, which already sees every thread. A second enable() raises
+    ValueError, so the block then runs under the session's profiler.
+    """
+    s = _session
+    if s is None or not s.cprofile:
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        with s.lock:
+            s.profiles.append(profiler)
+
+
+# --- Sessions ---
+
+def options(argv):
+    """session() keyword arguments for --profile / --cprofile / --tracemalloc, or None."""
+    cprofile, memory = "--cprofile" in argv, "--tracemalloc" in argv
+    if not ("--profile" in argv or cprofile or memory):
+        return None
+    return {"cprofile": cprofile, "memory": memory}
+
+
+def maybe_session(kind, opts):
+    return session(kind, **opts) if opts is not None else nullcontext()
+
+
+@contextmanager
+def session(kind, cprofile=False, memory=False, out_dir=PROFILE_DIR):
+    global _session
+    s = Session(kind, cprofile, memory, out_dir)
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _session = s
+    print(f"⏱️ Profiling {kind} run" + (" with cProfile" if cprofile else "") +
+          (" and tracemalloc" if memory else ""))
+    try:
+        with profile_thread(), span(kind, "run"):
+            yield s
+    finally:
+        _session = None
+        snapshot = tracemalloc.take_snapshot() if memory else None
+        if started_tracing:
+            tracemalloc.stop()
+        finish(s, snapshot)
+
+
+# --- Reports ---
+
+def span_table(s):
+    """Per (cat, name): calls, total / mean / max seconds. Fetch calls are in fetch_outliers()."""
+    groups = {}
+    for e in s.events:
+        if e["ph"] != "X" or e["cat"].startswith("fetch:"):
+            continue
+        groups.setdefault((e["cat"], e["name"]), []).append(e["dur"] / 1e6)
+    rows = [{"cat": cat, "span": name, "calls": len(d), "total": round(sum(d), 4),
+             "mean": round(sum(d) / len(d), 4), "max": round(max(d), 4)}
+            for (cat, name), d in groups.items()]
+    return sorted(rows, key=lambda r: r["total"], reverse=True)
+
+
+def fetch_outliers(s, factor=OUTLIER_FACTOR, min_seconds=MIN_OUTLIER_SECONDS, top_n=TOP_N):
+    """{source: {symbols, median, p95, max, outliers: [[symbol, seconds], ...]}}"""
+    report = {}
+    for source, latencies in s.latencies.items():
+        if not latencies:
+            continue
+        values = sorted(latencies.values())
+        median = statistics.median(values)
+        p95 = statistics.quantiles(values, n=20)[-1] if len(values) > 1 else values[0]
+        threshold = max(median * factor, min_seconds)
+        slow = sorted(((sym, t) for sym, t in latencies.items() if t >= threshold),
+                      key=lambda x: x[1], reverse=True)
+        report[source] = {
+            "symbols": len(values),
+            "median": round(median, 4),
+            "p95": round(p95, 4),
+            "max": round(values[-1], 4),
+            "outliers": [[sym, round(t, 4)] for sym, t in slow[:top_n]],
+            "outlier_count": len(slow),
+        }
+    return report
+
+
+def finish(s, snapshot=None):
+    from backend import cache_manifest  # imports metrics, which imports this module
+
+    os.makedirs(s.out_dir, exist_ok=True)
+    base = os.path.join(s.out_dir, f"{s.kind}_{s.stamp}")
+    spans = span_table(s)
+    outliers = fetch_outliers(s)
+    paths = [cache_manifest.write_json(base + ".trace.json", s.trace())]
+    paths.append(cache_manifest.write_json(base + ".summary.json",
+                                           {"run": s.kind, "spans": spans, "fetch": outliers}, indent=2))
+    print_summary(s.kind, spans, outliers)
+
+    if s.profiles:
+        stats = pstats.Stats(s.profiles[0])
+        for profiler in s.profiles[1:]:
+            stats.add(profiler)
+        stats.dump_stats(base + ".prof")
+        paths.append(base + ".prof")
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(TOP_N)
+        print(f"\n🐍 cProfile — top {TOP_N} by cumulative time")
+        print(out.getvalue().split("\n", 1)[-1].strip("\n"))
+
+    if snapshot is not None:
+        snapshot.dump(base + ".tracemalloc")
+        paths.append(base + ".tracemalloc")
+        # Leave out the profiler's own bookkeeping (events, cProfile's linecache reads)
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, path)
+                                           for path in (__file__, tracemalloc.__file__, linecache.__file__)])
+        print(f"\n🧠 tracemalloc — top {TOP_N} allocation sites still live at the end")
+        for stat in snapshot.statistics("lineno")[:TOP_N]:
+            frame = stat.traceback[0]
+            print(f"  {stat.size / 2**20:>8.2f} MiB {stat.count:>9} blocks  {frame.filename}:{frame.lineno}")
+
+    print("\n💾 Profile written:")
+    for path in paths:
+        print(f"  {path}")
+    return paths
+
+
+def print_summary(kind, spans, outliers):
+    run_seconds = next((r["total"] for r in spans if r["cat"] == "run"), 0) or 1
+    width = max([len(r["span"]) for r in spans] + [4])
+    print(f"\n⏱️ Profile summary ({kind})")
+    print(f"  {'span':<{width}}  {'cat':<7}{'calls':>7}{'total':>10}{'mean':>10}{'max':>10}{'share':>8}")
+    for r in spans:
+        print(f"  {r['span']:<{width}}  {r['cat']:<7}{r['calls']:>7}{r['total']:>9.3f}s"
+              f"{r['mean'] * 1000:>8.1f}ms{r['max'] * 1000:>8.1f}ms{r['total'] / run_seconds:>8.1%}")
+
+    if outliers:
+        print(f"\n🐢 Per-symbol fetch latency (outliers: ≥{OUTLIER_FACTOR:g}× median and ≥{MIN_OUTLIER_SECONDS}s)")
+    for source, o in outliers.items():
+        print(f"  {source}: {o['symbols']} symbols, median {o['median'] * 1000:.0f}ms, "
+              f"p95 {o['p95'] * 1000:.0f}ms, max {o['max'] * 1000:.0f}ms, {o['outlier_count']} outliers")
+        for symbol, seconds in o["outliers"]:
+            print(f"    {symbol:<8}{seconds:>8.2f}s  ({seconds / o['median']:.1f}× median)"
+                  if o["median"] else f"    {symbol:<8}{seconds:>8.2f}s")
@@ -0,0 +1,176 @@
+# backend/response_cache.py
+#
+# In-memory cache of already-encoded API responses. JSON cache files are served
+# as their raw bytes (no parse/re-serialize); columnar cache artifacts and
+# computed payloads are encoded once per version. Compressed variants are built lazily
+# and kept next to the plain body. Each entry carries an ETag/Last-Modified so
+# polling clients get a 304 while the data is unchanged. Even the stat that
+# checks the version runs in a worker thread, never on the event loop.
+
+import asyncio
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi.responses import JSONResponse, Response
+
+from backend import cache_io, metrics
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json works the same
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only
+    brotli = None
+
+GZIP_LEVEL = 5
+MIN_COMPRESS_BYTES = 1024
+
+
+def encode_json(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class Entry:
+    """One encoded response body plus its validators and compressed variants."""
+
+    def __init__(self, version, body, modified):
+        self.version = version
+        self.body = body
+        self.etag = f'"{zlib.crc32(body):08x}-{len(body):x}"'
+        self.last_modified = formatdate(modified, usegmt=True)
+        self.modified = int(modified)
+        self.variants = {}
+        self._lock = threading.Lock()
+
+    def variant(self, encoding):
+        # Built on first request for that encoding, then reused
+        with self._lock:
+            if encoding not in self.variants:
+                self.variants[encoding] = _compress(self.body, encoding)
+            return self.variants[encoding]
+
+
+class ResponseCache:
+    def __init__(self):
+        self._entries = {}
+
+    async def file(self, path):
+        """Entry for a JSON file, re-read only when its mtime/size changes."""
+        try:
+            st = await asyncio.to_thread(os.stat, path)
+        except FileNotFoundError:
+            return None
+        version = (path, st.st_mtime_ns, st.st_size)
+        entry = self._entries.get(path)
+        hit = entry is not None and entry.version == version
+        metrics.cache_lookup("response", hit)
+        if not hit:
+            entry = await asyncio.to_thread(lambda: Entry(version, _read_bytes(path), st.st_mtime))
+            self._entries[path] = entry
+        return entry
+
+    async def artifact(self, name, cache_dir=cache_io.CACHE_DIR):
+        """Entry for a cache artifact in whatever format it was written."""
+        version = await asyncio.to_thread(cache_io.version, name, cache_dir)
+        if version is None:
+            return None
+        path, mtime_ns, _ = version
+        if path.endswith(".json"):
+            return await self.file(path)
+        entry = self._entries.get(name)
+        hit = entry is not None and entry.version == version
+        metrics.cache_lookup("response", hit)
+        if not hit:
+            entry = await asyncio.to_thread(
+                lambda: Entry(version, encode_json(cache_io.read_path(path)), mtime_ns / 1e9)
+            )
+            self._entries[name] = entry
+        return entry
+
+    async def computed(self, key, version, build):
+        """Entry for a payload built by `build()`, rebuilt when `version` changes."""
+        entry = self._entries.get(key)
+        hit = entry is not None and entry.version == version
+        metrics.cache_lookup("response", hit)
+        if not hit:
+            entry = await asyncio.to_thread(lambda: Entry(version, encode_json(build()), time.time()))
+            self._entries[key] = entry
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _accepted_encoding(request, size):
+    if size < MIN_COMPRESS_BYTES:
+        return None
+    accept = request.headers.get("accept-encoding", "")
+    offered = {part.split(";")[0].strip() for part in accept.split(",")}
+    if brotli is not None and "br" in offered:
+        return "br"
+    if "gzip" in offered:
+        return "gzip"
+    return None
+
+
+def _not_modified(request, entry, etag):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return "*" in tags or etag in tags or entry.etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return entry.modified <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def respond(request, entry):
+    """Encoded response for `entry`, or a bodiless 304 if the client is current."""
+    encoding = _accepted_encoding(request, len(entry.body))
+    # Each encoded representation gets its own strong validator
+    etag = entry.etag if encoding is None else f'{entry.etag[:-1]}-{encoding}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": entry.last_modified,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    not_modified = _not_modified(request, entry, etag)
+    metrics.cache_lookup("client", not_modified)
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    body = entry.body
+    if encoding is not None:
+        body = entry.variant(encoding) if encoding in entry.variants else \
+            await asyncio.to_thread(entry.variant, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def not_found(path, label):
+    return JSONResponse({"error": f"{label} not found at path: {path}"}, status_code=404)
@@ -1,14 +1,25 @@
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
-from backend.screenbuilder import build_screening_output
+
+from backend import response_cache
+from backend.watchlist_service import watchlist_service
 
 router = APIRouter()
 
 @router.get("/")
-def get_autowatchlist():
+async def get_autowatchlist(request: Request, fields: Optional[str] = None):
+    # Memoized per published snapshot; a burst of requests shares one rebuild
     try:
-        data = build_screening_output()
-        return JSONResponse(content=data.to_dict("records"))
+        snapshot = await run_in_threadpool(watchlist_service.current)
+    except FileNotFoundError as e:
+        return JSONResponse(status_code=503, content={"error": str(e)})
     except Exception as e:
         print(f"❌ Error generating autowatchlist: {e}")
         return JSONResponse(status_code=500, content={"error": "Failed to generate autowatchlist."})
+    # ?fields=score,signals trims each record; `signals` decodes signal_mask
+    fields = [f for f in fields.split(",") if f] if fields else None
+    entry = snapshot.projected(fields) if fields else snapshot.entry
+    return await response_cache.respond(request, entry)
@@ -0,0 +1,264 @@
+# backend/scheduler.py
+#
+# Long-running refresh daemon driven by the NYSE calendar:
+#   - premarket      daily refresh (all scrapers) from 8:00 ET
+#   - opening_range  5m candles once the 9:30 opening range is complete
+#   - intraday       quotes + sector ETFs every SCREENER_QUOTE_INTERVAL seconds
+#                    while the market is open
+# Every job ends by re-running enrich → score → watchlist (intraday polls only
+# for the symbols whose inputs changed, see enrich_incremental.py), which
+# publishes the results as a new cache snapshot (see snapshots.py). Jobs run
+# one at a time on the daemon thread and hold an exclusive file lock, so a
+# second scheduler can't overlap them.
+# Weekends, exchange holidays and 1:00 PM early closes come from market_calendar.
+#
+#   python -m backend.scheduler           run forever
+#   python -m backend.scheduler --once    run whatever is due now and exit (cron)
+#   python -m backend.scheduler --plan    print today's schedule
+
+import fcntl
+import json
+import os
+import signal
+import sys
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+
+from backend import cache_manifest, daily_refresh, market_calendar, metrics, pipeline
+from backend import enrich_universe, screenbuilder, snapshots, watchlist_builder
+from backend.enrich_incremental import IncrementalEnricher
+from backend.signals import scrape_sector_prices, scrape_tv_signals, scraper_candles_5m
+from backend.signals.fetch_engine import FetchEngine
+
+CACHE_DIR = "backend/cache"
+LOCK_PATH = os.path.join(CACHE_DIR, ".scheduler.lock")
+STATE_PATH = os.path.join(CACHE_DIR, "scheduler_state.json")
+
+PREMARKET_AT = time(8, 0)
+OPENING_RANGE_DELAY = timedelta(minutes=1)  # let the last 5m bar settle
+QUOTE_INTERVAL = timedelta(seconds=int(os.getenv("SCREENER_QUOTE_INTERVAL", "300")))
+RETRY_AFTER = timedelta(minutes=10)
+POLL_SECONDS = 15
+
+
+# --- Jobs ---
+
+# Intraday polls only recompute symbols whose inputs changed; the state is
+# dropped whenever a full publish rebuilds everything
+_incremental = None
+
+def publish():
+    # Enrich → score → watchlist, published together as one snapshot
+    global _incremental
+    _incremental = None
+    pipeline.run(persist=True)
+
+def publish_incremental():
+    global _incremental
+    with metrics.stage("incremental_enrich") as s:
+        if _incremental is None:
+            _incremental = IncrementalEnricher.from_cache()
+            s.symbols = len(_incremental.scored)
+        else:
+            stats = _incremental.refresh_from_cache()
+            s.symbols = stats["dirty"]
+            print(f"♻️ Re-enriched {stats['dirty']} changed tickers "
+                  f"({stats['top_volume_changed']} top-volume changes, sectors moved: {stats['sectors_moved'] or 'none'})")
+    with metrics.stage("persist"), snapshots.SnapshotWriter(CACHE_DIR) as snap:
+        snap.pin([enrich_universe.UNIVERSE] + pipeline.REQUIRED_INPUTS)
+        enrich_universe.save_enriched(screenbuilder.without_scores(_incremental.scored), snapshot=snap)
+        screenbuilder.save_scored(_incremental.scored, snapshot=snap)
+        watchlist_builder.save_watchlist(_incremental.watchlist, snapshot=snap)
+
+def premarket_job():
+    daily_refresh.main()
+    publish()
+
+def opening_range_job():
+    scraper_candles_5m.main(force=True)
+    publish()
+
+def intraday_job():
+    scrape_tv_signals.main(engine=FetchEngine(), force=True)
+    scrape_sector_prices.fetch_sector_prices(force=True)
+    publish_incremental()
+
+JOBS = {
+    "premarket": premarket_job,
+    "opening_range": opening_range_job,
+    "intraday": intraday_job,
+}
+
+
+# --- Schedule ---
+
+def opening_range_ready(open_at):
+    return open_at + timedelta(minutes=scraper_candles_5m.OPENING_RANGE_MINUTES) + OPENING_RANGE_DELAY
+
+def plan(d):
+    """[(job, start)] for trading day `d`; empty on weekends and holidays."""
+    hours = market_calendar.session(d)
+    if hours is None:
+        return []
+    open_at, close_at = hours
+    steps = [
+        ("premarket", market_calendar.EASTERN.localize(datetime.combine(d, PREMARKET_AT))),
+        ("opening_range", opening_range_ready(open_at)),
+    ]
+    t = open_at
+    while t < close_at:
+        steps.append(("intraday", t))
+        t += QUOTE_INTERVAL
+    return sorted(steps, key=lambda step: step[1])
+
+
+class Scheduler:
+    def __init__(self, jobs=JOBS, lock_path=LOCK_PATH, state_path=STATE_PATH):
+        self.jobs = jobs
+        self.lock_path = lock_path
+        self.state_path = state_path
+        self.state = self.load_state()  # job -> {"date", "at", "ok"}
+        self._stop = threading.Event()
+
+    def load_state(self):
+        # Persisted so restarts and `--once` (cron) runs don't repeat daily jobs
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, "r") as f:
+                raw = json.load(f)
+            return {
+                name: {"date": datetime.fromisoformat(s["at"]).date(),
+                       "at": datetime.fromisoformat(s["at"]), "ok": s["ok"]}
+                for name, s in raw.items()
+            }
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Ignoring unreadable scheduler state {self.state_path}: {e}")
+            return {}
+
+    def save_state(self):
+        if not self.state_path:
+            return
+        cache_manifest.write_json(
+            self.state_path,
+            {name: {"at": s["at"].isoformat(), "ok": s["ok"]} for name, s in self.state.items()},
+            indent=2,
+        )
+
+    def _done_today(self, name, d):
+        s = self.state.get(name)
+        return s is not None and s["date"] == d and s["ok"]
+
+    def _backing_off(self, name, now):
+        s = self.state.get(name)
+        return s is not None and not s["ok"] and now - s["at"] < RETRY_AFTER
+
+    def due(self, now):
+        """Job names to run at `now`, in order."""
+        d = now.date()
+        hours = market_calendar.session(d)
+        if hours is None:
+            return []
+        open_at, close_at = hours
+        if now >= close_at:
+            return []
+
+        due = []
+        premarket_at = market_calendar.EASTERN.localize(datetime.combine(d, PREMARKET_AT))
+        if now >= premarket_at and not self._done_today("premarket", d) and not self._backing_off("premarket", now):
+            due.append("premarket")
+        if now >= opening_range_ready(open_at) and not self._done_today("opening_range", d) \
+                and not self._backing_off("opening_range", now):
+            due.append("opening_range")
+        if now >= open_at and self._done_today("premarket", d):
+            last = self.state.get("intraday")
+            if last is None or last["date"] != d or now - last["at"] >= QUOTE_INTERVAL:
+                due.append("intraday")
+        return due
+
+    @contextmanager
+    def exclusive(self):
+        """Hold the cross-process job lock, or yield False if someone else has it."""
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        with open(self.lock_path, "w") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def run_job(self, name, now):
+        print(f"\n⏰ [{now:%Y-%m-%d %H:%M:%S}] Running {name} job...")
+        ok = False
+        try:
+            with metrics.run(name):
+                self.jobs[name]()
+            ok = True
+            print(f"✅ {name} job complete.")
+        except Exception:
+            traceback.print_exc()
+            print(f"❌ {name} job failed; retrying in {RETRY_AFTER}.")
+        self.state[name] = {"date": now.date(), "at": now, "ok": ok}
+        self.save_state()
+        return ok
+
+    def tick(self, now=None):
+        """Run every job due at `now`, one after another. Returns the names run."""
+        now = (now or market_calendar.now_eastern()).astimezone(market_calendar.EASTERN)
+        ran = []
+        for name in self.due(now):
+            with self.exclusive() as acquired:
+                if not acquired:
+                    print(f"⏭️ Another scheduler holds {self.lock_path}; skipping {name}.")
+                    break
+                self.run_job(name, now)
+                ran.append(name)
+        return ran
+
+    def run_forever(self, poll_seconds=POLL_SECONDS):
+        print("🗓️ Scheduler started — Ctrl+C to stop.")
+        while not self._stop.is_set():
+            self.tick()
+            self._stop.wait(poll_seconds)
+        print("👋 Scheduler stopped.")
+
+    def stop(self, *_):
+        self._stop.set()
+
+
+def print_plan(d):
+    steps = plan(d)
+    if not steps:
+        holiday = market_calendar.holidays(d.year).get(d)
+        print(f"📅 {d}: market closed ({holiday or 'weekend'}) — nothing scheduled.")
+        return
+    intraday = [t for name, t in steps if name == "intraday"]
+    print(f"📅 {d}: session {market_calendar.session(d)[0]:%H:%M}–{market_calendar.session(d)[1]:%H:%M} ET")
+    for name, t in steps:
+        if name != "intraday":
+            print(f"  {t:%H:%M}  {name}")
+    print(f"  {intraday[0]:%H:%M}–{intraday[-1]:%H:%M}  intraday every {int(QUOTE_INTERVAL.total_seconds())}s ({len(intraday)} runs)")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if "--plan" in argv:
+        print_plan(market_calendar.now_eastern().date())
+        return
+    scheduler = Scheduler()
+    if "--once" in argv:
+        scheduler.tick()
+        return
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    signal.signal(signal.SIGINT, scheduler.stop)
+    scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,16 @@
-import json
 import os
-from datetime import datetime
-import pytz
-from tqdm import tqdm
+import numpy as np
+
+from backend import cache_io, snapshots, watchlist_builder
+from backend.signal_registry import BIT_POSITION, entry_mask, has
 
 CACHE_DIR = "backend/cache"
 
 def get_latest_universe_file():
-    files = [
-        os.path.join(CACHE_DIR, f)
-        for f in os.listdir(CACHE_DIR)
-        if f.startswith("universe_enriched_") and f.endswith(".json") and not f.endswith("_scored.json")
-    ]
-    if not files:
+    path = snapshots.find("universe_enriched", CACHE_DIR)
+    if path is None:
         raise FileNotFoundError("No enriched universe files found.")
-    files.sort(key=os.path.getmtime, reverse=True)
-    return files[0]
-
-UNIVERSE_PATH = get_latest_universe_file()
-current_date_str = datetime.now(pytz.timezone("America/New_York")).strftime("%Y-%m-%d")
-OUTPUT_PATH = os.path.join(CACHE_DIR, f"universe_scored_{current_date_str}.json")
+    return path
 
 TIER_1 = {
     "gap_up": 3,
@@ -50,50 +41,132 @@ RISK_FLAGS = {
     "wide_spread": -3,
 }
 
+TIERS = {"T1": TIER_1, "T2": TIER_2, "T3": TIER_3}
+
+# Column order of the signal matrix and the matching weight vector
+SIGNAL_NAMES = [sig for table in (TIER_1, TIER_2, TIER_3, RISK_FLAGS) for sig in table]
+SIGNAL_WEIGHTS = np.array(
+    [{**TIER_1, **TIER_2, **TIER_3, **RISK_FLAGS}[sig] for sig in SIGNAL_NAMES],
+    dtype=np.int64,
+)
+SIGNAL_COLUMN = {sig: j for j, sig in enumerate(SIGNAL_NAMES)}
+SIGNAL_BITS = np.array([BIT_POSITION[sig] for sig in SIGNAL_NAMES], dtype=np.int64)
+TIER_COLUMNS = {
+    tier: np.array([SIGNAL_NAMES.index(sig) for sig in table], dtype=np.int64)
+    for tier, table in TIERS.items()
+}
+
 def load_json(path):
+    # Any cache format; the name is historical
     if not os.path.exists(path):
         return {}
-    with open(path, "r") as f:
-        return json.load(f)
+    return cache_io.read_path(path)
 
 def score(info):
-    signals = info.get("signals", {})
+    mask = entry_mask(info)
     score = 0
     for sig in TIER_1:
-        if signals.get(sig):
+        if has(mask, sig):
             score += TIER_1[sig]
     for sig in TIER_2:
-        if signals.get(sig):
+        if has(mask, sig):
             score += TIER_2[sig]
     for sig in TIER_3:
-        if signals.get(sig):
+        if has(mask, sig):
             score += TIER_3[sig]
     for risk in RISK_FLAGS:
-        if signals.get(risk):
+        if has(mask, risk):
             score += RISK_FLAGS[risk]
     return score
 
 def build_tier_hits(info):
-    signals = info.get("signals", {})
+    mask = entry_mask(info)
+    return {
+        "T1": [sig for sig in TIER_1 if has(mask, sig)],
+        "T2": [sig for sig in TIER_2 if has(mask, sig)],
+        "T3": [sig for sig in TIER_3 if has(mask, sig)],
+    }
+
+def signal_matrix(universe):
+    """Boolean symbols × SIGNAL_NAMES matrix of which signals each symbol hit."""
+    masks = np.fromiter(
+        (entry_mask(info) for info in universe.values()), dtype=np.int64, count=len(universe)
+    )
+    return (masks[:, None] >> SIGNAL_BITS & 1).astype(bool)
+
+def score_matrix(matrix):
+    return matrix.astype(np.int64) @ SIGNAL_WEIGHTS
+
+def tier_hits_matrix(matrix):
+    """Per-symbol {"T1": [...], "T2": [...], "T3": [...]} from masked columns."""
+    # Few distinct hit patterns exist, so encode each row's tier columns as an
+    # integer and build the name lists once per pattern
+    tier_cols = np.concatenate(list(TIER_COLUMNS.values()))
+    codes = matrix[:, tier_cols].astype(np.int64) @ (1 << np.arange(len(tier_cols), dtype=np.int64))
+    patterns = {}
+    for code in np.unique(codes).tolist():
+        bits = [(code >> k) & 1 for k in range(len(tier_cols))]
+        offset = 0
+        pattern = {}
+        for tier, columns in TIER_COLUMNS.items():
+            pattern[tier] = [
+                SIGNAL_NAMES[c] for k, c in enumerate(columns) if bits[offset + k]
+            ]
+            offset += len(columns)
+        patterns[code] = pattern
+    # Symbols with the same pattern share its name lists (nothing mutates
+    # them); only the small per-symbol dict is new
+    return [dict(patterns[code]) for code in codes.tolist()]
+
+def score_universe(universe):
+    """Score every symbol in one pass: signal matrix @ weight vector.
+
+    Adds "score" and "tierHits" to each entry in place and returns the universe.
+    """
+    matrix = signal_matrix(universe)
+    scores = score_matrix(matrix).tolist()
+    hits = tier_hits_matrix(matrix)
+    for info, s, h in zip(universe.values(), scores, hits):
+        info["score"] = s
+        info["tierHits"] = h
+    return universe
+
+SCORE_FIELDS = ("score", "tierHits")
+
+def without_scores(universe):
+    """Shallow copies of the entries minus what score_universe adds (the enriched view)."""
     return {
-        "T1": [sig for sig in TIER_1 if signals.get(sig)],
-        "T2": [sig for sig in TIER_2 if signals.get(sig)],
-        "T3": [sig for sig in TIER_3 if signals.get(sig)],
+        symbol: {k: v for k, v in info.items() if k not in SCORE_FIELDS}
+        for symbol, info in universe.items()
     }
 
+def score_latest(persist=False):
+    """Score the most recent enriched universe on demand (e.g. from the API)."""
+    universe = score_universe(load_json(get_latest_universe_file()))
+    if persist:
+        publish_scored(universe)
+    return universe
+
+def save_scored(universe, snapshot=None):
+    return snapshots.save("universe_scored", universe, source="universe_scored",
+                          snapshot=snapshot, cache_dir=CACHE_DIR)
+
+def publish_scored(universe):
+    """Publish the scored universe with a watchlist built from it, as one snapshot."""
+    with snapshots.SnapshotWriter(CACHE_DIR) as snap:
+        path = save_scored(universe, snapshot=snap)
+        watchlist_builder.save_watchlist(watchlist_builder.build_watchlist(universe), snapshot=snap)
+    return path
+
 def main():
     print("🚀 Starting enrichment and scoring...")
-    universe = load_json(UNIVERSE_PATH)
+    universe = load_json(get_latest_universe_file())
     print(f"📦 Loaded {len(universe)} tickers to enrich")
     print("⚙️ Scoring tickers...")
-    for symbol in tqdm(universe):
-        s = score(universe[symbol])
-        universe[symbol]["score"] = s
-        universe[symbol]["tierHits"] = build_tier_hits(universe[symbol])  # ✅ Add this line!
-
-    with open(OUTPUT_PATH, "w") as f:
-        json.dump(universe, f, indent=2)
-    print(f"✅ Enriched universe saved to {OUTPUT_PATH}")
+    universe = score_universe(universe)
+
+    path = publish_scored(universe)
+    print(f"✅ Scored universe and watchlist saved to {path}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,234 @@
+# backend/sectors.py
+#
+# Canonical sector registry. Sectors are named by GICS (what data/sp500.csv
+# carries) and each has one SPDR sector ETF:
+#   SECTOR_ETFS    ETF -> GICS sector, in ranking tie-break order
+#   canonical()    GICS, Yahoo ("Financial Services", "Healthcare", ...) and
+#                  scraper spellings -> the GICS name
+#   SectorGroups   a universe's symbols grouped by sector (or by any field,
+#                  e.g. gics_sub_industry): one int code per symbol plus the
+#                  member indexes of each group, so per-group values (ETF moves,
+#                  strong / weak ranks, group means) are assigned to every
+#                  member with one array index instead of a per-symbol lookup
+# Sector rotation ranks the ETFs by % change on the day: the top two sectors
+# are strong, the bottom two weak. Sub-industries have no ETFs, so their
+# rotation ranks them by their members' mean % change (group_rotation).
+#
+#   python -m backend.sectors [--sub-industry] [--min-members 3]
+
+import sys
+
+import numpy as np
+
+from backend import cache_io, snapshots
+
+SECTOR_ETFS = {
+    "XLF": "Financials",
+    "XLK": "Information Technology",
+    "XLE": "Energy",
+    "XLV": "Health Care",
+    "XLY": "Consumer Discretionary",
+    "XLI": "Industrials",
+    "XLP": "Consumer Staples",
+    "XLU": "Utilities",
+    "XLRE": "Real Estate",
+    "XLB": "Materials",
+    "XLC": "Communication Services",
+}
+SECTORS = list(SECTOR_ETFS.values())
+ETFS = list(SECTOR_ETFS)
+SECTOR_INDEX = {sector: i for i, sector in enumerate(SECTORS)}
+
+# Other names the same sectors go by (Yahoo Finance, older caches, scrapers)
+ALIASES = {
+    "Financial Services": "Financials",
+    "Financial": "Financials",
+    "Technology": "Information Technology",
+    "Healthcare": "Health Care",
+    "Consumer Cyclical": "Consumer Discretionary",
+    "Consumer Defensive": "Consumer Staples",
+    "Basic Materials": "Materials",
+    "Communication": "Communication Services",
+    "Telecommunication Services": "Communication Services",
+}
+_LOOKUP = {name.lower(): name for name in SECTORS}
+_LOOKUP.update({alias.lower(): name for alias, name in ALIASES.items()})
+
+ROTATION_N = 2
+MIN_GROUP_MEMBERS = 3
+
+
+def canonical(name):
+    """GICS sector name for any known spelling, else None."""
+    if not name or not isinstance(name, str):
+        return None
+    return _LOOKUP.get(name.strip().lower())
+
+
+def etf_for(sector):
+    sector = canonical(sector)
+    return ETFS[SECTOR_INDEX[sector]] if sector else None
+
+
+# --- ETF Moves & Rotation ---
+
+def etf_changes(sector_data):
+    """% change of each sector's ETF (SECTORS order), rounded to 2dp; NaN without a quote."""
+    changes = np.full(len(SECTORS), np.nan)
+    for i, etf in enumerate(ETFS):
+        quote = sector_data.get(etf)
+        if not quote:
+            continue
+        price, prev_close = quote.get("tv_price"), quote.get("prevClose")
+        if price and prev_close:
+            changes[i] = round(((price - prev_close) / prev_close) * 100, 2)
+    return changes
+
+
+def rank(sector_data, n=ROTATION_N):
+    """(top n, bottom n) sector names by ETF % change; ties keep SECTOR_ETFS order."""
+    changes = etf_changes(sector_data)
+    known = np.flatnonzero(~np.isnan(changes))
+    ordered = known[np.argsort(-changes[known], kind="stable")]
+    return [SECTORS[i] for i in ordered[:n]], [SECTORS[i] for i in ordered[-n:]]
+
+
+def rotation_masks(sector_data, n=ROTATION_N):
+    """Per-sector (strong, weak) bool arrays; a sector in both lists counts as strong."""
+    top, bottom = rank(sector_data, n)
+    strong = np.zeros(len(SECTORS), dtype=bool)
+    weak = np.zeros(len(SECTORS), dtype=bool)
+    strong[[SECTOR_INDEX[s] for s in top]] = True
+    weak[[SECTOR_INDEX[s] for s in bottom]] = True
+    return strong, weak & ~strong
+
+
+# --- Groups ---
+
+class SectorGroups:
+    """Symbols grouped by a label: codes[i] is symbol i's group (-1 = none)."""
+
+    def __init__(self, symbols, labels, names=None):
+        self.symbols = list(symbols)
+        self.names = list(names) if names is not None else sorted({l for l in labels if l})
+        index = {name: g for g, name in enumerate(self.names)}
+        self.codes = np.fromiter((index.get(l, -1) for l in labels), dtype=np.int64, count=len(self.symbols))
+        order = np.argsort(self.codes, kind="stable")
+        counts = np.bincount(self.codes[self.codes >= 0], minlength=len(self.names))
+        start = int((self.codes < 0).sum())
+        self.members = np.split(order[start:], np.cumsum(counts)[:-1]) if len(self.names) else []
+        self.counts = counts
+
+    @classmethod
+    def by_sector(cls, universe):
+        """Canonical GICS sector groups, in SECTORS order."""
+        raw = [info.get("sector") for info in universe.values()]
+        names = {s: canonical(s) for s in set(raw)}  # a dozen distinct spellings at most
+        return cls(universe, [names[s] for s in raw], SECTORS)
+
+    @classmethod
+    def by_field(cls, universe, field):
+        return cls(universe, [info.get(field) or None for info in universe.values()])
+
+    def broadcast(self, per_group, fill=np.nan):
+        """Per-symbol array holding each symbol's group value (`fill` outside any group)."""
+        per_group = np.asarray(per_group)
+        out = np.full(len(self.codes), fill, dtype=np.result_type(per_group, np.asarray(fill)))
+        known = self.codes >= 0
+        out[known] = per_group[self.codes[known]]
+        return out
+
+    def members_of(self, name):
+        """Symbols in group `name`."""
+        g = self.names.index(name) if name in self.names else -1
+        return [self.symbols[i] for i in self.members[g]] if g >= 0 else []
+
+    def mean(self, values):
+        """(per-group nan-mean of `values`, per-group count of non-NaN values)."""
+        values = np.asarray(values, dtype=float)
+        ok = (self.codes >= 0) & ~np.isnan(values)
+        counts = np.bincount(self.codes[ok], minlength=len(self.names))
+        sums = np.bincount(self.codes[ok], weights=values[ok], minlength=len(self.names))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return sums / counts, counts
+
+
+def changes_of(universe, field="tv_changePercent"):
+    """Float array of `field` per symbol, NaN where missing."""
+    values = (info.get(field) for info in universe.values())
+    return np.fromiter((np.nan if v is None else v for v in values), dtype=float, count=len(universe))
+
+
+def group_rotation(universe, field="gics_sub_industry", min_members=MIN_GROUP_MEMBERS):
+    """Groups of `field` ranked by their members' mean % change, strongest first.
+
+    Rows: {group, members, mean_change, breadth (share of members up)}; groups
+    with fewer than `min_members` quoted members are left out.
+    """
+    groups = SectorGroups.by_field(universe, field)
+    changes = changes_of(universe)
+    mean, counts = groups.mean(changes)
+    up, _ = groups.mean(np.where(np.isnan(changes), np.nan, (changes > 0).astype(float)))
+    rows = [
+        {"group": name, "members": int(counts[g]), "mean_change": round(float(mean[g]), 2),
+         "breadth": round(float(up[g]), 2)}
+        for g, name in enumerate(groups.names) if counts[g] >= min_members
+    ]
+    return sorted(rows, key=lambda r: r["mean_change"], reverse=True)
+
+
+def sector_rotation(universe, sector_data):
+    """Per sector: ETF % change, its members' mean % change and breadth, strong/weak."""
+    groups = SectorGroups.by_sector(universe)
+    changes = changes_of(universe)
+    mean, counts = groups.mean(changes)
+    up, _ = groups.mean(np.where(np.isnan(changes), np.nan, (changes > 0).astype(float)))
+    etf = etf_changes(sector_data)
+    strong, weak = rotation_masks(sector_data)
+    rows = []
+    for g, name in enumerate(SECTORS):
+        rows.append({
+            "group": name, "etf": ETFS[g], "members": int(groups.counts[g]),
+            "etf_change": None if np.isnan(etf[g]) else float(etf[g]),
+            "mean_change": None if np.isnan(mean[g]) else round(float(mean[g]), 2),
+            "breadth": None if np.isnan(up[g]) else round(float(up[g]), 2),
+            "rotation": "strong" if strong[g] else "weak" if weak[g] else "",
+        })
+    return sorted(rows, key=lambda r: -np.inf if r["etf_change"] is None else r["etf_change"], reverse=True)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    min_members = int(argv[argv.index("--min-members") + 1]) if "--min-members" in argv else MIN_GROUP_MEMBERS
+    path = snapshots.find("universe_enriched")
+    if path is None:
+        print("❌ No enriched universe yet — run the pipeline first.")
+        return 1
+    universe = cache_io.read_path(path)
+    sector_data = cache_io.load("sector_etf_prices")
+
+    def pct(v):
+        return f"{v:>+8.2f}%" if v is not None else f"{'—':>9}"
+
+    if "--sub-industry" in argv:
+        rows = group_rotation(universe, min_members=min_members)
+        if not rows:
+            print("ℹ️ No gics_sub_industry in the universe — rebuild it with backend.signals.universe_builder.")
+            return 1
+        print(f"\n🧭 Sub-industry rotation ({len(rows)} groups with ≥{min_members} quoted members)")
+        print(f"  {'sub-industry':<52}{'n':>4}{'mean':>10}{'breadth':>9}")
+        for r in rows:
+            print(f"  {r['group'][:50]:<52}{r['members']:>4}{pct(r['mean_change'])}{r['breadth']:>9.0%}")
+        return 0
+
+    print(f"\n🧭 Sector rotation ({path})")
+    print(f"  {'sector':<26}{'etf':<6}{'n':>4}{'etf':>10}{'members':>10}{'breadth':>9}")
+    for r in sector_rotation(universe, sector_data):
+        breadth = f"{r['breadth']:>9.0%}" if r["breadth"] is not None else f"{'—':>9}"
+        print(f"  {r['group']:<26}{r['etf']:<6}{r['members']:>4}{pct(r['etf_change'])} {pct(r['mean_change'])}"
+              f"{breadth}  {r['rotation']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
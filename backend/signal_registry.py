@@ -0,0 +1,72 @@
+# backend/signal_registry.py
+#
+# Every boolean signal gets a fixed bit. A symbol's signals are stored as one
+# integer `signal_mask` instead of a dict of string keys.
+# Append new signals at the end — bit positions are persisted in cache files.
+
+SIGNALS = [
+    # Tier 1
+    "gap_up",
+    "gap_down",
+    "break_above_range",
+    "break_below_range",
+    "high_rel_vol",
+    # Tier 2
+    "early_move",
+    "squeeze_watch",
+    "strong_sector",
+    "weak_sector",
+    # Tier 3
+    "near_range_high",
+    "high_volume",
+    "top_volume_gainer",
+    "near_multi_day_high",
+    "near_multi_day_low",
+    "high_volume_no_breakout",
+    # Risk
+    "low_liquidity",
+    "wide_spread",
+]
+
+BIT_POSITION = {name: i for i, name in enumerate(SIGNALS)}
+BITS = {name: 1 << i for i, name in enumerate(SIGNALS)}
+
+
+def mask_of(*names):
+    mask = 0
+    for name in names:
+        mask |= BITS[name]
+    return mask
+
+
+def encode(signals):
+    """Mask from a legacy {name: True} dict or an iterable of names.
+
+    Unknown keys (e.g. the old price/volume copies) are ignored.
+    """
+    if isinstance(signals, dict):
+        signals = [name for name, value in signals.items() if value]
+    mask = 0
+    for name in signals:
+        mask |= BITS.get(name, 0)
+    return mask
+
+
+def decode(mask):
+    """Signal names set in `mask`, in registry order."""
+    return [name for i, name in enumerate(SIGNALS) if mask >> i & 1]
+
+
+def has(mask, name):
+    return bool(mask & BITS[name])
+
+
+def entry_mask(info):
+    """Mask for a universe entry, falling back to a legacy `signals` dict."""
+    if "signal_mask" in info:
+        return info["signal_mask"]
+    return encode(info.get("signals", {}))
+
+
+def set_signal(info, name):
+    info["signal_mask"] = entry_mask(info) | BITS[name]
@@ -0,0 +1 @@
+# backend.signals package
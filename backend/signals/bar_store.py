@@ -0,0 +1,298 @@
+# backend/signals/bar_store.py
+
+import os
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from backend import metrics
+from backend.signals.fetch_engine import FetchEngine
+
+STORE_DIR = os.path.join(os.path.dirname(__file__), "..", "cache", "bars")
+MANIFEST_NAME = "manifest.json"
+
+BACKFILL_PERIOD = "1y"  # first fetch for a new symbol; covers 52w lookbacks
+CHUNK_SIZE = 200
+ADJUSTMENT_RTOL = 1e-4  # a reference close further off than this means the feed was re-adjusted
+
+# One fixed-size record per session, appended to <symbol>.bin
+BAR_DTYPE = np.dtype([
+    ("date", "M8[D]"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+FIELD_NAMES = {"Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}
+
+
+def today_eastern():
+    return np.datetime64(datetime.now(pytz.timezone("America/New_York")).date(), "D")
+
+
+def frame_to_records(frame):
+    """Single-symbol OHLCV frame (yfinance column names) -> BAR_DTYPE array."""
+    frame = frame.dropna(how="all")
+    records = np.zeros(len(frame), dtype=BAR_DTYPE)
+    index = frame.index.tz_localize(None) if frame.index.tz is not None else frame.index
+    records["date"] = index.values.astype("M8[D]")
+    for column, field in FIELD_NAMES.items():
+        records[field] = frame[column].to_numpy(dtype="f8")
+    return records
+
+
+class DailyBarStore:
+    """Append-only per-symbol daily OHLCV files with memory-mapped reads.
+
+    Each symbol lives in `<root>/<symbol>.bin` as packed BAR_DTYPE records
+    sorted by date; `manifest.json` keeps the row count and last stored date
+    per symbol so updates know which days are missing without opening files.
+
+    The provider's bars are split/dividend adjusted, so a corporate action
+    rewrites the whole past. Each update re-fetches one completed stored
+    session as a reference; if it no longer matches, the symbol's full
+    history is downloaded again and the file rewritten on the new basis.
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self.manifest = self._load_manifest()
+
+    # --- Manifest ---
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, "r") as f:
+            return json.load(f)
+
+    def save_manifest(self):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def last_date(self, symbol):
+        entry = self.manifest.get(symbol)
+        return np.datetime64(entry["last_date"], "D") if entry else None
+
+    def stale_symbols(self, symbols, today=None):
+        """Symbols not yet checked against the provider today."""
+        today = str(today or today_eastern())
+        return [s for s in symbols if self.manifest.get(s, {}).get("checked") != today]
+
+    # --- Reads ---
+
+    def path(self, symbol):
+        return os.path.join(self.root, symbol.replace("/", "_") + ".bin")
+
+    def read(self, symbol):
+        """Memory-mapped BAR_DTYPE array for `symbol` (empty if not stored)."""
+        rows = self.manifest.get(symbol, {}).get("rows", 0)
+        if not rows:
+            return np.zeros(0, dtype=BAR_DTYPE)
+        return np.memmap(self.path(symbol), dtype=BAR_DTYPE, mode="r", shape=(rows,))
+
+    def frame(self, symbols, days):
+        """Last `days` sessions as one frame with (field, symbol) columns.
+
+        Same layout as a multi-symbol `yf.download`, so `frame["Volume"]` is a
+        dates × symbols frame.
+        """
+        windows = {}
+        for symbol in symbols:
+            bars = self.read(symbol)[-days:]
+            if len(bars):
+                windows[symbol] = bars
+        if not windows:
+            return pd.DataFrame()
+
+        dates = np.unique(np.concatenate([bars["date"] for bars in windows.values()]))[-days:]
+        names = list(windows)
+        fields = {field: np.full((len(dates), len(names)), np.nan) for field in FIELD_NAMES.values()}
+        for col, bars in enumerate(windows.values()):
+            bars = bars[bars["date"] >= dates[0]]
+            rows = np.searchsorted(dates, bars["date"])
+            for field, values in fields.items():
+                values[rows, col] = bars[field]
+
+        index = pd.DatetimeIndex(dates, name="Date")
+        return pd.concat(
+            {column: pd.DataFrame(fields[field], index=index, columns=names)
+             for column, field in FIELD_NAMES.items()},
+            axis=1,
+        )
+
+    # --- Writes ---
+
+    def append(self, symbol, records):
+        """Append sessions newer than the last stored date.
+
+        A record dated on the last stored session overwrites it in place, so a
+        partial intraday bar is replaced by the completed one on the next run.
+        """
+        if not len(records):
+            return 0
+        records = np.sort(records, order="date")
+        path = self.path(symbol)
+        entry = self.manifest.get(symbol)
+        rows = entry["rows"] if entry else 0
+        last = self.last_date(symbol)
+
+        if last is not None:
+            if records["date"][-1] < last:
+                return 0
+            if records["date"][0] <= last:
+                same = records[records["date"] == last]
+                if len(same):
+                    with open(path, "r+b") as f:
+                        f.seek((rows - 1) * BAR_DTYPE.itemsize)
+                        f.write(same[-1:].tobytes())
+                records = records[records["date"] > last]
+
+        if len(records):
+            with open(path, "ab") as f:
+                f.write(records.tobytes())
+            rows += len(records)
+            last = records["date"][-1]
+
+        entry = self.manifest.setdefault(symbol, {})
+        entry.update({"rows": rows, "last_date": str(last)})
+        return len(records)
+
+    def rewrite(self, symbol, records):
+        """Replace the stored history of `symbol` with `records`."""
+        if not len(records):
+            return 0
+        records = np.sort(records, order="date")
+        path = self.path(symbol)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(records.tobytes())
+        os.replace(tmp_path, path)
+        entry = self.manifest.setdefault(symbol, {})
+        entry.update({"rows": len(records), "last_date": str(records["date"][-1])})
+        return len(records)
+
+    def adjusted(self, symbol, records):
+        """True if a completed stored session in `records` has a different close.
+
+        The last stored session is skipped: it may have been a partial bar.
+        """
+        last = self.last_date(symbol)
+        if last is None:
+            return False
+        stored = self.read(symbol)
+        overlap = records[records["date"] < last]
+        if not len(overlap):
+            return False
+        rows = np.searchsorted(stored["date"], overlap["date"])
+        found = (rows < len(stored)) & (stored["date"][np.minimum(rows, len(stored) - 1)] == overlap["date"])
+        if not found.any():
+            return False
+        old = stored["close"][rows[found]]
+        new = overlap["close"][found]
+        both = ~(np.isnan(old) | np.isnan(new))
+        return not np.allclose(old[both], new[both], rtol=ADJUSTMENT_RTOL, atol=0)
+
+    def fetch_plan(self, symbols, today=None):
+        """Group symbols by the download period that covers their missing days."""
+        today = today or today_eastern()
+        plan = {}
+        for symbol in symbols:
+            last = self.last_date(symbol)
+            if last is None:
+                period = BACKFILL_PERIOD
+            else:
+                # Re-fetch the last stored session (it may have been partial)
+                # and the one before it, a completed bar to detect re-adjustment
+                dates = self.read(symbol)["date"][-2:]
+                period = self._period_since(dates[0], today)
+            plan.setdefault(period, []).append(symbol)
+        return plan
+
+    def rebase_plan(self, symbols, today=None):
+        """Group symbols by the download period that covers their whole stored history."""
+        today = today or today_eastern()
+        plan = {}
+        for symbol in symbols:
+            bars = self.read(symbol)
+            period = self._period_since(bars["date"][0], today) if len(bars) else BACKFILL_PERIOD
+            plan.setdefault(period, []).append(symbol)
+        return plan
+
+    @staticmethod
+    def _period_since(date, today):
+        calendar_days = int((today - date).astype(int)) + 1
+        return f"{max(calendar_days, 1)}d"
+
+    def _download(self, plan, engine, desc):
+        """Yield (symbol, BAR_DTYPE records) for every symbol the plan's downloads returned."""
+        jobs = {}
+        for period, group in plan.items():
+            for i in range(0, len(group), CHUNK_SIZE):
+                jobs[f"{period}:{i}"] = (period, group[i:i + CHUNK_SIZE])
+
+        def fetch_job(provider, job_id):
+            period, chunk = jobs[job_id]
+            frame = provider.download(chunk, period=period)
+            return None if frame.empty else frame
+
+        # Stage metrics count the symbols in each job, not the jobs
+        fetched = engine.run(list(jobs), fetch_job, desc=desc,
+                             sizes={job_id: len(chunk) for job_id, (_, chunk) in jobs.items()})
+        for job_id, error in fetched.errors.items():
+            print(f"⚠️ Daily bar download {job_id} failed: {error}")
+
+        self.failed_jobs = len(fetched.errors)
+        for job_id, frame in fetched.results.items():
+            _, chunk = jobs[job_id]
+            present = set(frame.columns.get_level_values(1))
+            for symbol in chunk:
+                if symbol in present:
+                    yield symbol, frame_to_records(frame.xs(symbol, axis=1, level=1))
+
+    def update(self, symbols, engine=None, today=None):
+        """Fetch only the sessions each symbol is missing and append them.
+
+        Symbols whose reference session no longer matches (a split or
+        dividend re-adjusted the feed) get their full history re-downloaded.
+        """
+        engine = engine or FetchEngine()
+        today = today or today_eastern()
+        plan = self.fetch_plan(symbols, today=today)
+
+        appended = 0
+        rebase = []
+        for symbol, records in self._download(plan, engine, "📥 Updating daily bar store"):
+            if self.adjusted(symbol, records):
+                rebase.append(symbol)
+                continue
+            appended += self.append(symbol, records)
+            if symbol in self.manifest:
+                self.manifest[symbol]["checked"] = str(today)
+        failed_jobs = self.failed_jobs
+
+        rewritten = 0
+        if rebase:
+            print(f"🔁 {len(rebase)} symbols were re-adjusted upstream — re-downloading their history")
+            for symbol, records in self._download(self.rebase_plan(rebase, today=today), engine,
+                                                  "📥 Re-downloading adjusted history"):
+                rewritten += self.rewrite(symbol, records)
+                self.manifest[symbol]["checked"] = str(today)
+            failed_jobs += self.failed_jobs
+
+        self.save_manifest()
+        metrics.add_bytes((appended + rewritten) * BAR_DTYPE.itemsize)
+        return {
+            "periods": {period: len(group) for period, group in plan.items()},
+            "appended_rows": appended,
+            "rebased": rebase,
+            "failed_jobs": failed_jobs,
+        }
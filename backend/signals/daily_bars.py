@@ -0,0 +1,75 @@
+# backend/signals/daily_bars.py
+
+import pandas as pd
+
+from backend import cache_io, cache_manifest
+from backend.signals.bar_store import DailyBarStore
+
+LOOKBACK_DAYS = 10
+
+
+def get_daily_bars(symbols, days=LOOKBACK_DAYS + 1, engine=None, store=None):
+    """Last `days` sessions for `symbols` from the local bar store.
+
+    Symbols the store has not checked today are topped up first (only their
+    missing sessions are downloaded). Returns one frame with (field, symbol)
+    columns, so `bars["Volume"]` is a dates × symbols frame.
+    """
+    store = store or DailyBarStore()
+    stale = store.stale_symbols(symbols)
+    if stale:
+        store.update(stale, engine=engine)
+    return store.frame(symbols, days)
+
+
+# --- Derived Signals ---
+
+def relative_volume(bars, volumes, session, lookback=LOOKBACK_DAYS):
+    """rel_vol = live quote volume / mean volume of the `lookback` sessions before `session`.
+
+    `volumes` ({symbol: volume}) comes from the quotes, so intraday polls see
+    the current session's volume so far even though the store only refreshes
+    its bars once a day. Symbols with fewer than `lookback` prior sessions
+    are dropped.
+    """
+    volume = bars["Volume"]
+    volume = volume[volume.index < pd.Timestamp(session)].iloc[-lookback:]
+    enough = volume.notna().sum() >= lookback
+    avg = volume.mean()
+    live = pd.Series(volumes, dtype="float64").reindex(avg.index)
+    rel_vol = (live / avg.where(avg > 0)).fillna(0)
+    out = pd.DataFrame({"rel_vol": rel_vol.round(2), "avg_volume_10d": avg})
+    return out[enough & avg.notna() & live.notna()]
+
+
+def multi_day_levels(bars, lookback=LOOKBACK_DAYS):
+    """High/low over the `lookback` sessions before today."""
+    window = slice(-(lookback + 1), -1)
+    out = pd.DataFrame({
+        "high": bars["High"].iloc[window].max(),
+        "low": bars["Low"].iloc[window].min(),
+    })
+    return out.dropna()
+
+
+def main(engine=None, symbols=None, force=False):
+    if symbols is None:
+        symbols = cache_io.symbols()
+
+    store = DailyBarStore()
+    todo = list(symbols) if force else store.stale_symbols(symbols)
+    if not todo:
+        print("⏭️ Daily bar store already checked today — skipping.")
+        return
+
+    print(f"📥 Updating daily bar store for {len(todo)}/{len(symbols)} tickers...")
+    stats = store.update(todo, engine=engine)
+    stale = set(store.stale_symbols(symbols))
+    covered = [s for s in symbols if s not in stale]
+    cache_manifest.record("daily_bars", symbols=covered, expected=len(symbols))
+    print(f"✅ Daily bar store updated: {stats['appended_rows']} new rows, "
+          f"download periods {stats['periods']}, {stats['failed_jobs']} failed downloads")
+
+
+if __name__ == "__main__":
+    main()
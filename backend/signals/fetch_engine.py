@@ -0,0 +1,313 @@
+# backend/signals/fetch_engine.py
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import pytz
+from tqdm import tqdm
+
+from backend import market_calendar, metrics, profiling
+
+# --- Config ---
+FETCH_CONCURRENCY = int(os.getenv("SCREENER_FETCH_CONCURRENCY", "8"))
+FETCH_RATE_PER_SEC = float(os.getenv("SCREENER_FETCH_RATE", "10"))
+FETCH_BURST = int(os.getenv("SCREENER_FETCH_BURST", "10"))
+FETCH_RETRIES = int(os.getenv("SCREENER_FETCH_RETRIES", "3"))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+EASTERN = pytz.timezone("America/New_York")
+
+
+# --- Providers ---
+
+class Provider:
+    """Market data source the fetch engine calls into (one symbol per call)."""
+
+    name = "base"
+
+    def history(self, symbol, period, interval="1d", prepost=False):
+        raise NotImplementedError
+
+    def info(self, symbol):
+        raise NotImplementedError
+
+    def download(self, symbols, period, interval="1d"):
+        """Bars for many symbols as one frame with (field, symbol) columns."""
+        import pandas as pd
+
+        frames = {}
+        for symbol in symbols:
+            hist = self.history(symbol, period=period, interval=interval)
+            if not hist.empty:
+                frames[symbol] = hist[["Open", "High", "Low", "Close", "Volume"]]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+
+class YFinanceProvider(Provider):
+    name = "yfinance"
+
+    def download(self, symbols, period, interval="1d"):
+        import yfinance as yf
+        return yf.download(
+            list(symbols), period=period, interval=interval,
+            group_by="column", auto_adjust=True, threads=True, progress=False,
+        )
+
+    def history(self, symbol, period, interval="1d", prepost=False):
+        import yfinance as yf
+        return yf.Ticker(symbol).history(period=period, interval=interval, prepost=prepost)
+
+    def info(self, symbol):
+        import yfinance as yf
+        return yf.Ticker(symbol).info
+
+
+class FakeProvider(Provider):
+    """Offline provider with synthetic, per-symbol deterministic data.
+
+    `latency` (seconds) and `failure_rate` (0-1) simulate a slow or flaky
+    upstream so the engine can be exercised without network access.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _rng(self, symbol, salt=""):
+        return random.Random(f"{self.seed}:{symbol}:{salt}")
+
+    def _simulate(self):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ConnectionError("simulated upstream failure")
+
+    def info(self, symbol):
+        self._simulate()
+        rng = self._rng(symbol, "info")
+        prev_close = round(rng.uniform(5, 500), 2)
+        open_price = round(prev_close * rng.uniform(0.97, 1.03), 2)
+        price = round(open_price * rng.uniform(0.97, 1.03), 2)
+        return {
+            "regularMarketPrice": price,
+            "volume": rng.randint(50_000, 5_000_000),
+            "regularMarketChangePercent": (price - prev_close) / prev_close * 100,
+            "open": open_price,
+            "previousClose": prev_close,
+        }
+
+    def history(self, symbol, period, interval="1d", prepost=False):
+        import pandas as pd
+
+        self._simulate()
+        rng = self._rng(symbol, f"{period}:{interval}")
+        # Bars end at the latest session that has opened, like a real feed
+        today = market_calendar.last_session_date(datetime.now(EASTERN))
+
+        if interval == "1d":
+            days = int(period.rstrip("d")) if period.endswith("d") else 260
+            index = pd.bdate_range(end=today, periods=days, tz=EASTERN)
+            return self._daily_bars(symbol, index)
+        else:
+            step = int(interval.rstrip("m"))
+            start, end = ("04:00", "20:00") if prepost else ("09:30", "16:00")
+            index = pd.date_range(
+                f"{today} {start}", f"{today} {end}",
+                freq=f"{step}min", tz=EASTERN, inclusive="left",
+            )
+
+        price = rng.uniform(5, 500)
+        rows = []
+        for _ in index:
+            open_price = price
+            close = open_price * rng.uniform(0.98, 1.02)
+            rows.append({
+                "Open": open_price,
+                "High": max(open_price, close) * rng.uniform(1.0, 1.01),
+                "Low": min(open_price, close) * rng.uniform(0.99, 1.0),
+                "Close": close,
+                "Volume": rng.randint(10_000, 2_000_000),
+            })
+            price = close
+        return pd.DataFrame(rows, index=index)
+
+    def _daily_bars(self, symbol, index):
+        """Daily bars seeded per session, so every period returns the same bar for a date."""
+        import pandas as pd
+
+        base = self._rng(symbol, "base").uniform(5, 500)
+
+        def close(date):
+            return base * self._rng(symbol, f"1d:{date:%Y-%m-%d}").uniform(0.9, 1.1)
+
+        rows = []
+        prev_close = close(index[0] - pd.offsets.BDay()) if len(index) else base
+        for date in index:
+            rng = self._rng(symbol, f"1d-bar:{date:%Y-%m-%d}")
+            open_price, close_price = prev_close, close(date)
+            rows.append({
+                "Open": open_price,
+                "High": max(open_price, close_price) * rng.uniform(1.0, 1.01),
+                "Low": min(open_price, close_price) * rng.uniform(0.99, 1.0),
+                "Close": close_price,
+                "Volume": rng.randint(10_000, 2_000_000),
+            })
+            prev_close = close_price
+        return pd.DataFrame(rows, index=index)
+
+
+def get_provider(name=None):
+    name = name or os.getenv("SCREENER_PROVIDER", "yfinance")
+    if name == "fake":
+        return FakeProvider()
+    return YFinanceProvider()
+
+
+# --- Rate Limiting ---
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/sec, bursting up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Provider exceptions that mean "slow down / try again", by class name so the
+# optional provider packages don't have to be importable here
+TRANSIENT_ERROR_NAMES = {"YFRateLimitError"}
+
+
+def is_transient(error):
+    """Whether retrying `error` can help: network errors, timeouts, HTTP 429/5xx.
+
+    Bad data (KeyError, ValueError, parse errors) fails the same way on
+    every attempt, so it is not retried.
+    """
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and 100 <= status < 600:
+        return status == 429 or status >= 500
+    if type(error).__name__ in TRANSIENT_ERROR_NAMES:
+        return True
+    # ConnectionError, TimeoutError and the requests/urllib errors are OSErrors
+    return isinstance(error, OSError)
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    # "Full jitter": uniform over [0, min(cap, base * 2^attempt)]
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+# --- Engine ---
+
+class FetchResult:
+    def __init__(self):
+        self.results = {}
+        self.errors = {}
+        self.latencies = {}
+        self.attempts = {}
+        self.elapsed = 0.0
+
+    def summary(self):
+        return (
+            f"{len(self.results)} ok, {len(self.errors)} failed, "
+            f"{sum(self.attempts.values())} calls in {self.elapsed:.1f}s"
+        )
+
+
+class FetchEngine:
+    """Runs one fetch function per symbol on a bounded worker pool.
+
+    Every attempt waits on a shared token bucket, transient failures (see
+    is_transient) are retried with jittered exponential backoff, and whatever
+    still fails is recorded per symbol in `FetchResult.errors` instead of
+    aborting the run.
+    """
+
+    def __init__(self, provider=None, concurrency=None, rate=None, burst=None, retries=None):
+        self.provider = provider or get_provider()
+        self.concurrency = max(1, concurrency or FETCH_CONCURRENCY)
+        self.retries = FETCH_RETRIES if retries is None else retries
+        self.limiter = TokenBucket(
+            FETCH_RATE_PER_SEC if rate is None else rate,
+            FETCH_BURST if burst is None else burst,
+        )
+
+    def _call(self, fn, symbol, result):
+        attempt = 0
+        start = time.perf_counter()
+        try:
+            while True:
+                self.limiter.acquire()
+                attempt += 1
+                try:
+                    return fn(self.provider, symbol)
+                except Exception as e:
+                    if attempt > self.retries or not is_transient(e):
+                        raise
+                    time.sleep(backoff_delay(attempt - 1))
+        finally:
+            result.attempts[symbol] = attempt
+            result.latencies[symbol] = time.perf_counter() - start
+            profiling.record(symbol, f"fetch:{getattr(fn, '__name__', 'fetch')}", start,
+                             result.latencies[symbol], {"attempts": attempt})
+
+    def run(self, symbols, fn, desc="Fetching", progress=True, sizes=None):
+        """Call `fn(provider, symbol)` for every symbol.
+
+        Non-None return values land in `results`; exceptions that survive all
+        retries land in `errors` as strings. For batch jobs, `sizes` maps each
+        job ID to the number of symbols it covers (see metrics.record_fetch).
+        """
+        result = FetchResult()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {pool.submit(self._call, fn, symbol, result): symbol for symbol in symbols}
+            for future in tqdm(as_completed(futures), total=len(futures), desc=desc, disable=not progress):
+                symbol = futures[future]
+                try:
+                    value = future.result()
+                    if value is not None:
+                        result.results[symbol] = value
+                except Exception as e:
+                    result.errors[symbol] = str(e)
+        result.elapsed = time.perf_counter() - start
+        metrics.record_fetch(getattr(fn, "__name__", "fetch"), result, sizes=sizes)
+        profiling.record_fetch(getattr(fn, "__name__", "fetch"), result)
+        return result
+
+
+def fetch_all(symbols, fn, desc="Fetching", provider=None, **engine_kwargs):
+    return FetchEngine(provider=provider, **engine_kwargs).run(symbols, fn, desc=desc)
@@ -1,45 +1,44 @@
-import os
-import json
-import yfinance as yf
 from datetime import datetime
-from tqdm import tqdm  # ✅ Add this
 
-CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "cache")
-os.makedirs(CACHE_DIR, exist_ok=True)
+from backend import cache_io, cache_manifest
+from backend.signals.daily_bars import LOOKBACK_DAYS, get_daily_bars, multi_day_levels
 
-UNIVERSE_PATH = os.path.join(CACHE_DIR, "universe_cache.json")
-OUTPUT_PATH = os.path.join(CACHE_DIR, "multi_day_levels.json")
+OUTPUT_NAME = "multi_day_levels"
 
-LOOKBACK_DAYS = 10
+def main(engine=None, symbols=None, force=False):
+    if symbols is None:
+        symbols = cache_io.symbols()
+    todo = list(symbols) if force else cache_manifest.stale_symbols("multi_day_levels", symbols)
+    if not todo:
+        print("⏭️ multi_day_levels is fresh — skipping.")
+        return
 
-def main():
-    with open(UNIVERSE_PATH, "r") as f:
-        universe = json.load(f)
-    tickers = list(universe.keys())
+    print(f"📡 Computing {LOOKBACK_DAYS}-day highs/lows for {len(todo)}/{len(symbols)} tickers...")
 
-    levels = {}
+    bars = get_daily_bars(todo, engine=engine)
+    table = multi_day_levels(bars) if not bars.empty else None
+    timestamp = datetime.now().isoformat()
 
-    print(f"📡 Fetching {LOOKBACK_DAYS}-day highs/lows for {len(tickers)} tickers...")
-
-    for symbol in tqdm(tickers, desc="🔄 Processing"):
-        try:
-            hist = yf.Ticker(symbol).history(period=f"{LOOKBACK_DAYS + 1}d")
-            if not hist.empty:
-                high = hist["High"][:-1].max()
-                low = hist["Low"][:-1].min()
-                levels[symbol] = {
-                    "high": round(high, 2),
-                    "low": round(low, 2),
-                    "days": LOOKBACK_DAYS,
-                    "timestamp": datetime.now().isoformat()
-                }
-        except Exception as e:
-            levels[symbol] = {"error": str(e)}
-
-    with open(OUTPUT_PATH, "w") as f:
-        json.dump(levels, f, indent=2)
-
-    print(f"✅ Multi-day levels saved to: {OUTPUT_PATH}")
+    levels = {}
+    for symbol in todo:
+        if table is None or symbol not in table.index:
+            levels[symbol] = {"error": "no daily bars"}
+            continue
+        row = table.loc[symbol]
+        levels[symbol] = {
+            "high": round(float(row["high"]), 2),
+            "low": round(float(row["low"]), 2),
+            "days": LOOKBACK_DAYS,
+            "timestamp": timestamp
+        }
+
+    partial = len(todo) < len(symbols)
+    levels = cache_manifest.merge_partial(OUTPUT_NAME, levels, symbols, partial=partial)
+    path = cache_io.save(OUTPUT_NAME, levels)
+    covered = [s for s, v in levels.items() if "error" not in v]
+    cache_manifest.record("multi_day_levels", symbols=covered, expected=len(symbols), partial=partial)
+
+    print(f"✅ Multi-day levels saved to: {path}")
 
 if __name__ == "__main__":
     main()
@@ -1,20 +1,24 @@
 
 import requests
 from bs4 import BeautifulSoup
-import json
-from pathlib import Path
+
+from backend import cache_io, cache_manifest
 
 BASE_URLS = [
     "https://www.highshortinterest.com/all/1",
     "https://www.highshortinterest.com/all/2"
 ]
 
-OUTPUT_PATH = "backend/cache/short_interest.json"
+OUTPUT_NAME = "short_interest"
 
 def is_valid_ticker(ticker):
     return ticker.isalpha() and 1 <= len(ticker) <= 5 and ticker.isupper()
 
-def fetch_high_short_interest():
+def fetch_high_short_interest(force=False):
+    if not force and cache_manifest.is_fresh("short_interest"):
+        print("⏭️ short_interest is fresh (weekly) — skipping.")
+        return
+
     data = {}
     for url in BASE_URLS:
         print(f"🔍 Fetching: {url}")
@@ -44,12 +48,17 @@ def fetch_high_short_interest():
                 except ValueError:
                     continue
 
+    if not data:
+        # Both pages failed or changed layout: keep the previous artifact and
+        # leave the manifest alone, so the next run tries again
+        print("⚠️ No short interest data scraped — keeping the previous cache.")
+        return
+
     sorted_data = dict(sorted(data.items()))
 
-    Path("backend/cache").mkdir(parents=True, exist_ok=True)
-    with open(OUTPUT_PATH, "w") as f:
-        json.dump(sorted_data, f, indent=2)
-    print(f"✅ Saved short interest data for {len(sorted_data)} valid tickers to {OUTPUT_PATH}")
+    path = cache_io.save(OUTPUT_NAME, sorted_data)
+    cache_manifest.record("short_interest", symbols=sorted_data)
+    print(f"✅ Saved short interest data for {len(sorted_data)} valid tickers to {path}")
 
 if __name__ == "__main__":
     fetch_high_short_interest()
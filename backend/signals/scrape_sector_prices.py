@@ -1,27 +1,18 @@
-import json
-import os
 import yfinance as yf
 
-# Sector ETF symbols mapped to sector names
-SECTOR_ETFS = {
-    "XLF": "Financials",
-    "XLK": "Technology",
-    "XLE": "Energy",
-    "XLV": "Healthcare",
-    "XLY": "Consumer Discretionary",
-    "XLI": "Industrials",
-    "XLP": "Consumer Staples",
-    "XLU": "Utilities",
-    "XLRE": "Real Estate",
-    "XLB": "Materials",
-    "XLC": "Communication Services"
-}
+from backend import cache_io, cache_manifest
+from backend.sectors import SECTOR_ETFS
 
-CACHE_PATH = "backend/cache/sector_etf_prices.json"
+OUTPUT_NAME = "sector_etf_prices"
+
+def fetch_sector_prices(force=False):
+    todo = list(SECTOR_ETFS) if force else cache_manifest.stale_symbols("sector_etf_prices", SECTOR_ETFS)
+    if not todo:
+        print("⏭️ sector_etf_prices is fresh — skipping.")
+        return
 
-def fetch_sector_prices():
     data = {}
-    for symbol in SECTOR_ETFS:
+    for symbol in todo:
         try:
             ticker = yf.Ticker(symbol)
             info = ticker.info
@@ -39,10 +30,11 @@ def fetch_sector_prices():
         except Exception as e:
             print(f"❌ Failed to fetch {symbol}: {e}")
 
-    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
-    with open(CACHE_PATH, "w") as f:
-        json.dump(data, f, indent=2)
-    print(f"📦 Sector ETF data saved to {CACHE_PATH}")
+    partial = len(todo) < len(SECTOR_ETFS)
+    data = cache_manifest.merge_partial(OUTPUT_NAME, data, SECTOR_ETFS, partial=partial)
+    path = cache_io.save(OUTPUT_NAME, data)
+    cache_manifest.record("sector_etf_prices", symbols=data, expected=len(SECTOR_ETFS), partial=partial)
+    print(f"📦 Sector ETF data saved to {path}")
 
 if __name__ == "__main__":
     fetch_sector_prices()
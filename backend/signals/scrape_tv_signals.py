@@ -1,63 +1,63 @@
-import json
-import os
 from datetime import datetime
 from tqdm import tqdm
-import yfinance as yf
-
-# --- Paths ---
-CACHE_DIR = os.path.join(os.path.dirname(__file__), "../cache")
-TV_OUTPUT = os.path.join(CACHE_DIR, "tv_signals.json")
-UNIVERSE_PATH = os.path.join(CACHE_DIR, "universe_cache.json")
-
-# --- Load Universe ---
-with open(UNIVERSE_PATH, "r") as f:
-    universe = json.load(f)
-
-symbols = list(universe.keys())
-
-# --- Fetch Data ---
-print(f"\U0001F4F0 Fetching combined TV-style + YF enrichment data for {len(symbols)} tickers...")
-
-batch = yf.Tickers(" ".join(symbols))
-tv_data = {}
-
-for symbol in tqdm(symbols, desc="\U0001F4F0 Scraping TV signals"):
-    try:
-        ticker = batch.tickers.get(symbol)
-        if not ticker:
-            continue
-
-        info = ticker.info
-        hist = ticker.history(period="11d")
-
-        rel_vol = None
-        avg_volume_10d = None
-        if len(hist) >= 10:
-            past_volumes = hist['Volume'][:-1]
-            avg_volume_10d = past_volumes.mean()
-            today_volume = hist['Volume'].iloc[-1]
-            rel_vol = today_volume / avg_volume_10d if avg_volume_10d > 0 else 0
-
-        tv_data[symbol] = {
-            "price": info.get("regularMarketPrice"),
-            "volume": info.get("volume"),
-            "changePercent": info.get("regularMarketChangePercent"),
-            "open": info.get("open"),
-            "prevClose": info.get("previousClose"),
-            "timestamp": datetime.now().isoformat()
-        }
-
-        if rel_vol is not None:
-            tv_data[symbol]["rel_vol"] = round(rel_vol, 2)
-        if avg_volume_10d is not None:
-            tv_data[symbol]["avg_volume_10d"] = int(avg_volume_10d)
-
-    except Exception as e:
-        tqdm.write(f"⚠️ Failed for {symbol}: {e}")
-
-# --- Save Output ---
-os.makedirs(CACHE_DIR, exist_ok=True)
-with open(TV_OUTPUT, "w") as f:
-    json.dump(tv_data, f, indent=2)
-
-print(f"✅ TV-style + YF enrichment signals saved to {TV_OUTPUT} with {len(tv_data)} entries.")
+
+from backend import cache_io, cache_manifest, market_calendar
+from backend.signals.daily_bars import get_daily_bars, relative_volume
+from backend.signals.fetch_engine import FetchEngine
+
+# --- Cache Artifacts ---
+TV_OUTPUT = "tv_signals"
+
+def fetch_tv_signal(provider, symbol):
+    info = provider.info(symbol)
+    return {
+        "price": info.get("regularMarketPrice"),
+        "volume": info.get("volume"),
+        "changePercent": info.get("regularMarketChangePercent"),
+        "open": info.get("open"),
+        "prevClose": info.get("previousClose"),
+        "timestamp": datetime.now().isoformat()
+    }
+
+def main(engine=None, symbols=None, force=False):
+    # --- Load Universe ---
+    if symbols is None:
+        symbols = cache_io.symbols()
+
+    todo = list(symbols) if force else cache_manifest.stale_symbols("tv_signals", symbols)
+    if not todo:
+        print("⏭️ tv_signals is fresh — skipping.")
+        return
+
+    # --- Fetch Data ---
+    print(f"\U0001F4F0 Fetching combined TV-style + YF enrichment data for {len(todo)}/{len(symbols)} tickers...")
+
+    engine = engine or FetchEngine()
+    fetched = engine.run(todo, fetch_tv_signal, desc="\U0001F4F0 Scraping TV signals")
+    for symbol, error in fetched.errors.items():
+        tqdm.write(f"⚠️ Failed for {symbol}: {error}")
+
+    # avg_volume_10d comes from the shared daily bars (sessions before the
+    # current one); rel_vol divides the live quote volume by it
+    bars = get_daily_bars(todo, engine=engine)
+    volumes = {symbol: entry["volume"] for symbol, entry in fetched.results.items() if entry.get("volume") is not None}
+    session = market_calendar.last_session_date()
+    rel_vols = relative_volume(bars, volumes, session) if not bars.empty else None
+
+    for symbol, entry in fetched.results.items():
+        if rel_vols is not None and symbol in rel_vols.index:
+            entry["rel_vol"] = float(rel_vols.at[symbol, "rel_vol"])
+            entry["avg_volume_10d"] = int(rel_vols.at[symbol, "avg_volume_10d"])
+
+    # Partial refresh keeps still-fresh entries; output stays in universe order
+    partial = len(todo) < len(symbols)
+    tv_data = cache_manifest.merge_partial(TV_OUTPUT, fetched.results, symbols, partial=partial)
+
+    # --- Save Output ---
+    path = cache_io.save(TV_OUTPUT, tv_data)
+    cache_manifest.record("tv_signals", symbols=tv_data, expected=len(symbols), partial=partial)
+
+    print(f"✅ TV-style + YF enrichment signals saved to {path} with {len(tv_data)} entries ({fetched.summary()}).")
+
+if __name__ == "__main__":
+    main()
@@ -1,68 +1,87 @@
-# scrape_candles_5m.py (optimized + rounded)
+# scrape_candles_5m.py (opening-range window, compact arrays)
 
 import os
-import json
-import yfinance as yf
-from datetime import datetime, timedelta
+import pandas as pd
 import pytz
-from tqdm import tqdm
-
-CACHE_DIR = "backend/cache"
-UNIVERSE_PATH = os.path.join(CACHE_DIR, "universe_cache.json")
-OUTPUT_PATH = os.path.join(CACHE_DIR, "candles_5m.json")
-
-def load_universe(path):
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Universe file not found: {path}")
-    with open(path, "r") as f:
-        return json.load(f)
-
-def main():
-    print("\U0001F680 Fetching EXACT 9:30–9:40 5m candles...")
-
-    est = pytz.timezone("America/New_York")
-    now = datetime.now(est)
-
-    # Fallback to previous weekday if weekend
-    if now.weekday() >= 5:  # Saturday/Sunday
-        offset = (now.weekday() - 4) % 7
-        now -= timedelta(days=offset)
-
-    universe = load_universe(UNIVERSE_PATH)
-    tickers = list(universe.keys())
-
-    result = {}
-
-    for symbol in tqdm(tickers, desc="Scraping 5m candles"):
-        try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="1d", interval="5m", prepost=True)
-            if hist.empty:
-                continue
-
-            candles = []
-            for idx, row in hist.iterrows():
-                ts = idx.tz_convert('America/New_York').strftime("%H:%M:%S")
-                if ts.endswith(":30:00") or ts.endswith(":35:00") or ts.endswith(":40:00"):
-                    candles.append({
-                        "timestamp": idx.tz_convert('America/New_York').strftime("%Y-%m-%d %H:%M:%S"),
-                        "open": round(row["Open"], 2),
-                        "high": round(row["High"], 2),
-                        "low": round(row["Low"], 2),
-                        "close": round(row["Close"], 2),
-                        "volume": int(row["Volume"])
-                    })
-
-            if candles:
-                result[symbol] = candles
-
-        except Exception as e:
-            print(f"⚠️ Failed {symbol}: {e}")
-
-    with open(OUTPUT_PATH, "w") as f:
-        json.dump(result, f, indent=2)
-
-    print(f"✅ Candles saved to {OUTPUT_PATH}")
+
+from backend import cache_io, cache_manifest, market_calendar
+from backend.signals.fetch_engine import FetchEngine
+
+OUTPUT_NAME = "candles_5m"
+
+EASTERN = pytz.timezone("America/New_York")
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+INTERVAL_MINUTES = 5
+OPENING_RANGE_MINUTES = int(os.getenv("SCREENER_OPENING_RANGE_MINUTES", "10"))
+
+def extract_opening_range(hist, minutes=OPENING_RANGE_MINUTES):
+    """Slice the bars that make up the opening range of the latest session.
+
+    Keeps bars starting in [09:30, 09:30 + minutes) ET — for the default 10
+    minutes that's the 9:30 and 9:35 bars, which cover 9:30–9:40. Returns
+    compact column arrays, or None if the window has no bars.
+    """
+    if hist.empty:
+        return None
+    hist = hist.tz_convert(EASTERN)
+    session_open = hist.index[-1].normalize() + SESSION_OPEN
+    start, end = hist.index.searchsorted([session_open, session_open + pd.Timedelta(minutes=minutes)])
+    window = hist.iloc[start:end]
+    if window.empty:
+        return None
+
+    return {
+        "date": session_open.strftime("%Y-%m-%d"),
+        "interval": INTERVAL_MINUTES,
+        "time": window.index.strftime("%H:%M").tolist(),
+        "open": window["Open"].round(2).tolist(),
+        "high": window["High"].round(2).tolist(),
+        "low": window["Low"].round(2).tolist(),
+        "close": window["Close"].round(2).tolist(),
+        "volume": window["Volume"].astype("int64").tolist(),
+    }
+
+def fetch_candles(provider, symbol, minutes=OPENING_RANGE_MINUTES):
+    # Regular session only: pre/post-market bars never fall in the window
+    hist = provider.history(symbol, period="1d", interval=f"{INTERVAL_MINUTES}m", prepost=False)
+    return extract_opening_range(hist, minutes=minutes)
+
+def main(engine=None, minutes=OPENING_RANGE_MINUTES, symbols=None, force=False):
+    print(f"\U0001F680 Fetching 5m candles for the first {minutes} minutes after 9:30...")
+
+    # Latest session whose opening range is complete — skips weekends and
+    # exchange holidays, and means "yesterday" until 9:30 + minutes today
+    session_date = market_calendar.last_session_date(after=pd.Timedelta(minutes=minutes))
+    print(f"📅 Opening range session: {session_date}")
+
+    if symbols is None:
+        symbols = cache_io.symbols()
+    tickers = list(symbols) if force else cache_manifest.stale_symbols("candles_5m", symbols)
+    if not tickers:
+        print("⏭️ candles_5m is fresh — skipping.")
+        return
+
+    # Named rather than a lambda: the fetch metrics and profiles label it by name
+    def fetch_candles_5m(provider, symbol):
+        return fetch_candles(provider, symbol, minutes=minutes)
+
+    engine = engine or FetchEngine()
+    fetched = engine.run(tickers, fetch_candles_5m, desc="Scraping 5m candles")
+    for symbol, error in fetched.errors.items():
+        print(f"⚠️ Failed {symbol}: {error}")
+    stale = [s for s, c in fetched.results.items() if c["date"] != str(session_date)]
+    if stale:
+        print(f"⚠️ {len(stale)} tickers returned a different session than {session_date}, dropped")
+        for symbol in stale:
+            del fetched.results[symbol]
+
+    partial = len(tickers) < len(symbols)
+    result = cache_manifest.merge_partial(OUTPUT_NAME, fetched.results, symbols, partial=partial)
+
+    path = cache_io.save(OUTPUT_NAME, result)
+    cache_manifest.record("candles_5m", symbols=result, expected=len(symbols), partial=partial)
+
+    print(f"✅ Candles saved to {path} ({fetched.summary()})")
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,214 @@
-import os, json
+# backend/signals/universe_builder.py
+#
+# Builds the base universe (cache artifact universe_cache) from the index
+# membership CSVs in data/:
+#   - every INDEX_FILES list that exists is parsed and merged; a symbol on
+#     several lists is kept once, with all of their names in "sources"
+#   - symbols are normalized to the dash form the providers use (BRK.B → BRK-B)
+#   - GICS sector / sub-industry come from the lists that carry them
+#     (sp500.csv); "sector" is the registry name (backend/sectors.py), which
+#     older caches' Yahoo-style names are mapped onto
+#   - levels: L0 anchors, L1 Dow 30 members and sector ETFs, L2 everything else
+# The SHA-256 of each CSV is stored in cache/universe_sources.json and the
+# rebuild is skipped while none of them (nor the rules here) changed. Each CSV
+# is read in one csv pass, so a Russell 3000-sized list adds milliseconds.
+#
+#   python -m backend.signals.universe_builder [--force]
+
+import csv
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+
+import pytz
+
+from backend import cache_io, cache_manifest, sectors
+
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+CACHE_DIR = "backend/cache"
+OUTPUT_NAME = "universe_cache"
+STATE_NAME = "universe_sources.json"
+BUILD_VERSION = 2  # bump when the build logic changes, to force one rebuild
+
+EASTERN = pytz.timezone("America/New_York")
+
+# source name -> CSV in data/; lists that aren't there are skipped
+INDEX_FILES = {
+    "sp500": "sp500.csv",
+    "nasdaq100": "nasdaq100.csv",
+    "dow30": "dow30.csv",
+    "russell2000": "russell2000.csv",
+}
+
+ANCHORS = ["SPY", "QQQ", "AAPL", "MSFT", "NVDA", "TSLA", "GME"]
+ETFS = ["XLK", "XLF", "XLE"]
+L1_SOURCES = {"dow30", "etf"}
+
+SYMBOL_COLUMNS = ("Symbol", "Ticker")
+NAME_COLUMNS = ("Security", "Name", "Company")
+SECTOR_COLUMN = "GICS Sector"
+SUB_INDUSTRY_COLUMN = "GICS Sub-Industry"
 
 def load_latest_universe():
-    path = os.path.join(os.path.dirname(__file__), "cache", "universe_cache.json")
-    if not os.path.exists(path):
-        raise FileNotFoundError("⚠️ universe_cache.json not found.")
-    with open(path, "r") as f:
-        return json.load(f)
+    return cache_io.load_required("universe_cache")
+
+
+def normalize_symbol(raw):
+    """Canonical ticker ("brk.b" / "BRK/B" → "BRK-B"), or None for blanks and junk rows."""
+    symbol = raw.strip().upper().lstrip("$").replace(".", "-").replace("/", "-").replace(" ", "-")
+    if not symbol or not symbol[0].isalnum() or not symbol.replace("-", "").isalnum():
+        return None
+    return symbol
+
+
+# --- CSV Parsing ---
+
+def _column(header, names):
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+
+def read_index(path):
+    """{symbol: {"name", "gics_sector", "gics_sub_industry"}} in file order."""
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        symbol_col = _column(header, SYMBOL_COLUMNS)
+        if symbol_col is None:
+            raise ValueError(f"{path}: no {' / '.join(SYMBOL_COLUMNS)} column")
+        name_col = _column(header, NAME_COLUMNS)
+        sector_col = _column(header, [SECTOR_COLUMN])
+        sub_col = _column(header, [SUB_INDUSTRY_COLUMN])
+
+        def cell(row, col):
+            return (row[col].strip() or None) if col is not None and col < len(row) else None
+
+        rows = {}
+        for row in reader:
+            symbol = normalize_symbol(row[symbol_col]) if symbol_col < len(row) else None
+            if symbol is None or symbol in rows:
+                continue
+            rows[symbol] = {
+                "name": cell(row, name_col),
+                "gics_sector": cell(row, sector_col),
+                "gics_sub_industry": cell(row, sub_col),
+            }
+    return rows
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def index_paths(data_dir=DATA_DIR):
+    paths = {source: os.path.join(data_dir, fname) for source, fname in INDEX_FILES.items()}
+    return {source: path for source, path in paths.items() if os.path.exists(path)}
+
+
+def rules_hash():
+    rules = [BUILD_VERSION, ANCHORS, ETFS, sorted(L1_SOURCES), sectors.SECTOR_ETFS, sectors.ALIASES]
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode()).hexdigest()
+
+
+# --- Build ---
+
+def build_universe(lists, previous_sectors=None):
+    """Merge {source: read_index() rows} into universe entries, sorted by symbol.
+
+    `previous_sectors` ({symbol: sector}) fills in the sector of symbols no
+    list has GICS data for (e.g. Nasdaq-100-only names).
+    """
+    previous_sectors = previous_sectors or {}
+    lists = {**lists, "anchor": dict.fromkeys(ANCHORS, {}), "etf": dict.fromkeys(ETFS, {})}
+    merged = {}
+    for source, rows in lists.items():
+        for symbol, row in rows.items():
+            entry = merged.setdefault(symbol, {"sources": [], "name": None,
+                                               "gics_sector": None, "gics_sub_industry": None})
+            entry["sources"].append(source)
+            for key, value in row.items():
+                if entry[key] is None:
+                    entry[key] = value
+
+    universe = {}
+    for symbol in sorted(merged):
+        entry = merged[symbol]
+        sources = entry["sources"]
+        if "anchor" in sources:
+            level = "L0"
+        elif L1_SOURCES.intersection(sources):
+            level = "L1"
+        else:
+            level = "L2"
+        sector = sectors.canonical(entry["gics_sector"]) or sectors.SECTOR_ETFS.get(symbol) \
+            or sectors.canonical(previous_sectors.get(symbol))
+        universe[symbol] = {
+            "sources": sources,
+            "level": level,
+            "name": entry["name"],
+            "sector": sector,
+            "gics_sector": entry["gics_sector"],
+            "gics_sub_industry": entry["gics_sub_industry"],
+            "tv_price": None,
+            "tv_volume": None,
+            "tv_changePercent": None,
+        }
+    return universe
+
+
+def _previous_sectors(cache_dir):
+    """{symbol: sector} of the current universe_cache (keys normalized)."""
+    previous = cache_io.load(OUTPUT_NAME, default={}, fields=["sector"], cache_dir=cache_dir)
+    return {normalize_symbol(symbol): info.get("sector") for symbol, info in previous.items()}
+
+
+def load_state(cache_dir=CACHE_DIR):
+    try:
+        with open(os.path.join(cache_dir, STATE_NAME), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build(force=False, data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    """Rebuild universe_cache from the index CSVs unless their hashes are unchanged.
+
+    Returns {"built", "symbols", "added", "removed", "path"}.
+    """
+    paths = index_paths(data_dir)
+    if not paths:
+        raise FileNotFoundError(f"No index CSVs ({', '.join(INDEX_FILES.values())}) in {data_dir}")
+    hashes = {source: file_hash(path) for source, path in paths.items()}
+    rules = rules_hash()
+
+    state = load_state(cache_dir)
+    if not force and state.get("sources") == hashes and state.get("rules") == rules \
+            and cache_io.exists(OUTPUT_NAME, cache_dir):
+        print(f"⏭️ Universe is up to date ({state.get('symbols')} symbols, index CSVs unchanged) — skipping.")
+        return {"built": False, "symbols": state.get("symbols"), "added": [], "removed": [],
+                "path": cache_io.find(OUTPUT_NAME, cache_dir)}
+
+    previous = _previous_sectors(cache_dir)
+    universe = build_universe({source: read_index(path) for source, path in paths.items()}, previous)
+    path = cache_io.save(OUTPUT_NAME, universe, cache_dir=cache_dir)
+    cache_manifest.write_json(os.path.join(cache_dir, STATE_NAME), {
+        "built_at": datetime.now(EASTERN).isoformat(),
+        "symbols": len(universe),
+        "sources": hashes,
+        "rules": rules,
+    }, indent=2)
+
+    added = sorted(set(universe) - set(previous))
+    removed = sorted(set(previous) - set(universe))
+    print(f"🌐 Universe built: {len(universe)} symbols from {', '.join(paths)} "
+          f"(+{len(added)} / -{len(removed)}) → {path}")
+    return {"built": True, "symbols": len(universe), "added": added, "removed": removed, "path": path}
+
+
+if __name__ == "__main__":
+    build(force="--force" in sys.argv)
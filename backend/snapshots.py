@@ -0,0 +1,343 @@
+# backend/snapshots.py
+#
+# Every pipeline publish lands in its own immutable snapshot directory:
+#
+#   cache/snapshots/<id>/          universe_enriched, universe_scored,
+#                                  autowatchlist_cache + the exact inputs
+#                                  they were built from (hard links)
+#   cache/snapshots/current.json   {"id": ...} of the snapshot readers use
+#
+# A snapshot is staged in a hidden temp directory, renamed into place in one
+# step, and only then does the pointer move (temp file + rename). Readers
+# resolve the pointer once and read everything from that directory, so they
+# never see a half-written file or outputs from two different runs.
+# Outputs a run doesn't write are carried over from the current snapshot,
+# except those downstream (in OUTPUTS order) of one it replaced: publishing a
+# fresh universe_enriched alone drops the old universe_scored and watchlist.
+# Publishers hold an exclusive flock on snapshots/.lock from carry-over to
+# the pointer swap, so concurrent publishes queue instead of dropping each
+# other's outputs.
+# Cleanup is a listing of snapshot IDs: keep the newest SCREENER_SNAPSHOT_KEEP
+# (default 5), drop any older than SCREENER_SNAPSHOT_MAX_AGE_DAYS (default 7),
+# never the current one. SCREENER_SNAPSHOT_KEEP_DAILY=N additionally keeps the
+# last snapshot of each of the newest N sessions, for backtests (backtest.py).
+
+import fcntl
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import pytz
+
+from backend import cache_io, cache_manifest, market_calendar
+
+CACHE_DIR = "backend/cache"
+SNAPSHOT_DIRNAME = "snapshots"
+POINTER_NAME = "current.json"
+META_NAME = "snapshot.json"
+STAGING_PREFIX = ".staging-"
+LOCK_NAME = ".lock"
+
+KEEP = int(os.getenv("SCREENER_SNAPSHOT_KEEP", "5"))
+MAX_AGE_DAYS = float(os.getenv("SCREENER_SNAPSHOT_MAX_AGE_DAYS", "7"))
+KEEP_DAILY = int(os.getenv("SCREENER_SNAPSHOT_KEEP_DAILY", "0"))
+STAGING_MAX_AGE = 3600  # abandoned staging dirs (crashed writers)
+
+OUTPUTS = ["universe_enriched", "universe_scored", "autowatchlist_cache"]
+
+EASTERN = pytz.timezone("America/New_York")
+
+
+def snapshot_root(cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, SNAPSHOT_DIRNAME)
+
+
+def new_id():
+    # Sorts chronologically; the pid keeps concurrent writers apart
+    return f"{datetime.now(EASTERN):%Y%m%dT%H%M%S%f}-{os.getpid()}"
+
+
+# --- Reading ---
+
+def current_id(cache_dir=CACHE_DIR):
+    try:
+        with open(os.path.join(snapshot_root(cache_dir), POINTER_NAME), "r") as f:
+            return json.load(f)["id"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def current_dir(cache_dir=CACHE_DIR):
+    snapshot_id = current_id(cache_dir)
+    if snapshot_id is None:
+        return None
+    path = os.path.join(snapshot_root(cache_dir), snapshot_id)
+    return path if os.path.isdir(path) else None
+
+
+def locate(name, cache_dir=CACHE_DIR):
+    """(artifact name, directory) to read `name` from, or (None, cache_dir).
+
+    The current snapshot wins; caches written before snapshots existed
+    (e.g. dated universe_scored_YYYY-MM-DD files in the cache root) are the
+    fallback.
+    """
+    snap = current_dir(cache_dir)
+    if snap is not None and cache_io.exists(name, snap):
+        return name, snap
+    return cache_io.latest(name, cache_dir), cache_dir
+
+
+def find(name, cache_dir=CACHE_DIR):
+    """Path of artifact `name` in the current snapshot (or legacy cache), or None."""
+    found, directory = locate(name, cache_dir)
+    return cache_io.find(found, directory) if found else None
+
+
+def version(name, cache_dir=CACHE_DIR):
+    found, directory = locate(name, cache_dir)
+    return cache_io.version(found, directory) if found else None
+
+
+def list_ids(cache_dir=CACHE_DIR):
+    root = snapshot_root(cache_dir)
+    if not os.path.isdir(root):
+        return []
+    return sorted(d for d in os.listdir(root)
+                  if not d.startswith(".") and os.path.isdir(os.path.join(root, d)))
+
+
+def published_at(snapshot_id):
+    """ET time a snapshot was published (IDs start with its timestamp)."""
+    return EASTERN.localize(datetime.strptime(snapshot_id.split("-")[0], "%Y%m%dT%H%M%S%f"))
+
+
+def session_date(snapshot_id):
+    """Trading session a snapshot belongs to: the latest one opened by its publish time.
+
+    A weekend, holiday or premarket publish belongs to the previous session,
+    whose close is the last price its data could have seen.
+    """
+    return market_calendar.last_session_date(published_at(snapshot_id))
+
+
+def sessions(cache_dir=CACHE_DIR):
+    """{session date: ID of the last snapshot published for it}, oldest first."""
+    last = {}
+    for snapshot_id in list_ids(cache_dir):
+        last[session_date(snapshot_id)] = snapshot_id
+    return last
+
+
+def load_meta(snapshot_id, cache_dir=CACHE_DIR):
+    with open(os.path.join(snapshot_root(cache_dir), snapshot_id, META_NAME), "r") as f:
+        return json.load(f)
+
+
+# --- Writing ---
+
+class SnapshotWriter:
+    """Stage one snapshot; nothing is visible to readers until commit().
+
+        with SnapshotWriter() as snap:
+            inputs_dir = snap.pin(names)    # freeze the inputs about to be read
+            ...
+            snap.save("universe_scored", scored)
+        # committed on success, discarded on error
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, base=True):
+        self.cache_dir = cache_dir
+        self.root = snapshot_root(cache_dir)
+        os.makedirs(self.root, exist_ok=True)
+        # One publisher at a time, from carry-over to the pointer swap: two
+        # writers based on the same snapshot would drop each other's outputs
+        self._lock = open(os.path.join(self.root, LOCK_NAME), "w")
+        fcntl.flock(self._lock, fcntl.LOCK_EX)
+        self.id = new_id()
+        self.dir = os.path.join(self.root, STAGING_PREFIX + self.id)
+        self.files = {}
+        self.inputs = {}
+        self._records = []
+        self._written = set()
+        self.committed = False
+        try:
+            os.makedirs(self.dir)
+            if base:
+                self._carry_over()
+        except BaseException:
+            self.abort()
+            raise
+
+    def _carry_over(self):
+        # Artifacts this run doesn't replace come from the current snapshot;
+        # save() drops the carried outputs that depend on one it replaces
+        current = current_dir(self.cache_dir)
+        if current is None:
+            return
+        meta = load_meta(os.path.basename(current), self.cache_dir)
+        for name, fname in {**meta.get("files", {}), **meta.get("inputs", {})}.items():
+            _link(os.path.join(current, fname), os.path.join(self.dir, fname))
+        self.files = dict(meta.get("files", {}))
+        self.inputs = dict(meta.get("inputs", {}))
+
+    def pin(self, names, cache_dir=None):
+        """Hard-link the current file of each input artifact into the snapshot.
+
+        Returns the staging directory: load the inputs from there and they are
+        exactly the ones recorded with the outputs, even if a scraper replaces
+        the originals meanwhile.
+        """
+        source_dir = cache_dir or self.cache_dir
+        for name in names:
+            path = cache_io.find(name, source_dir)
+            if path is None:
+                continue
+            fname = os.path.basename(path)
+            old = self.inputs.get(name)
+            if old and old != fname:
+                for stale in (old, old + cache_io.META_SUFFIX):
+                    if os.path.lexists(os.path.join(self.dir, stale)):
+                        os.remove(os.path.join(self.dir, stale))
+            _link(path, os.path.join(self.dir, fname))
+            self.inputs[name] = fname
+        return self.dir
+
+    def save(self, name, data, source=None):
+        """Write artifact `name`; `source` is its cache manifest entry, recorded on commit."""
+        # cache_io.save replaces via rename, so a carried-over hard link is
+        # swapped out rather than written through
+        path = cache_io.save(name, data, cache_dir=self.dir)
+        self.files[name] = os.path.basename(path)
+        self._written.add(name)
+        if name in OUTPUTS:
+            self._drop_downstream(name)
+        final = os.path.join(self.root, self.id, self.files[name])
+        if source is not None:
+            self._records.append((source, data, final))
+        return final
+
+    def _drop_downstream(self, name):
+        # Carried-over outputs built from the old version of `name` would no
+        # longer match it; leave them out unless this run writes them too
+        for later in OUTPUTS[OUTPUTS.index(name) + 1:]:
+            fname = self.files.get(later)
+            if fname is None or later in self._written:
+                continue
+            for stale in (fname, fname + cache_io.META_SUFFIX):
+                if os.path.lexists(os.path.join(self.dir, stale)):
+                    os.remove(os.path.join(self.dir, stale))
+            del self.files[later]
+
+    def commit(self):
+        meta = {
+            "id": self.id,
+            "published_at": datetime.now(EASTERN).isoformat(),
+            "files": self.files,
+            "inputs": self.inputs,
+        }
+        cache_manifest.write_json(os.path.join(self.dir, META_NAME), meta, indent=2)
+        final = os.path.join(self.root, self.id)
+        os.rename(self.dir, final)
+        self.dir = final
+        cache_manifest.write_json(
+            os.path.join(self.root, POINTER_NAME),
+            {"id": self.id, "published_at": meta["published_at"]},
+        )
+        self.committed = True
+        # The manifest of the cache this snapshot belongs to
+        manifest_path = os.path.join(self.cache_dir, os.path.basename(cache_manifest.MANIFEST_PATH))
+        for source, data, path in self._records:
+            cache_manifest.record(source, symbols=data, path=os.path.relpath(path, self.cache_dir),
+                                  manifest_path=manifest_path)
+        self._unlock()
+        return self.id
+
+    def abort(self):
+        # Once the pointer has moved the snapshot is live; leave it to prune()
+        if not self.committed:
+            shutil.rmtree(self.dir, ignore_errors=True)
+        self._unlock()
+
+    def _unlock(self):
+        if not self._lock.closed:
+            fcntl.flock(self._lock, fcntl.LOCK_UN)
+            self._lock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+
+def _link(src, dst):
+    # Hard links share the (never rewritten) file; copy where links aren't
+    # possible. The metadata sidecar, if any, goes along with it.
+    for suffix in ("", cache_io.META_SUFFIX):
+        if os.path.lexists(dst + suffix):
+            os.remove(dst + suffix)
+        if suffix and not os.path.exists(src + suffix):
+            continue
+        try:
+            os.link(src + suffix, dst + suffix)
+        except OSError:
+            shutil.copy2(src + suffix, dst + suffix)
+
+
+def save(name, data, source=None, snapshot=None, cache_dir=CACHE_DIR):
+    """Write one artifact into `snapshot`, or publish it as a snapshot of its own."""
+    if snapshot is not None:
+        return snapshot.save(name, data, source)
+    with SnapshotWriter(cache_dir) as snap:
+        return snap.save(name, data, source)
+
+
+# --- Retention ---
+
+def prune(keep=KEEP, max_age_days=MAX_AGE_DAYS, cache_dir=CACHE_DIR, now=None, keep_daily=KEEP_DAILY):
+    """Delete snapshots beyond the newest `keep` or older than `max_age_days`.
+
+    The current snapshot is always kept, and so is the last snapshot of each
+    of the newest `keep_daily` sessions. Returns the deleted IDs.
+    """
+    root = snapshot_root(cache_dir)
+    if not os.path.isdir(root):
+        return []
+    now = now or time.time()
+    protected = {current_id(cache_dir)}
+    if keep_daily:
+        protected.update(list(sessions(cache_dir).values())[-keep_daily:])
+    ids = list_ids(cache_dir)
+    deleted = []
+    for rank, snapshot_id in enumerate(reversed(ids)):
+        if snapshot_id in protected:
+            continue
+        path = os.path.join(root, snapshot_id)
+        meta_path = os.path.join(path, META_NAME)
+        published = os.path.getmtime(meta_path if os.path.exists(meta_path) else path)
+        too_old = now - published > max_age_days * 86400
+        if rank >= keep or too_old:
+            shutil.rmtree(path, ignore_errors=True)
+            deleted.append(snapshot_id)
+    for d in os.listdir(root):
+        path = os.path.join(root, d)
+        if d.startswith(STAGING_PREFIX) and now - os.path.getmtime(path) > STAGING_MAX_AGE:
+            shutil.rmtree(path, ignore_errors=True)
+    return deleted
+
+
+def legacy_outputs(cache_dir=CACHE_DIR):
+    """Pipeline outputs written straight into the cache root before snapshots."""
+    paths = []
+    for fname in os.listdir(cache_dir):
+        stem, fmt = cache_io.split_name(fname.removesuffix(cache_io.META_SUFFIX))
+        if fmt is not None and any(stem.startswith(name) for name in OUTPUTS):
+            paths.append(os.path.join(cache_dir, fname))
+    return sorted(paths)
@@ -0,0 +1,110 @@
+# backend/task_graph.py
+
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from backend import metrics, profiling
+
+
+class Task:
+    def __init__(self, name, fn, deps=(), description=None):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.description = description or name
+
+
+class TaskResult:
+    def __init__(self, name, status, seconds=0.0, error=None, value=None):
+        self.name = name
+        self.status = status  # "ok" | "failed" | "skipped"
+        self.seconds = seconds
+        self.error = error
+        self.value = value
+
+
+def topological_order(tasks):
+    """Validate the graph and return task names in dependency order."""
+    by_name = {t.name: t for t in tasks}
+    if len(by_name) != len(tasks):
+        raise ValueError("Duplicate task names in graph")
+    for t in tasks:
+        unknown = [d for d in t.deps if d not in by_name]
+        if unknown:
+            raise ValueError(f"Task {t.name!r} depends on unknown task(s): {unknown}")
+
+    remaining = {t.name: set(t.deps) for t in tasks}
+    order = []
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle between: {sorted(remaining)}")
+        for name in ready:
+            order.append(name)
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return order
+
+
+def _timed(task):
+    start = time.perf_counter()
+    try:
+        with profiling.profile_thread(), metrics.stage(task.name):
+            value = task.fn()
+        return TaskResult(task.name, "ok", time.perf_counter() - start, value=value)
+    except Exception as e:
+        traceback.print_exc()
+        return TaskResult(task.name, "failed", time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+
+
+def run_graph(tasks, max_workers=4):
+    """Run tasks in one process, starting each as soon as its deps succeed.
+
+    Independent tasks run concurrently on a thread pool. A failed task marks
+    everything downstream of it as skipped; the rest of the graph carries on.
+    Returns {name: TaskResult} in topological order.
+    """
+    order = topological_order(tasks)
+    by_name = {t.name: t for t in tasks}
+    results = {}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while len(results) < len(tasks):
+            for name in order:
+                if name in results or name in running.values():
+                    continue
+                deps = by_name[name].deps
+                if any(d in results and results[d].status != "ok" for d in deps):
+                    results[name] = TaskResult(name, "skipped", error="upstream task failed")
+                    print(f"⏭️ Skipping {by_name[name].description} (upstream failure)")
+                elif all(d in results for d in deps):
+                    print(f"🔹 {by_name[name].description}...")
+                    running[pool.submit(_timed, by_name[name])] = name
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                result = future.result()
+                results[name] = result
+                if result.status == "ok":
+                    print(f"✅ {by_name[name].description} complete ({result.seconds:.1f}s).")
+                else:
+                    print(f"❌ {by_name[name].description} failed: {result.error}")
+
+    return {name: results[name] for name in order}
+
+
+def print_report(results, title="Task Report"):
+    print(f"\n📊 {title}")
+    width = max([len(name) for name in results] + [4])
+    for name, r in results.items():
+        icon = {"ok": "✅", "failed": "❌", "skipped": "⏭️"}[r.status]
+        line = f"  {icon} {name:<{width}}  {r.status:<7}  {r.seconds:7.2f}s"
+        if r.error:
+            line += f"  {r.error}"
+        print(line)
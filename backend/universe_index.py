@@ -0,0 +1,150 @@
+# backend/universe_index.py
+#
+# Query indexes over one scored universe snapshot, built once when the snapshot
+# changes: a row set per signal and per sector, the blocked rows, and the rows
+# in score order. A query intersects the (small) index sets it needs and only
+# materializes the page it returns.
+
+import os
+
+import numpy as np
+
+from backend import cache_io, sectors
+from backend.screenbuilder import TIERS
+from backend.signal_registry import BIT_POSITION, decode, entry_mask, mask_of
+
+RISK_MASK = mask_of("low_liquidity", "wide_spread")
+SORT_KEYS = {"score", "symbol"}
+DEFAULT_SORT = "-score"
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 5000
+
+
+def project(symbol, info, fields=None):
+    """Row for one entry: every field, or just `fields` (plus the symbol).
+
+    `signals` is computed, not stored: the names of the bits set in the
+    entry's `signal_mask`, in registry order.
+    """
+    if fields is None:
+        return {"symbol": symbol, **info}
+    row = {"symbol": symbol}
+    for f in fields:
+        if f == "signals":
+            row[f] = decode(entry_mask(info))
+        elif f in info:
+            row[f] = info[f]
+    return row
+
+
+class UniverseIndex:
+    def __init__(self, universe, version=None):
+        self.version = version
+        self.symbols = list(universe)
+        self.entries = list(universe.values())
+        n = len(self.symbols)
+
+        masks = np.fromiter((entry_mask(info) for info in self.entries), dtype=np.int64, count=n)
+        self.scores = np.fromiter((info.get("score", 0) for info in self.entries), dtype=np.int64, count=n)
+
+        # Rows in descending score order (ties keep universe order) and each
+        # row's position in it, so any subset can be put in score order cheaply
+        self.by_score = np.argsort(-self.scores, kind="stable")
+        self.sorted_scores = self.scores[self.by_score]
+        self.score_rank = np.empty(n, dtype=np.int64)
+        self.score_rank[self.by_score] = np.arange(n)
+        self.symbol_rank = np.empty(n, dtype=np.int64)
+        self.symbol_rank[np.argsort(np.array(self.symbols, dtype=object), kind="stable")] = np.arange(n)
+
+        self.signal_rows = {
+            name: np.flatnonzero(masks >> bit & 1) for name, bit in BIT_POSITION.items()
+        }
+        self.tier_rows = {
+            tier: np.flatnonzero(masks & mask_of(*table)) for tier, table in TIERS.items()
+        }
+        blocked = (masks & RISK_MASK) != 0
+        self.blocked_rows = {True: np.flatnonzero(blocked), False: np.flatnonzero(~blocked)}
+
+        # Keyed by registry name, so older snapshots' Yahoo-style names and
+        # ?sector=Technology both land on "Information Technology"
+        by_sector = {}
+        for i, info in enumerate(self.entries):
+            sector = info.get("sector")
+            by_sector.setdefault(sectors.canonical(sector) or sector, []).append(i)
+        self.sector_rows = {s: np.array(rows, dtype=np.int64) for s, rows in by_sector.items()}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def _candidates(self, tier, signals, sector, blocked):
+        """Row sets from each requested index, or None if nothing narrows the universe."""
+        sets = []
+        if tier is not None:
+            if tier not in self.tier_rows:
+                raise ValueError(f"unknown tier '{tier}' (expected one of {', '.join(self.tier_rows)})")
+            sets.append(self.tier_rows[tier])
+        for name in signals:
+            if name not in self.signal_rows:
+                raise ValueError(f"unknown signal '{name}'")
+            sets.append(self.signal_rows[name])
+        if sector is not None:
+            sets.append(self.sector_rows.get(sectors.canonical(sector) or sector, np.empty(0, dtype=np.int64)))
+        if blocked is not None:
+            sets.append(self.blocked_rows[blocked])
+        if not sets:
+            return None
+        sets.sort(key=len)
+        rows = sets[0]
+        for other in sets[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def query(self, min_score=None, tier=None, signals=(), sector=None, blocked=None,
+              sort=DEFAULT_SORT, limit=DEFAULT_LIMIT, offset=0, fields=None):
+        descending = sort.startswith("-")
+        key = sort.lstrip("-")
+        if key not in SORT_KEYS:
+            raise ValueError(f"unknown sort '{sort}' (expected [-]score or [-]symbol)")
+        limit = max(0, min(limit, MAX_LIMIT))
+        offset = max(0, offset)
+
+        rows = self._candidates(tier, signals, sector, blocked)
+        if rows is None and key == "score":
+            # Only a score cut-off: the result is a prefix of the score order
+            end = len(self)
+            if min_score is not None:
+                end = int(np.searchsorted(-self.sorted_scores, -min_score, side="right"))
+            ordered = self.by_score[:end]
+            if not descending:
+                ordered = ordered[::-1]
+            total = len(ordered)
+            page = ordered[offset:offset + limit]
+        else:
+            if rows is None:
+                rows = np.arange(len(self))
+            if min_score is not None:
+                rows = rows[self.scores[rows] >= min_score]
+            rank = self.score_rank if key == "score" else self.symbol_rank
+            # score_rank is already descending; symbol_rank is ascending
+            reverse = descending != (key == "score")
+            order = np.argsort(rank[rows], kind="stable")
+            if reverse:
+                order = order[::-1]
+            total = len(rows)
+            page = rows[order[offset:offset + limit]]
+
+        return {
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "results": [project(self.symbols[i], self.entries[i], fields) for i in page.tolist()],
+        }
+
+
+def load_index(path):
+    """Index for a scored universe file, tagged with the file's mtime/size."""
+    st = os.stat(path)
+    universe = cache_io.read_path(path)
+    return UniverseIndex(universe, version=(path, st.st_mtime_ns, st.st_size))
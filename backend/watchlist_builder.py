@@ -1,61 +1,74 @@
 # backend/watchlist_builder.py
 
-import os
-import json
+from backend import cache_io, snapshots
+from backend.signal_registry import BITS, entry_mask, mask_of
 
 CACHE_DIR = "backend/cache"
+WATCHLIST_NAME = "autowatchlist_cache"
 
-def build_autowatchlist(scored_path=None):
-    if scored_path is None:
-        # Default to latest scored file if not provided
-        files = [f for f in os.listdir(CACHE_DIR) if f.startswith("universe_scored_") and f.endswith(".json")]
-        if not files:
-            raise FileNotFoundError("No scored universe file found.")
-        files.sort(key=lambda f: os.path.getmtime(os.path.join(CACHE_DIR, f)), reverse=True)
-        scored_path = os.path.join(CACHE_DIR, files[0])
+# Tag: Strong Setup = at least 2 Tier 1 confluence
+STRONG_SETUP_MASK = mask_of("gap_up", "gap_down", "break_above_range", "break_below_range")
 
-    with open(scored_path, "r") as f:
-        universe = json.load(f)
+def watchlist_entry(info):
+    """Watchlist entry for one scored symbol, or None if it doesn't qualify."""
+    score = info.get("score", 0)
+    mask = entry_mask(info)
+    reasons = []
+    if mask & BITS["low_liquidity"]:
+            reasons.append("Low Liquidity")
+    if mask & BITS["wide_spread"]:
+            reasons.append("Wide Spread")
 
-    watchlist = {}
-    for symbol, info in universe.items():
-        score = info.get("score", 0)
-        signals = info.get("signals", {})
-        reasons = []
-        if signals.get("low_liquidity"):
-                reasons.append("Low Liquidity")
-        if signals.get("wide_spread"):
-                reasons.append("Wide Spread")
+    is_blocked = len(reasons) > 0
+
+    if score >= 3 or is_blocked:
+
+        tags = []
 
-        is_blocked = len(reasons) > 0
+        # Tag: Strong Setup
+        if bin(mask & STRONG_SETUP_MASK).count("1") >= 2:
+            tags.append("Strong Setup")
 
-        if score >= 3 or is_blocked:
 
-            tags = []
+        # Tag: Squeeze Watch
+        if mask & BITS["squeeze_watch"]:
+            tags.append("Squeeze Watch")
 
-            # Tag: Strong Setup = at least 2 Tier 1 confluence
-            t1_signals = ["gap_up", "gap_down", "break_above_range", "break_below_range"]
-            t1_hits = sum(1 for k in t1_signals if signals.get(k))
-            if t1_hits >= 2:
-                tags.append("Strong Setup")
+        # Tag: Early Watch
+        if mask & BITS["early_move"]:
+            tags.append("Early Watch")
 
+        # Copy so the scored universe passed in stays untouched
+        entry = dict(info)
+        entry["tags"] = tags
+        entry["isBlocked"] = is_blocked
+        entry["reasons"] = reasons
+        return entry
+    return None
 
-            # Tag: Squeeze Watch
-            if signals.get("squeeze_watch"):
-                tags.append("Squeeze Watch")
+def build_watchlist(universe):
+    watchlist = {}
+    for symbol, info in universe.items():
+        entry = watchlist_entry(info)
+        if entry is not None:
+            watchlist[symbol] = entry
+    return watchlist
+
+def save_watchlist(watchlist, snapshot=None, cache_dir=CACHE_DIR):
+    return snapshots.save(WATCHLIST_NAME, watchlist, source="autowatchlist",
+                          snapshot=snapshot, cache_dir=cache_dir)
 
-            # Tag: Early Watch
-            if signals.get("early_move"):
-                tags.append("Early Watch")
+def build_autowatchlist(scored_path=None, cache_dir=CACHE_DIR):
+    if scored_path is None:
+        # Default to latest scored file if not provided
+        scored_path = snapshots.find("universe_scored", cache_dir)
+        if scored_path is None:
+            raise FileNotFoundError("No scored universe file found.")
 
-            info["tags"] = tags
-            info["isBlocked"] = is_blocked
-            info["reasons"] = reasons
-            watchlist[symbol] = info
+    universe = cache_io.read_path(scored_path)
 
-    out_path = os.path.join(CACHE_DIR, "autowatchlist_cache.json")
-    with open(out_path, "w") as f:
-        json.dump(watchlist, f, indent=2)
+    watchlist = build_watchlist(universe)
+    out_path = save_watchlist(watchlist, cache_dir=cache_dir)
 
     print(f"✅ AutoWatchlist built with {len(watchlist)} entries → {out_path}")
     return watchlist
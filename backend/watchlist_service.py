@@ -0,0 +1,128 @@
+# backend/watchlist_service.py
+#
+# Serves the published autowatchlist (the one /api/autowatchlist and the SSE
+# stream read via snapshots.locate) as a score-sorted records list. When an
+# input file has changed since the current snapshot was built, the enrich →
+# score → watchlist pipeline is re-run and *published*, so every endpoint
+# moves to the new snapshot together. Results are memoized per (inputs,
+# published watchlist) version, including the encoded response body.
+# Rebuilds are single-flight: callers arriving mid-rebuild wait for it and
+# share its result instead of starting their own.
+
+import os
+import threading
+
+from backend import cache_io, enrich_universe, metrics, pipeline, response_cache, snapshots
+from backend.universe_index import project
+
+INPUT_ARTIFACTS = [enrich_universe.UNIVERSE] + pipeline.REQUIRED_INPUTS
+WATCHLIST = "autowatchlist_cache"
+MAX_PROJECTIONS = 16  # distinct ?fields= lists memoized per snapshot
+
+
+class Snapshot:
+    def __init__(self, key, watchlist, modified):
+        self.key = key
+        self.watchlist = watchlist
+        self.records = sorted(
+            ({"symbol": symbol, **entry} for symbol, entry in watchlist.items()),
+            key=lambda r: (-r.get("score", 0), r["symbol"]),
+        )
+        self.modified = modified
+        self.entry = response_cache.Entry(
+            key, response_cache.encode_json(self.records), modified
+        )
+        self._projections = {}
+
+    def projected(self, fields):
+        """Entry for the records cut down to `fields` (see universe_index.project)."""
+        fields = tuple(fields)
+        entry = self._projections.get(fields)
+        if entry is None:
+            rows = [project(r["symbol"], self.watchlist[r["symbol"]], fields) for r in self.records]
+            entry = response_cache.Entry(
+                (self.key, fields), response_cache.encode_json(rows), self.modified
+            )
+            if len(self._projections) < MAX_PROJECTIONS:
+                self._projections[fields] = entry
+        return entry
+
+
+class WatchlistService:
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.builds = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def fingerprint(self):
+        """(path, mtime_ns, size) of every input; any rewrite changes it."""
+        fp = []
+        for name in INPUT_ARTIFACTS:
+            version = cache_io.version(name, enrich_universe.CACHE_DIR)
+            if version is None:
+                raise FileNotFoundError(f"Missing cache input: {name}")
+            fp.append(version)
+        return tuple(fp)
+
+    def key(self):
+        """Input fingerprint plus the version of the published watchlist."""
+        return self.fingerprint(), snapshots.version(WATCHLIST, enrich_universe.CACHE_DIR)
+
+    def current(self):
+        """The published watchlist for the current inputs, publishing at most once per change."""
+        missing = pipeline.missing_inputs()
+        if missing:
+            raise FileNotFoundError(f"Missing cache inputs: {', '.join(missing)}")
+
+        key = self.key()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.key == key:
+            metrics.cache_lookup("watchlist_service", hit=True)
+            return snapshot
+
+        with self._lock:
+            # Whoever held the lock may have just published this exact version
+            key = self.key()
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.key == key:
+                metrics.cache_lookup("watchlist_service", hit=True)
+                return snapshot
+            metrics.cache_lookup("watchlist_service", hit=False)
+            if not self._published_from(key[0]):
+                pipeline.run(persist=True, engine=self.engine)
+                self.builds += 1
+                key = self.key()
+            self._snapshot = self._load(key)
+            return self._snapshot
+
+    def _published_from(self, fp):
+        # The current snapshot has a watchlist built from exactly these input
+        # files (pinned inputs are hard links, so they share mtime and size)
+        snap = snapshots.current_dir(enrich_universe.CACHE_DIR)
+        if snap is None:
+            return False
+        meta = snapshots.load_meta(os.path.basename(snap), enrich_universe.CACHE_DIR)
+        if WATCHLIST not in meta.get("files", {}):
+            return False
+        inputs = meta.get("inputs", {})
+        for name, (_, mtime_ns, size) in zip(INPUT_ARTIFACTS, fp):
+            if name not in inputs:
+                return False
+            try:
+                st = os.stat(os.path.join(snap, inputs[name]))
+            except OSError:
+                return False
+            if (st.st_mtime_ns, st.st_size) != (mtime_ns, size):
+                return False
+        return True
+
+    def _load(self, key):
+        version = key[1]
+        if version is None:
+            raise FileNotFoundError(f"Missing cache output: {WATCHLIST}")
+        path, mtime_ns, _ = version
+        return Snapshot(key, cache_io.read_path(path), mtime_ns / 1e9)
+
+
+watchlist_service = WatchlistService()
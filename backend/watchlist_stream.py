@@ -0,0 +1,141 @@
+# backend/watchlist_stream.py
+#
+# Server-sent events for the autowatchlist. One watcher task per API process
+# stats the autowatchlist_cache artifact; when a pipeline run replaces it, the new
+# watchlist is diffed against the last one and a single pre-encoded event is
+# fanned out to every connected client. Clients get a full snapshot when they
+# connect (or fall behind) and only the changes after that.
+
+import asyncio
+import os
+
+from backend import cache_io, snapshots
+from backend.response_cache import encode_json
+
+CACHE_DIR = "backend/cache"
+WATCHLIST_NAME = "autowatchlist_cache"
+
+POLL_SECONDS = float(os.environ.get("SCREENER_STREAM_POLL_SECONDS", "2"))
+HEARTBEAT_SECONDS = 15
+QUEUE_SIZE = 16
+
+# The fields the dashboard renders; diffs only look at these
+ENTRY_FIELDS = ["score", "tags", "isBlocked", "reasons", "tierHits"]
+
+
+def summarize(watchlist):
+    return {
+        symbol: {field: entry.get(field) for field in ENTRY_FIELDS}
+        for symbol, entry in watchlist.items()
+    }
+
+
+def diff_watchlists(old, new):
+    """{"added": {symbol: entry}, "removed": [symbol], "changed": {symbol: {field: value}}}.
+
+    Both arguments are summarize() output.
+    """
+    added = {s: new[s] for s in new.keys() - old.keys()}
+    removed = sorted(old.keys() - new.keys())
+    changed = {}
+    for symbol in new.keys() & old.keys():
+        before, after = old[symbol], new[symbol]
+        if before != after:
+            changed[symbol] = {f: after[f] for f in ENTRY_FIELDS if before.get(f) != after.get(f)}
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def format_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {encode_json(data).decode()}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+def _load(path):
+    # Columnar caches only decode the fields the diff looks at
+    return summarize(cache_io.read_path(path, fields=ENTRY_FIELDS))
+
+
+class WatchlistHub:
+    def __init__(self, name=WATCHLIST_NAME, cache_dir=CACHE_DIR, poll_seconds=POLL_SECONDS):
+        self.name = name
+        self.cache_dir = cache_dir
+        self.poll_seconds = poll_seconds
+        self.version = 0
+        self.snapshot = {}
+        self._file_version = None
+        self._snapshot_event = None
+        self._subscribers = set()
+        self._task = None
+        self._lock = asyncio.Lock()
+
+    def start(self):
+        # Started lazily by the first subscriber, inside the running loop
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    async def refresh(self):
+        """Reload the watchlist if the file changed; broadcast the diff."""
+        async with self._lock:
+            return await self._refresh()
+
+    async def _refresh(self):
+        # Resolving the pointer reads current.json; keep it off the event loop
+        file_version = await asyncio.to_thread(snapshots.version, self.name, self.cache_dir)
+        if file_version is None or file_version == self._file_version:
+            return False
+        path, mtime_ns, _ = file_version
+        try:
+            new = await asyncio.to_thread(_load, path)
+        except (OSError, ValueError):
+            return False  # mid-write; pick it up on the next poll
+        first = self._file_version is None
+        self._file_version = file_version
+        diff = diff_watchlists(self.snapshot, new)
+        self.snapshot = new
+        # The file's mtime doubles as the event id, so ids survive restarts
+        self.version = mtime_ns
+        self._snapshot_event = None
+        if not first and (diff["added"] or diff["removed"] or diff["changed"]):
+            self.publish(format_event("diff", diff, self.version))
+        return True
+
+    def snapshot_event(self):
+        if self._snapshot_event is None:
+            self._snapshot_event = format_event("snapshot", self.snapshot, self.version)
+        return self._snapshot_event
+
+    def publish(self, event):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow client: drop what it has queued and resend everything
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot_event())
+
+    async def _watch(self):
+        while self._subscribers:
+            await self.refresh()
+            await asyncio.sleep(self.poll_seconds)
+
+    async def stream(self, last_event_id=None):
+        """Async generator of SSE bytes for one client."""
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._subscribers.add(queue)
+        try:
+            await self.refresh()
+            self.start()
+            if last_event_id != str(self.version):
+                yield self.snapshot_event()
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+        finally:
+            self._subscribers.discard(queue)
@@ -1,51 +1,31 @@
 # backend/run_pipeline.py
-
-import subprocess
-import os
-from datetime import datetime
-
-print("🔁 [1/4] Building base universe...")
-subprocess.run(["python3", "backend/enrich_universe.py"], check=True)
-
-def check_required_cache():
-    today = datetime.now().strftime("%Y-%m-%d")
-    CACHE_DIR = "backend/cache"
-    required_files = [
-        f"tv_signals.json",
-        f"sector_etf_prices.json",
-        f"candles_5m.json",
-        f"multi_day_levels.json",
-        f"short_interest.json",
-    ]
-    missing = []
-    for fname in required_files:
-        full_path = os.path.join(CACHE_DIR, fname)
-        if not os.path.exists(full_path):
-            missing.append(fname)
-
-    enriched_file = os.path.join(CACHE_DIR, f"universe_enriched_{today}.json")
-    if os.path.exists(enriched_file):
-        pass  # ok
-    else:
-        missing.append(f"universe_enriched_{today}.json (expected from refresh)")
-
-    if missing:
-        print("\n❌ Missing or outdated cache files detected:")
-        for m in missing:
-            print(f" - {m}")
-        raise SystemExit("\n🛑 Aborting pipeline! Run Daily Refresh first.\n")
-
-print("🔎 Verifying cache/enrich freshness ...")
-check_required_cache()
-
-print("🧨 [2/4] Cleaning cache...")
-subprocess.run(["python3", "backend/cache_manager.py"], check=True)
-
-print("⚙️ [3/4] Scoring and saving autowatchlist output...")
-subprocess.run(["python3", "-m", "backend.screenbuilder"], check=True)
-from backend.watchlist_builder import build_autowatchlist
-
-print("📋 [4/4] Building AutoWatchlist from scored universe...")
-build_autowatchlist()
+#
+#   python run_pipeline.py [--profile] [--cprofile] [--tracemalloc]   (see backend/profiling.py)
+
+import sys
+
+from backend import cache_manager, metrics, pipeline, profiling
+
+print("🔎 Verifying cache inputs ...")
+missing = pipeline.missing_inputs()
+if missing:
+    print("\n❌ Missing cache files detected:")
+    for m in missing:
+        print(f" - {m}")
+    raise SystemExit("\n🛑 Aborting pipeline! Run Daily Refresh first.\n")
+
+with profiling.maybe_session("pipeline", profiling.options(sys.argv[1:])):
+    print("⚙️ [1/2] Enriching, scoring and building AutoWatchlist in memory...")
+    with metrics.run("pipeline"):
+        result = pipeline.run(persist=True)
+    print(f"📦 {len(result['scored'])} tickers scored, {len(result['watchlist'])} on the watchlist")
+    for stage, path in result["paths"].items():
+        print(f"💾 {stage}: {path}")
+
+    print("🧨 [2/2] Cleaning cache...")
+    with profiling.span("cleanup"):
+        cache_manager.cleanup_old_files()
+    with profiling.span("audit"):
+        cache_manager.audit_cache_files()
 
 print("✅ Pipeline complete. Watchlist and cache updated.")
@@ -0,0 +1,104 @@
+# tests/test_bar_store.py
+#
+# Incremental daily-bar updates against a stub provider: new sessions are
+# appended, a partial last bar is replaced, and a split (which re-adjusts the
+# whole history upstream) triggers a full re-download.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.signals.bar_store import DailyBarStore
+from backend.signals.fetch_engine import FetchEngine, Provider
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class StubProvider(Provider):
+    """Serves `history` (symbol -> OHLCV frame) through download(), like yf.download."""
+
+    def __init__(self, history, today):
+        self.history = history
+        self.today = pd.Timestamp(today)
+
+    def download(self, symbols, period, interval="1d"):
+        days = 365 if period == "1y" else int(period.rstrip("d"))
+        start = self.today - pd.Timedelta(days=days - 1)
+        frames = {s: self.history[s][self.history[s].index >= start] for s in symbols if s in self.history}
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+
+def bars(end, periods, close=100.0):
+    index = pd.bdate_range(end=end, periods=periods, name="Date")
+    closes = close + np.arange(periods, dtype=float)
+    return pd.DataFrame({"Open": closes - 0.5, "High": closes + 1, "Low": closes - 1,
+                         "Close": closes, "Volume": 1_000_000.0}, index=index)
+
+
+def update(store, history, today):
+    engine = FetchEngine(provider=StubProvider(history, today), concurrency=1, rate=0, retries=0)
+    return store.update(list(history), engine=engine, today=np.datetime64(today, "D"))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DailyBarStore(str(tmp_path))
+
+
+def test_backfill_then_append(store):
+    history = {"AAA": bars("2024-03-14", 30)}
+    update(store, history, "2024-03-14")
+    assert len(store.read("AAA")) == 30
+    assert store.manifest["AAA"]["last_date"] == "2024-03-14"
+
+    history["AAA"] = bars("2024-03-15", 31)  # same past, one more session
+    result = update(store, history, "2024-03-15")
+    assert result["appended_rows"] == 1
+    assert result["rebased"] == []
+    stored = store.read("AAA")
+    assert len(stored) == 31
+    assert str(stored["date"][-1]) == "2024-03-15"
+    assert np.array_equal(stored["close"], history["AAA"]["Close"].to_numpy())
+
+
+def test_partial_last_bar_is_replaced(store):
+    history = {"AAA": bars("2024-03-14", 30)}
+    update(store, history, "2024-03-14")
+
+    # The last stored bar was intraday; the completed one differs
+    history["AAA"].iloc[-1, history["AAA"].columns.get_loc("Close")] += 3
+    result = update(store, history, "2024-03-14")
+    assert result["appended_rows"] == 0
+    assert result["rebased"] == []
+    stored = store.read("AAA")
+    assert len(stored) == 30
+    assert stored["close"][-1] == history["AAA"]["Close"].iloc[-1]
+
+
+def test_split_rebases_history(store):
+    history = {"AAA": bars("2024-03-14", 30), "BBB": bars("2024-03-14", 30, close=50.0)}
+    update(store, history, "2024-03-14")
+
+    # 2:1 split in AAA: the feed re-adjusts every past price and volume
+    split = bars("2024-03-15", 31)
+    split[["Open", "High", "Low", "Close"]] /= 2
+    split["Volume"] *= 2
+    history["AAA"] = split
+    history["BBB"] = bars("2024-03-15", 31, close=50.0)
+
+    result = update(store, history, "2024-03-15")
+    assert result["rebased"] == ["AAA"]
+    assert result["appended_rows"] == 1  # BBB's new session
+
+    stored = store.read("AAA")
+    assert len(stored) == 31
+    assert store.manifest["AAA"]["rows"] == 31
+    assert np.allclose(stored["close"], split["Close"].to_numpy())
+    assert np.allclose(stored["volume"], split["Volume"].to_numpy())
+    assert store.manifest["AAA"]["checked"] == "2024-03-15"
+
+    # Reopening reads the rewritten file through the saved manifest
+    reopened = DailyBarStore(store.root)
+    assert np.array_equal(reopened.read("AAA")["close"], stored["close"])
@@ -0,0 +1,59 @@
+# tests/test_cache_io.py
+#
+# Every codec must read back exactly the table it wrote, and leave a `.meta`
+# sidecar that describes that file (and stops counting once it is rewritten).
+
+import os
+
+import pytest
+
+from backend import cache_io
+
+TABLE = {
+    "AAPL": {"price": 187.5, "volume": 1_200_000, "name": "Apple", "candles": [186.0, 188.25],
+             "flag": True, "maybe": None, "mixed": 3},
+    "MSFT": {"price": 410.0, "volume": 900_000, "name": "Microsoft", "candles": [],
+             "flag": False, "mixed": 2.5},
+    "BRK.B": {},
+}
+
+FORMATS = [
+    "npz",
+    "json",
+    pytest.param("parquet", marks=pytest.mark.skipif(cache_io.pa is None, reason="pyarrow not installed")),
+]
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_round_trip(tmp_path, fmt):
+    path = cache_io.save("quotes", TABLE, fmt=fmt, cache_dir=str(tmp_path))
+    assert path.endswith("." + fmt)
+    assert cache_io.load("quotes", cache_dir=str(tmp_path)) == TABLE
+    assert cache_io.load("quotes", fields=["price"], cache_dir=str(tmp_path)) == {
+        "AAPL": {"price": 187.5}, "MSFT": {"price": 410.0}, "BRK.B": {},
+    }
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_meta_sidecar(tmp_path, fmt):
+    path = cache_io.save("quotes", TABLE, fmt=fmt, cache_dir=str(tmp_path))
+    meta = cache_io.read_meta("quotes", cache_dir=str(tmp_path))
+    assert meta["file"] == os.path.basename(path)
+    assert meta["schema_version"] == cache_io.SCHEMA_VERSION
+    assert meta["records"] == 3
+    assert meta["empty"] == 1
+    assert meta["keys"] == ["AAPL", "MSFT", "BRK.B"]
+    assert meta["fields"]["maybe"] == {"present": 1, "null": 1}
+    assert meta["fields"]["price"] == {"present": 2, "null": 0}
+
+    # A rewrite that bypasses save() leaves the sidecar describing another file
+    with open(path, "ab") as f:
+        f.write(b"\n")
+    assert cache_io.read_meta("quotes", cache_dir=str(tmp_path)) is None
+
+
+def test_save_replaces_other_formats(tmp_path):
+    cache_io.save("quotes", TABLE, fmt="json", cache_dir=str(tmp_path))
+    path = cache_io.save("quotes", TABLE, fmt="npz", cache_dir=str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == ["quotes.npz", "quotes.npz.meta"]
+    assert cache_io.find("quotes", str(tmp_path)) == path
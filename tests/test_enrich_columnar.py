@@ -0,0 +1,33 @@
+# tests/test_enrich_columnar.py
+#
+# The columnar engine must produce exactly what enrich_universe.enrich()
+# does; verify_equivalence() runs both on the same synthetic inputs.
+
+import copy
+import time
+
+import pytest
+
+from backend import enrich_columnar
+from backend.bench import synthetic
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_columnar_matches_dict_engine(seed):
+    universe, inputs = synthetic.generate(2000, seed)
+    mismatches = enrich_columnar.verify_equivalence(universe, inputs)
+    assert not mismatches, f"{len(mismatches)} symbols differ, e.g. {list(mismatches.items())[:5]}"
+
+
+def test_columnar_enrich_50k_under_a_second():
+    # Best of a few runs, so one noisy run on a shared box doesn't fail it
+    universe, inputs = synthetic.generate(50_000, 0)
+    best = min(_timed_enrich(universe, inputs) for _ in range(3))
+    assert best < 1.0, f"columnar enrich took {best:.3f}s for 50k symbols"
+
+
+def _timed_enrich(universe, inputs):
+    universe, inputs = copy.deepcopy(universe), copy.deepcopy(inputs)
+    start = time.perf_counter()
+    enrich_columnar.enrich(universe, **inputs)
+    return time.perf_counter() - start
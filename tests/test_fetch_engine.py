@@ -0,0 +1,69 @@
+# tests/test_fetch_engine.py
+#
+# Only transient upstream failures are worth another attempt; bad data fails
+# the same way every time and must not burn the retry budget.
+
+import urllib.error
+
+import pytest
+
+from backend.signals import fetch_engine
+from backend.signals.fetch_engine import FakeProvider, FetchEngine, is_transient
+
+
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = _Response(status_code)
+
+
+@pytest.mark.parametrize("error, transient", [
+    (ConnectionError("reset"), True),
+    (TimeoutError("read timed out"), True),
+    (_HTTPError(429), True),
+    (_HTTPError(503), True),
+    (_HTTPError(404), False),
+    (urllib.error.HTTPError("http://x", 502, "Bad Gateway", None, None), True),
+    (urllib.error.HTTPError("http://x", 401, "Unauthorized", None, None), False),
+    (KeyError("regularMarketPrice"), False),
+    (ValueError("could not parse"), False),
+])
+def test_is_transient(error, transient):
+    assert is_transient(error) is transient
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(fetch_engine, "backoff_delay", lambda attempt: 0)
+
+
+def _engine():
+    return FetchEngine(provider=FakeProvider(), concurrency=1, rate=0, retries=3)
+
+
+def test_transient_errors_are_retried(no_backoff):
+    calls = []
+
+    def flaky(provider, symbol):
+        calls.append(symbol)
+        if len(calls) < 3:
+            raise ConnectionError("reset")
+        return {"ok": True}
+
+    result = _engine().run(["AAPL"], flaky, progress=False)
+    assert result.results == {"AAPL": {"ok": True}}
+    assert result.attempts["AAPL"] == 3
+
+
+def test_bad_data_is_not_retried(no_backoff):
+    def broken(provider, symbol):
+        return {}["regularMarketPrice"]
+
+    result = _engine().run(["AAPL"], broken, progress=False)
+    assert "AAPL" in result.errors
+    assert result.attempts["AAPL"] == 1
@@ -0,0 +1,64 @@
+# tests/test_market_calendar.py
+#
+# The calendar is derived from NYSE rules; check it against the exchange's
+# published schedules for known years.
+
+from datetime import date, datetime, time
+
+import pytest
+
+from backend import market_calendar
+
+NYSE_2024_HOLIDAYS = {
+    date(2024, 1, 1), date(2024, 1, 15), date(2024, 2, 19), date(2024, 3, 29),
+    date(2024, 5, 27), date(2024, 6, 19), date(2024, 7, 4), date(2024, 9, 2),
+    date(2024, 11, 28), date(2024, 12, 25),
+}
+
+
+def test_2024_holidays():
+    assert set(market_calendar.holidays(2024)) == NYSE_2024_HOLIDAYS
+
+
+def test_2024_early_closes():
+    assert market_calendar.early_closes(2024) == {date(2024, 7, 3), date(2024, 11, 29), date(2024, 12, 24)}
+
+
+def test_observed_holidays_2022():
+    holidays = market_calendar.holidays(2022)
+    # New Year's Day fell on a Saturday: no Friday closure
+    assert date(2021, 12, 31) not in market_calendar.holidays(2021)
+    assert date(2022, 1, 1) not in holidays
+    # Juneteenth and Christmas fell on a Sunday: closed the Monday after
+    assert date(2022, 6, 20) in holidays
+    assert date(2022, 12, 26) in holidays
+
+
+@pytest.mark.parametrize("d, close", [
+    (date(2024, 3, 28), time(16, 0)),
+    (date(2024, 11, 29), time(13, 0)),
+    (date(2024, 12, 24), time(13, 0)),
+    (date(2024, 7, 3), time(13, 0)),
+])
+def test_session_hours(d, close):
+    opens, closes = market_calendar.session(d)
+    assert (opens.date(), opens.time()) == (d, time(9, 30))
+    assert (closes.date(), closes.time()) == (d, close)
+    assert opens.tzinfo.zone == "America/New_York"
+
+
+@pytest.mark.parametrize("d", [date(2024, 3, 29), date(2024, 7, 4), date(2024, 12, 25), date(2024, 3, 30)])
+def test_closed_days_have_no_session(d):
+    assert market_calendar.session(d) is None
+
+
+def test_session_follows_daylight_saving():
+    # 9:30 ET is 14:30 UTC in winter and 13:30 UTC in summer
+    assert market_calendar.session(date(2024, 1, 2))[0].utcoffset().total_seconds() == -5 * 3600
+    assert market_calendar.session(date(2024, 7, 1))[0].utcoffset().total_seconds() == -4 * 3600
+
+
+def test_last_session_date_skips_holiday_weekend():
+    # Easter Monday morning, before the open: Good Friday was closed too
+    now = market_calendar.EASTERN.localize(datetime(2024, 4, 1, 8, 0))
+    assert market_calendar.last_session_date(now) == date(2024, 3, 28)